@@ -1,16 +1,19 @@
 from flask import redirect, request, url_for
 
+import routes.api
 import routes.bibtex
 import routes.citations
 import routes.delete
 import routes.doi_lookup
 import routes.edit
 import routes.export_bibtex
+import routes.import_bibtex
+import routes.internal
 import routes.main
 import routes.search
 import routes.select_entry_type
 import routes.testing_env
-from config import app, test_env
+from config import app, internal_metrics, test_env
 
 if test_env:
     @app.route("/test_env/reset_db")
@@ -46,6 +49,23 @@ if test_env:
         return routes.testing_env.json_citations_to_tags()
 
 
+if internal_metrics:
+    @app.route("/internal/pool")
+    def pool_metrics():
+        """Connection pool state and counters, for sizing workers"""
+        return routes.internal.pool_metrics()
+
+    @app.route("/internal/doi_cache")
+    def doi_cache_metrics():
+        """DOI cache hit and miss counters"""
+        return routes.internal.doi_cache_metrics()
+
+    @app.route("/internal/doi_client")
+    def doi_client_metrics():
+        """DOI metadata service latencies, retries and circuit breaker state"""
+        return routes.internal.doi_client_metrics()
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     """Renders the index page and handles new citation submissions."""
@@ -80,6 +100,12 @@ def delete_citation(citation_id):
     return routes.delete.post(citation_id)
 
 
+@app.route("/delete", methods=["POST"])
+def delete_citations():
+    """Deletes the selected citations"""
+    return routes.delete.post_batch()
+
+
 @app.route("/bibtex/<int:citation_id>", methods=["GET"])
 def show_bibtex(citation_id):
     """Renders the bibtex page for a specific citation by its ID"""
@@ -92,6 +118,18 @@ def export_bibtex():
     return routes.export_bibtex.get()
 
 
+@app.route("/export_bibtex/search", methods=["GET"])
+def export_bibtex_search():
+    """Exports all citations matching the current search as a .bib file"""
+    return routes.export_bibtex.search()
+
+
+@app.route("/import_bibtex", methods=["POST"])
+def import_bibtex():
+    """Imports citations from an uploaded .bib file"""
+    return routes.import_bibtex.post()
+
+
 @app.route("/search", methods=["GET"])
 @app.route("/citations/search", methods=["GET"])
 def citations_search():
@@ -111,3 +149,27 @@ def redirect_to_citations():
 def doi_lookup():
     """AJAX endpoint to fetch DOI metadata"""
     return routes.doi_lookup.post()
+
+
+@app.route("/doi_lookup/batch", methods=["POST"])
+def doi_lookup_batch():
+    """Resolves a batch of DOIs, streaming the results as JSON lines"""
+    return routes.doi_lookup.post_batch()
+
+
+@app.route("/api/citations", methods=["GET"])
+def api_citations():
+    """JSON API: one page of citations matching the search parameters"""
+    return routes.api.list_citations()
+
+
+@app.route("/api/citations/<int:citation_id>", methods=["GET"])
+def api_citation(citation_id):
+    """JSON API: a single citation by its ID"""
+    return routes.api.get_citation(citation_id)
+
+
+@app.route("/api/citations:batchGet", methods=["GET", "POST"])
+def api_citations_batch_get():
+    """JSON API: citations by a batch of IDs and/or citation keys"""
+    return routes.api.batch_get()
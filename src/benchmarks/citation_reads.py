@@ -0,0 +1,166 @@
+"""Compares the legacy and the current citation read queries.
+
+Generates a synthetic library inside a transaction, prints the query plans
+and latencies of both query shapes and rolls everything back afterwards,
+so it can be pointed at a development database.
+
+Usage (from the src directory):
+    poetry run python -m benchmarks.citation_reads --citations 100000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from config import app, db
+from repositories.citation_repository import _citations_sql
+
+# The per-row correlated subquery shape used before _citations_sql
+LEGACY_SQL = """
+    SELECT
+        c.id, et.name AS entry_type, c.citation_key, c.fields, c.row_version,
+        COALESCE((
+            SELECT array_agg(t2.name)
+            FROM citations_to_tags ctt2
+            JOIN tags t2 ON t2.id = ctt2.tag_id
+            WHERE ctt2.citation_id = c.id
+        ), ARRAY[]::text[]) AS tags,
+        COALESCE((
+            SELECT array_agg(cat2.name)
+            FROM citations_to_categories ctc2
+            JOIN categories cat2 ON cat2.id = ctc2.category_id
+            WHERE ctc2.citation_id = c.id
+        ), ARRAY[]::text[]) AS categories
+    FROM citations c
+    JOIN entry_types et ON c.entry_type_id = et.id
+    {where}
+    ORDER BY c.id
+    {limit}
+"""
+
+SCENARIOS = {
+    "full listing": ("", "", {}),
+    "first page": ("", "LIMIT :limit", {"limit": 50}),
+    "single citation": ("WHERE c.id = :citation_id", "", {"citation_id": 1}),
+}
+
+
+def generate_library(citations, tags, categories):
+    """Inserts a synthetic library with a skewed tag/category fan-out.
+
+    Every citation gets 0-5 tags and 0-2 categories, drawn so that a small
+    number of popular tags and categories cover most citations.
+    """
+    db.session.execute(text(
+        """
+        INSERT INTO citations (entry_type_id, citation_key, fields)
+        SELECT
+            (SELECT id FROM entry_types WHERE name = 'article'),
+            'bench-' || g,
+            jsonb_build_object(
+                'title', 'Synthetic title ' || g,
+                'author', 'Author ' || (g % 5000) || '; Author ' || (g % 777),
+                'year', (1950 + g % 75)::text,
+                'journaltitle', 'Journal ' || (g % 300)
+            )
+        FROM generate_series(1, :n) g
+        """
+    ), {"n": citations})
+
+    for table, count in (("tags", tags), ("categories", categories)):
+        db.session.execute(text(
+            f"""
+            INSERT INTO {table} (name)
+            SELECT 'bench-{table}-' || g FROM generate_series(1, :n) g
+            ON CONFLICT DO NOTHING
+            """
+        ), {"n": count})
+
+    links = (
+        ("citations_to_tags", "tag_id", "tags", tags, 6),
+        ("citations_to_categories", "category_id", "categories", categories, 3),
+    )
+    for link_table, column, table, count, fan_out in links:
+        db.session.execute(text(
+            f"""
+            INSERT INTO {link_table} (citation_id, {column})
+            SELECT c.id, x.id
+            FROM citations c
+            CROSS JOIN LATERAL generate_series(1, c.id % {fan_out}) s
+            CROSS JOIN LATERAL (
+                -- Referencing s draws a new index for every link; a draw
+                -- in the join condition would be a filter on x instead
+                SELECT 'bench-{table}-'
+                    || (1 + floor(:n * power(random(), 3)))::int AS name
+                WHERE s IS NOT NULL
+            ) pick
+            JOIN {table} x ON x.name = pick.name
+            WHERE c.citation_key LIKE 'bench-%'
+            ON CONFLICT DO NOTHING
+            """
+        ), {"n": count})
+
+    db.session.execute(text("ANALYZE"))
+
+
+def explain(sql, params):
+    rows = db.session.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params).fetchall()
+    return "\n".join(r[0] for r in rows)
+
+
+def time_query(sql, params, repeat):
+    """Returns the median wall-clock time of the query in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.session.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(citations, tags, categories, repeat, show_plans):
+    generate_library(citations, tags, categories)
+    first_id = db.session.execute(
+        text("SELECT min(id) FROM citations WHERE citation_key LIKE 'bench-%'")).scalar()
+
+    print(f"{'scenario':<18}{'legacy ms':>12}{'current ms':>12}")
+    for name, (where, limit, params) in SCENARIOS.items():
+        if "citation_id" in params:
+            params = {"citation_id": first_id}
+
+        legacy = LEGACY_SQL.format(where=where, limit=limit)
+        current = _citations_sql(
+            filters=[where.removeprefix("WHERE ")] if where else None,
+            limit_sql=limit,
+        )
+
+        legacy_ms = time_query(legacy, params, repeat)
+        current_ms = time_query(current, params, repeat)
+        print(f"{name:<18}{legacy_ms:>12.2f}{current_ms:>12.2f}")
+
+        if show_plans:
+            print(f"\n-- legacy plan: {name}\n{explain(legacy, params)}")
+            print(f"\n-- current plan: {name}\n{explain(current, params)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--citations", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--plans", action="store_true",
+                        help="print EXPLAIN ANALYZE output for each query")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            run(args.citations, args.tags, args.categories, args.repeat, args.plans)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
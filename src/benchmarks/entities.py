@@ -0,0 +1,129 @@
+"""Compares the memory use and build speed of the legacy and current citation entities.
+
+Reads synthetic citation rows generated by PostgreSQL (nothing is written),
+then converts the same rows with the legacy dict-backed entity and with the
+current __slots__ entity, reporting milliseconds and bytes per citation.
+
+Usage (from the src directory):
+    poetry run python -m benchmarks.entities --sizes 10000 100000 1000000
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from config import app, db
+from util import to_citation
+
+ROWS_SQL = """
+    SELECT
+        g AS id,
+        'article' AS entry_type,
+        'bench-' || g AS citation_key,
+        jsonb_build_object(
+            'title', 'Synthetic title ' || g,
+            'author', 'Author ' || (g % 5000) || '; Author ' || (g % 777),
+            'year', (1950 + g % 75)::text,
+            'journaltitle', 'Journal ' || (g % 300)
+        ) AS fields,
+        g::bigint AS row_version,
+        ARRAY['tag-' || (g % 50), 'tag-' || (g % 7)] AS tags,
+        ARRAY['category-' || (g % 5)] AS categories
+    FROM generate_series(1, :n) g
+"""
+
+
+class LegacyCitation:  # pylint: disable=too-few-public-methods
+    """The dict-backed Citation layout used before __slots__, copying its lists."""
+
+    def __init__(self, citation_id, entry_type, citation_key, fields, metadata=None):
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self._id = citation_id
+        self._entry_type = entry_type
+        self._citation_key = citation_key
+        self._fields = fields
+
+        metadata = metadata or {}
+        self._tags = list(metadata.get("tags") or [])
+        self._categories = list(metadata.get("categories") or [])
+
+
+def legacy_to_citation(row):
+    """The row conversion used before, with its per-call helpers."""
+
+    def _parse_fields(val):
+        if not val:
+            return {}
+        if isinstance(val, str):
+            return json.loads(val)
+        return val
+
+    def _to_list(val):
+        if not val:
+            return []
+        return list(val)
+
+    metadata = {
+        "tags": _to_list(getattr(row, "tags", None)),
+        "categories": _to_list(getattr(row, "categories", None)),
+    }
+    return LegacyCitation(
+        row.id, row.entry_type, row.citation_key, _parse_fields(row.fields), metadata
+    )
+
+
+def time_conversion(convert, rows, repeat):
+    """Returns the median time in milliseconds to convert all rows."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        entities = [convert(row) for row in rows]
+        timings.append((time.perf_counter() - start) * 1000)
+        del entities
+    return statistics.median(timings)
+
+
+def bytes_per_citation(convert, rows):
+    """Returns the memory held by the converted entities, per citation."""
+    gc.collect()
+    tracemalloc.start()
+    entities = [convert(row) for row in rows]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entities
+    return held / len(rows)
+
+
+def run(sizes, repeat):
+    print(f"{'citations':>10} {'entity':<8}{'ms':>10}{'bytes/citation':>16}")
+    for size in sizes:
+        rows = db.session.execute(text(ROWS_SQL), {"n": size}).fetchall()
+
+        for name, convert in (("legacy", legacy_to_citation), ("current", to_citation)):
+            ms = time_conversion(convert, rows, repeat)
+            per_citation = bytes_per_citation(convert, rows)
+            print(f"{size:>10} {name:<8}{ms:>10.1f}{per_citation:>16.0f}")
+
+        del rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            run(args.sizes, args.repeat)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
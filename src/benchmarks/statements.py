@@ -0,0 +1,118 @@
+"""Compares fresh, registered and prepared statements under a steady request load.
+
+Generates a synthetic library inside a transaction, then replays the same
+stream of single-citation lookups (by id, by key and the version check used
+for revalidation) three ways: building a new text() clause per call as the
+repositories did before, reusing the registered clause, and running the
+server-side prepared statement. Everything is rolled back afterwards.
+
+Usage (from the src directory):
+    poetry run python -m benchmarks.statements --citations 100000 --requests 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.citation_reads import generate_library
+from config import app, db
+from repositories.citation_repository import (
+    _CITATION_BY_ID,
+    _CITATION_BY_KEY,
+    _CITATION_VERSION,
+)
+from repositories.statements import statement
+
+
+def _lookups(count, first_id, citations, seed):
+    """Returns a reproducible stream of (prepared statement, params) pairs."""
+    rng = random.Random(seed)
+    lookups = []
+    for _ in range(count):
+        n = rng.randrange(citations)
+        kind = rng.choice(("id", "key", "version"))
+        if kind == "id":
+            lookups.append((_CITATION_BY_ID, {"citation_id": first_id + n}))
+        elif kind == "key":
+            lookups.append((_CITATION_BY_KEY, {"citation_key": f"bench-{n + 1}"}))
+        else:
+            lookups.append((_CITATION_VERSION, {"citation_id": first_id + n}))
+    return lookups
+
+
+def _run_fresh(prepared, params):
+    sql = str(prepared.statement)
+    return db.session.execute(text(sql), params).fetchall()
+
+
+def _run_registered(prepared, params):
+    sql = str(prepared.statement)
+    return db.session.execute(statement(sql), params).fetchall()
+
+
+def _run_prepared(prepared, params):
+    return prepared.execute(db.session, params).fetchall()
+
+
+MODES = {
+    "fresh text()": _run_fresh,
+    "registered": _run_registered,
+    "prepared": _run_prepared,
+}
+
+
+def planning_ms(sql, params):
+    """Returns the server's planning time for one execution of the query."""
+    rows = db.session.execute(
+        text(f"EXPLAIN (ANALYZE, SUMMARY) {sql}"), params).fetchall()
+    line = next(r[0] for r in rows if r[0].startswith("Planning Time"))
+    return float(line.split(":")[1].split()[0])
+
+
+def run(citations, requests, seed):
+    generate_library(citations, tags=2_000, categories=50)
+    first_id = db.session.execute(
+        text("SELECT min(id) FROM citations WHERE citation_key LIKE 'bench-%'")).scalar()
+    lookups = _lookups(requests, first_id, citations, seed)
+
+    planning = planning_ms(str(_CITATION_BY_ID.statement), {"citation_id": first_id})
+    print(f"planning time of the citation read: {planning:.3f} ms\n")
+
+    app.config["DB_POOL"]["prepared_statements"] = True
+    print(f"{'mode':<14}{'mean us':>10}{'p95 us':>10}{'requests/s':>12}")
+    for name, execute in MODES.items():
+        # Warm up caches and prepare the statements on this connection
+        for prepared, params in lookups[:50]:
+            execute(prepared, params)
+
+        timings = []
+        for prepared, params in lookups:
+            start = time.perf_counter()
+            execute(prepared, params)
+            timings.append((time.perf_counter() - start) * 1_000_000)
+
+        mean = statistics.fmean(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{name:<14}{mean:>10.1f}{p95:>10.1f}{1_000_000 / mean:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--citations", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    prepared_statements = app.config["DB_POOL"]["prepared_statements"]
+    with app.app_context():
+        try:
+            run(args.citations, args.requests, args.seed)
+        finally:
+            app.config["DB_POOL"]["prepared_statements"] = prepared_statements
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""Benchmark suite of the repository calls and routes behind every page.
+
+Times searches with different filter combinations, offset and keyset
+pagination, BibTeX exports, creating, editing and deleting citations, and
+the main Flask routes through the test client. Each scenario is warmed up
+and then run for a number of rounds; the per-round timings are summarized
+and written as JSON together with the commit and environment they were
+measured on, so runs on two commits can be compared with --compare.
+
+Unlike the other benchmarks this one commits: --load wipes the database
+and inserts a synthetic library (see benchmarks.synthetic), so point
+DATABASE_URL at a scratch database. The write scenarios remove or restore
+what they change, so the library can be reused across runs.
+
+Usage (from the src directory):
+    poetry run python -m benchmarks.suite --load 100000 --output before.json
+    poetry run python -m benchmarks.suite --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+import json_codec
+from app import app  # registers the routes
+from benchmarks.synthetic import LibraryGenerator, insert_library
+from config import db
+from db_helper import reset_db
+from entities.fragment_cache import fragments
+from repositories.category_repository import get_or_create_metadata
+from repositories.citation_repository import (
+    create_citation_with_metadata,
+    create_citations_bulk,
+    delete_citations,
+    get_citation_by_id,
+    get_citations,
+    get_citations_by_ids,
+    search_citations,
+    search_citations_page,
+    stream_citations_by_ids,
+    stream_search_citations,
+    update_citation_with_metadata,
+)
+from repositories.entry_type_repository import get_entry_types
+
+# A scenario returns a Bench: run(arg) is timed, prepare() is called before
+# every round to produce arg and cleanup() once after the last round
+Bench = namedtuple("Bench", "run prepare cleanup", defaults=(None, None))
+
+SCENARIOS = []
+
+# Citations sampled from the library for lookups, edits and exports
+SAMPLE_SIZE = 500
+
+# Pages walked before timing the deep keyset page
+DEEP_PAGE = 20
+
+# Prefix of the citation keys created by the write scenarios
+WRITE_PREFIX = "suite-write"
+
+
+def scenario(group, name, rounds=30):
+    """Registers a scenario: a function of the sampled Library returning a Bench."""
+    def register(build):
+        SCENARIOS.append((group, name, rounds, build))
+        return build
+    return register
+
+
+class Library:  # pylint: disable=too-many-instance-attributes
+    """Search terms, ids and metadata sampled from the library in the database."""
+
+    def __init__(self, rng):
+        rows = db.session.execute(
+            text("SELECT id, citation_key FROM citations ORDER BY id")).fetchall()
+        if not rows:
+            raise SystemExit("The database has no citations, run with --load first.")
+
+        self.size = len(rows)
+        self.ids = [row.id for row in rng.sample(rows, min(SAMPLE_SIZE, len(rows)))]
+
+        sample = get_citation_by_id(self.ids[0])
+        self.word = max(sample.fields["title"].split(), key=len).lower()
+        self.surname = sample.fields.get("author", "Smith").split(";")[0].split()[-1]
+        self.year = int(sample.fields.get("year", 2015))
+
+        self.tags = self._by_popularity("tags", "citations_to_tags", "tag_id")
+        self.categories = self._by_popularity(
+            "categories", "citations_to_categories", "category_id")
+        self.entry_types = {t.name: t.id for t in get_entry_types()}
+
+    @staticmethod
+    def _by_popularity(table, links, column):
+        return db.session.execute(text(
+            f"""
+            SELECT x.name FROM {table} x JOIN {links} l ON l.{column} = x.id
+            GROUP BY x.name ORDER BY count(*) DESC, x.name
+            """
+        )).scalars().all()
+
+    @property
+    def popular_tag(self):
+        return self.tags[0]
+
+    @property
+    def median_tag(self):
+        return self.tags[len(self.tags) // 2]
+
+    def rotating_ids(self):
+        """Returns a prepare() function cycling through the sampled ids."""
+        ids = itertools.cycle(self.ids)
+        return lambda: next(ids)
+
+
+def _search_page(queries):
+    return Bench(lambda _: search_citations_page(dict(queries)))
+
+
+def _bibtex(citations):
+    return sum(len(citation.to_bibtex()) for citation in citations)
+
+
+@scenario("search", "first page")
+def _search_first_page(_lib):
+    return _search_page({})
+
+
+@scenario("search", "full text")
+def _search_full_text(lib):
+    return _search_page({"q": lib.word})
+
+
+@scenario("search", "author substring")
+def _search_author(lib):
+    return _search_page({"author": lib.surname.lower()})
+
+
+@scenario("search", "fuzzy author")
+def _search_fuzzy_author(lib):
+    # A typo in the middle of the surname
+    typo = lib.surname[:len(lib.surname) // 2] + "x" + lib.surname[len(lib.surname) // 2 + 1:]
+    return _search_page({"author": typo.lower(), "fuzzy_author": True})
+
+
+@scenario("search", "year range")
+def _search_year_range(lib):
+    return _search_page({"year_from": lib.year - 2, "year_to": lib.year + 2})
+
+
+@scenario("search", "popular tag")
+def _search_popular_tag(lib):
+    return _search_page({"tags": [lib.popular_tag]})
+
+
+@scenario("search", "tag and category")
+def _search_tag_and_category(lib):
+    return _search_page({"tags": [lib.median_tag], "categories": [lib.categories[0]]})
+
+
+@scenario("search", "text, years and tag")
+def _search_combined(lib):
+    return _search_page({
+        "q": lib.word,
+        "year_from": lib.year - 10,
+        "year_to": lib.year + 10,
+        "tags": [lib.popular_tag],
+    })
+
+
+@scenario("search", "sorted by year")
+def _search_sorted(_lib):
+    return _search_page({"sort_by": "year", "direction": "DESC"})
+
+
+@scenario("search", f"keyset page {DEEP_PAGE}")
+def _search_deep_page(_lib):
+    queries = {"sort_by": "year"}
+    for _ in range(DEEP_PAGE - 1):
+        _, cursor, _ = search_citations_page(queries)
+        queries = {"sort_by": "year", "cursor": cursor}
+    return _search_page(queries)
+
+
+@scenario("search", "all citations of a tag", rounds=10)
+def _search_all(lib):
+    return Bench(lambda _: search_citations({"tags": [lib.median_tag]}))
+
+
+@scenario("pagination", "get_citations first page")
+def _get_citations_first(_lib):
+    return Bench(lambda _: get_citations(page=1, per_page=50))
+
+
+@scenario("pagination", "get_citations middle page")
+def _get_citations_middle(lib):
+    return Bench(lambda _: get_citations(page=lib.size // 100, per_page=50))
+
+
+@scenario("pagination", "get_citations last page")
+def _get_citations_last(lib):
+    return Bench(lambda _: get_citations(page=lib.size // 50, per_page=50))
+
+
+@scenario("pagination", "citations by 100 ids")
+def _get_by_ids(lib):
+    return Bench(lambda _: get_citations_by_ids(lib.ids[:100]))
+
+
+@scenario("export", "search results", rounds=10)
+def _export_search(lib):
+    return Bench(lambda _: _bibtex(stream_search_citations({"tags": [lib.median_tag]})))
+
+
+@scenario("export", f"{SAMPLE_SIZE} selected citations", rounds=10)
+def _export_selected(lib):
+    return Bench(lambda _: _bibtex(stream_citations_by_ids(lib.ids)))
+
+
+def _delete_created(prefix):
+    def cleanup():
+        ids = db.session.execute(
+            text("SELECT id FROM citations WHERE citation_key LIKE :prefix"),
+            {"prefix": f"{prefix}-%"},
+        ).scalars().all()
+        delete_citations(ids)
+    return cleanup
+
+
+@scenario("write", "create")
+def _create(lib):
+    categories, tags = get_or_create_metadata(lib.categories[:1], lib.tags[:3])
+    entry_type = namedtuple("EntryType", "id")(lib.entry_types["article"])
+    keys = (f"{WRITE_PREFIX}-create-{n}" for n in itertools.count())
+
+    return Bench(
+        lambda key: create_citation_with_metadata(
+            entry_type, key, {"title": "Benchmark", "year": lib.year}, categories, tags),
+        prepare=lambda: next(keys),
+        cleanup=_delete_created(f"{WRITE_PREFIX}-create"),
+    )
+
+
+@scenario("write", f"bulk create {SAMPLE_SIZE}", rounds=5)
+def _bulk_create(lib):
+    generator = LibraryGenerator(SAMPLE_SIZE, seed=2)
+    batches = itertools.count()
+
+    def prepare():
+        batch = next(batches)
+        return [
+            {
+                "entry_type_id": lib.entry_types[c["entry_type"]],
+                "citation_key": f"{WRITE_PREFIX}-bulk-{batch}-{c['citation_key']}",
+                "fields": c["fields"],
+                "tags": c["tags"],
+                "categories": [c["category"]],
+            }
+            for c in generator.citations()
+        ]
+
+    return Bench(create_citations_bulk, prepare, _delete_created(f"{WRITE_PREFIX}-bulk"))
+
+
+@scenario("write", "edit")
+def _edit(lib):
+    originals = {c.id: c for c in get_citations_by_ids(lib.ids)}
+    edited = set()
+    next_id = lib.rotating_ids()
+
+    def prepare():
+        citation = originals[next_id()]
+        edited.add(citation.id)
+        fields = dict(citation.fields, title=f"{citation.fields['title']} (revised)")
+        categories, tags = get_or_create_metadata(citation.categories, lib.tags[:2])
+        db.session.commit()
+        return citation.id, fields, categories, tags
+
+    def run(arg):
+        citation_id, fields, categories, tags = arg
+        update_citation_with_metadata(
+            citation_id, fields=fields, categories=categories, tags=tags)
+
+    def cleanup():
+        for citation_id in edited:
+            citation = originals[citation_id]
+            categories, tags = get_or_create_metadata(citation.categories, citation.tags)
+            update_citation_with_metadata(
+                citation_id, fields=citation.fields, categories=categories, tags=tags)
+
+    return Bench(run, prepare, cleanup)
+
+
+@scenario("write", "delete")
+def _delete(lib):
+    categories, tags = get_or_create_metadata(lib.categories[:1], lib.tags[:3])
+    entry_type = namedtuple("EntryType", "id")(lib.entry_types["article"])
+    keys = (f"{WRITE_PREFIX}-delete-{n}" for n in itertools.count())
+
+    def prepare():
+        citation = create_citation_with_metadata(
+            entry_type, next(keys), {"title": "Benchmark"}, categories, tags)
+        db.session.commit()
+        return citation.id
+
+    return Bench(lambda citation_id: delete_citations([citation_id]), prepare)
+
+
+def _request(method, url, **kwargs):
+    def run(_):
+        with app.test_client() as client:
+            response = client.open(url, method=method, **kwargs)
+            response.get_data()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}")
+    return run
+
+
+@scenario("routes", "GET /citations")
+def _route_citations(_lib):
+    return Bench(_request("GET", "/citations"))
+
+
+@scenario("routes", "GET /citations with filters")
+def _route_search(lib):
+    return Bench(_request(
+        "GET", "/citations", query_string={"q": lib.word, "tag_list": lib.popular_tag}))
+
+
+@scenario("routes", "GET /api/citations with fields")
+def _route_api(lib):
+    return Bench(_request(
+        "GET", "/api/citations",
+        query_string={"q": lib.word, "fields": "citation_key,title,year"}))
+
+
+@scenario("routes", "GET /api/citations:batchGet 100 ids")
+def _route_batch_get(lib):
+    ids = ",".join(str(i) for i in lib.ids[:100])
+    return Bench(_request("GET", "/api/citations:batchGet", query_string={"ids": ids}))
+
+
+@scenario("routes", "GET /bibtex/<id>")
+def _route_bibtex(lib):
+    return Bench(lambda citation_id: _request("GET", f"/bibtex/{citation_id}")(None),
+                 lib.rotating_ids())
+
+
+@scenario("routes", "GET /edit/<id>")
+def _route_edit_form(lib):
+    return Bench(lambda citation_id: _request("GET", f"/edit/{citation_id}")(None),
+                 lib.rotating_ids())
+
+
+@scenario("routes", "POST /edit/<id>")
+def _route_edit(lib):
+    # Posts every citation back unchanged, so the library stays as it was
+    forms = {}
+    for citation in get_citations_by_ids(lib.ids):
+        forms[citation.id] = {
+            "citation_key": citation.citation_key,
+            "entry_type": str(lib.entry_types[citation.entry_type]),
+            **{name: str(value) for name, value in citation.fields.items()},
+            "tag_list": citation.tags,
+            "category_list": citation.categories,
+        }
+
+    return Bench(
+        lambda citation_id: _request(
+            "POST", f"/edit/{citation_id}", data=forms[citation_id])(None),
+        lib.rotating_ids(),
+    )
+
+
+@scenario("routes", "GET /export_bibtex/search", rounds=10)
+def _route_export(lib):
+    return Bench(_request(
+        "GET", "/export_bibtex/search", query_string={"tag_list": lib.median_tag}))
+
+
+def summarize(timings):
+    """Summarizes per-round timings in seconds as milliseconds."""
+    ms = sorted(t * 1000 for t in timings)
+    mean = statistics.fmean(ms)
+    return {
+        "rounds": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(mean, 3),
+        "p95_ms": round(ms[min(len(ms) - 1, round(len(ms) * 0.95))], 3),
+        "max_ms": round(ms[-1], 3),
+        "stddev_ms": round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+        "ops": round(1000 / mean, 1) if mean else None,
+    }
+
+
+def measure(bench, rounds, warmup):
+    """Runs a bench for warmup + rounds rounds and summarizes the timed ones."""
+    timings = []
+    try:
+        for i in range(warmup + rounds):
+            arg = bench.prepare() if bench.prepare else None
+            start = time.perf_counter()
+            bench.run(arg)
+            elapsed = time.perf_counter() - start
+            # Each round ends its transaction like a request would
+            db.session.rollback()
+            if i >= warmup:
+                timings.append(elapsed)
+    finally:
+        db.session.rollback()
+        if bench.cleanup:
+            bench.cleanup()
+            db.session.commit()
+    return summarize(timings)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(lib, seed):
+    """Describes what the results were measured on."""
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "postgres": db.session.execute(text("SHOW server_version")).scalar(),
+        "json_backend": "orjson" if json_codec.orjson else "json",
+        "prepared_statements": app.config["DB_POOL"]["prepared_statements"],
+        "citations": lib.size,
+        "tags": len(lib.tags),
+        "categories": len(lib.categories),
+        "seed": seed,
+    }
+
+
+def compare(old, new):
+    """Prints the change in median of every scenario present in both runs."""
+    before = {r["scenario"]: r for r in old["results"]}
+    print(f"\ncompared to {old['environment']['commit'] or 'unknown commit'}:")
+    print(f"{'scenario':<48}{'before ms':>11}{'after ms':>11}{'change':>9}")
+    for result in new["results"]:
+        if result["scenario"] not in before:
+            continue
+        old_ms, new_ms = before[result["scenario"]]["median_ms"], result["median_ms"]
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        print(f"{result['scenario']:<48}{old_ms:>11.2f}{new_ms:>11.2f}{change:>+8.1f}%")
+
+
+def load(size, seed):
+    print(f"resetting the database and loading {size} citations...")
+    reset_db()
+    created = insert_library(
+        LibraryGenerator(size, seed),
+        progress=lambda n: print(f"  {n} citations", end="\r", flush=True))
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    print(f"  {created} citations")
+
+
+def run_suite(args):
+    if args.load:
+        load(args.load, args.seed)
+
+    app.secret_key = app.secret_key or "benchmark"
+    lib = Library(random.Random(args.seed))
+    results = []
+
+    print(f"{'scenario':<48}{'median ms':>11}{'p95 ms':>10}{'ops/s':>10}")
+    for group, name, rounds, build in SCENARIOS:
+        label = f"{group}: {name}"
+        if args.filter and args.filter not in label:
+            continue
+
+        # Every scenario starts from the same cold fragment cache
+        fragments.clear()
+        stats = measure(build(lib), args.rounds or rounds, args.warmup)
+        results.append({"scenario": label, "group": group, **stats})
+        print(f"{label:<48}{stats['median_ms']:>11.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['ops'] or 0:>10.1f}")
+
+    return {"environment": environment(lib, args.seed), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--load", type=int, metavar="CITATIONS",
+                        help="wipe the database and load a synthetic library first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, help="override the rounds of every scenario")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--filter", help="only run scenarios containing this text")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            report = run_suite(args)
+        finally:
+            db.session.rollback()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
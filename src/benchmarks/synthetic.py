@@ -0,0 +1,235 @@
+"""Generates synthetic citation libraries shaped like demo_data.json.
+
+The demo library is used as the template: entry types keep their demo
+proportions, fields are filled in per entry type from the demo citations,
+authors and title words are recombined from the demo ones and years spread
+around the demo years. Tags and categories follow a Zipf distribution over
+the demo names plus a long tail that grows with the library, so a few tags
+cover most citations like in a real library.
+
+The same size and seed always give the same library. It can be written out
+in the demo_data.json format, or inserted into the database in batches
+(this commits, so only use it on a scratch database).
+
+Usage (from the src directory):
+    poetry run python -m benchmarks.synthetic --citations 100000 --output library.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+from collections import Counter
+
+import json_codec
+from repositories.citation_repository import create_citations_bulk
+from repositories.entry_type_repository import get_entry_types
+
+DEMO_DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), "demo_data.json")
+
+# Library sizes the benchmark suite is run at
+SIZES = (10_000, 100_000, 1_000_000)
+
+# Citations per create_citations_bulk() call when inserting a library
+INSERT_BATCH_SIZE = 5_000
+
+# Skew of the tag and category popularity, 1 is classic Zipf
+ZIPF_EXPONENT = 1.1
+
+# Spread of the generated years around the demo ones, and their bounds
+YEAR_SPREAD = 8
+YEAR_RANGE = (1950, 2025)
+
+_KEY_CHARS = re.compile(r"[^a-z0-9]")
+
+
+def load_template(path=DEMO_DATA):
+    """Reads a library in the demo_data.json format."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def zipf_cum_weights(count, exponent=ZIPF_EXPONENT):
+    """Returns cumulative Zipf weights for ranks 1..count, for random.choices()."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def _long_tail(names, count, separator):
+    """Extends the names to count with numbered variants of the given ones."""
+    template_names, names = names, list(names)
+    for n in itertools.count(2):
+        if len(names) >= count:
+            break
+        names.extend(f"{name}{separator}{n}" for name in template_names[:count - len(names)])
+    return names
+
+
+def _authors(citations):
+    """Splits the demo author lists into first names and surnames."""
+    first_names, surnames = [], []
+    for citation in citations:
+        for author in citation["fields"].get("author", "").split(";"):
+            parts = author.split()
+            if len(parts) > 1:
+                first_names.append(" ".join(parts[:-1]))
+                surnames.append(parts[-1])
+    return sorted(set(first_names)), sorted(set(surnames))
+
+
+class LibraryGenerator:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """A reproducible synthetic library of the given size.
+
+    The vocabulary grows with the size: about sqrt(size) tags and
+    size ** 0.3 categories, never fewer than in the template.
+    """
+
+    def __init__(self, size, seed=1, template=None):
+        template = template or load_template()
+        self.size = size
+        self.seed = seed
+
+        demo = template["citations"]
+        self._types = Counter(c["entry_type"] for c in demo)
+        self._by_type = {
+            name: [c["fields"] for c in demo if c["entry_type"] == name] for name in self._types}
+        self._author_counts = [
+            len(c["fields"]["author"].split(";")) for c in demo if "author" in c["fields"]]
+        self._first_names, self._surnames = _authors(demo)
+        self._surname_weights = zipf_cum_weights(len(self._surnames))
+        self._title_words = [w for c in demo for w in c["fields"]["title"].split()]
+        self._title_lengths = [len(c["fields"]["title"].split()) for c in demo]
+        self._years = [int(c["fields"]["year"]) for c in demo if "year" in c["fields"]]
+        self._tag_counts = [len(c.get("tags") or []) for c in demo]
+        self._values = {}
+        for citation in demo:
+            for name, value in citation["fields"].items():
+                self._values.setdefault(name, set()).add(str(value))
+        self._values = {name: sorted(values) for name, values in self._values.items()}
+
+        # The most used demo names head the popularity ranking
+        demo_categories = Counter(c["category"] for c in demo if c.get("category"))
+        demo_tags = Counter(t for c in demo for t in c.get("tags") or [])
+        categories = sorted(template["categories"], key=lambda n: -demo_categories[n])
+        tags = sorted(template["tags"], key=lambda n: -demo_tags[n])
+
+        self.categories = _long_tail(
+            categories, max(len(categories), round(size ** 0.3)), " ")
+        self.tags = _long_tail(tags, max(len(tags), round(size ** 0.5)), "-")
+        self._category_weights = zipf_cum_weights(len(self.categories))
+        self._tag_weights = zipf_cum_weights(len(self.tags))
+
+    def _author(self, rng):
+        count = rng.choice(self._author_counts)
+        surnames = rng.choices(self._surnames, cum_weights=self._surname_weights, k=count)
+        return "; ".join(f"{rng.choice(self._first_names)} {s}" for s in surnames)
+
+    def _title(self, rng):
+        words = rng.sample(self._title_words, rng.choice(self._title_lengths))
+        return " ".join(words).capitalize()
+
+    def _year(self, rng):
+        year = round(rng.gauss(rng.choice(self._years), YEAR_SPREAD))
+        return min(max(year, YEAR_RANGE[0]), YEAR_RANGE[1])
+
+    def _fields(self, rng, entry_type, n):
+        fields = {}
+        for name in rng.choice(self._by_type[entry_type]):
+            if name == "author":
+                fields[name] = self._author(rng)
+            elif name == "title":
+                fields[name] = self._title(rng)
+            elif name == "year":
+                fields[name] = self._year(rng)
+            elif name == "pages":
+                first = rng.randint(1, 900)
+                fields[name] = f"{first}-{first + rng.randint(4, 30)}"
+            elif name in ("volume", "number"):
+                fields[name] = str(rng.randint(1, 200))
+            elif name == "doi":
+                fields[name] = f"10.5555/synthetic.{self.seed}.{n}"
+            else:
+                fields[name] = rng.choice(self._values[name])
+        return fields
+
+    def _tags(self, rng):
+        count = rng.choice(self._tag_counts)
+        tags = rng.choices(self.tags, cum_weights=self._tag_weights, k=count)
+        return list(dict.fromkeys(tags))
+
+    def citations(self):
+        """Yields the citations in the demo_data.json format."""
+        rng = random.Random(self.seed)
+        types = list(self._types)
+        type_weights = list(itertools.accumulate(self._types.values()))
+
+        for n in range(1, self.size + 1):
+            entry_type = rng.choices(types, cum_weights=type_weights)[0]
+            fields = self._fields(rng, entry_type, n)
+            author = fields.get("author", "anon").split(";")[0].split()[-1]
+            key = _KEY_CHARS.sub("", author.lower())
+
+            yield {
+                "citation_key": f"{key}{fields.get('year', '')}-{n}",
+                "entry_type": entry_type,
+                "fields": fields,
+                "category": rng.choices(
+                    self.categories, cum_weights=self._category_weights)[0],
+                "tags": self._tags(rng),
+            }
+
+
+def write_library(generator, f):
+    """Writes the library to f in the demo_data.json format, one citation
+    at a time."""
+    f.write('{"categories": ' + json_codec.dumps(generator.categories))
+    f.write(',\n "tags": ' + json_codec.dumps(generator.tags))
+    f.write(',\n "citations": [')
+    for i, citation in enumerate(generator.citations()):
+        f.write((",\n  " if i else "\n  ") + json_codec.dumps(citation))
+    f.write("\n ]}\n")
+
+
+def insert_library(generator, batch_size=INSERT_BATCH_SIZE, progress=None):
+    """Inserts the library into the database, committing every batch.
+
+    Returns the number of citations created.
+    """
+    entry_types = {t.name: t.id for t in get_entry_types()}
+    created = 0
+    citations = generator.citations()
+    while batch := list(itertools.islice(citations, batch_size)):
+        keys, _ = create_citations_bulk([
+            {
+                "entry_type_id": entry_types[c["entry_type"]],
+                "citation_key": c["citation_key"],
+                "fields": c["fields"],
+                "tags": c["tags"],
+                "categories": [c["category"]],
+            }
+            for c in batch
+        ])
+        created += len(keys)
+        if progress:
+            progress(created)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--citations", type=int, default=SIZES[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="-", help="file to write, - for stdout")
+    args = parser.parse_args()
+
+    generator = LibraryGenerator(args.citations, args.seed)
+    if args.output == "-":
+        write_library(generator, sys.stdout)
+        return
+    with open(args.output, "w", encoding="utf-8") as f:
+        write_library(generator, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import sys
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import util
+from config import app
+from repositories.citation_repository import create_citations_bulk
+from repositories.entry_type_repository import get_entry_types
+
+IMPORT_BATCH_SIZE = 1000
+
+# Entry types that do not describe a citation
+_SKIPPED_ENTRY_TYPES = {"comment", "preamble"}
+
+
+def _read_entries(stream):
+    """Yields (line_number, text) for each @-entry of a BibTeX stream.
+
+    The stream is read line by line, so only the entry being read is held
+    in memory. An entry left unclosed when a new line starts with '@' is
+    yielded as is, so that the parser can report it and carry on.
+    """
+    # pylint: disable=too-many-branches
+    buffer = []
+    start_line = None
+    opener = None
+    depth = 0
+    in_quote = False
+
+    for line_number, line in enumerate(stream, 1):
+        if buffer and line.lstrip().startswith("@"):
+            yield start_line, "".join(buffer)
+            buffer = []
+
+        for ch in line:
+            if not buffer:
+                if ch == "@":
+                    buffer = [ch]
+                    start_line = line_number
+                    opener, depth, in_quote = None, 0, False
+                continue
+
+            buffer.append(ch)
+
+            if opener is None:
+                if ch in "{(":
+                    opener = ch
+                continue
+
+            if ch == "{":
+                depth += 1
+            elif ch == "}" and depth > 0:
+                depth -= 1
+            elif ch == '"' and depth == 0:
+                in_quote = not in_quote
+            elif depth == 0 and not in_quote and ch == {"{": "}", "(": ")"}[opener]:
+                yield start_line, "".join(buffer)
+                buffer = []
+
+    if buffer:
+        yield start_line, "".join(buffer)
+
+
+class _EntryScanner:
+    """Splits the text of a single BibTeX entry into its parts."""
+
+    def __init__(self, entry_text, macros):
+        self._text = entry_text
+        self._pos = 0
+        self._macros = macros
+
+    def _skip_space(self):
+        while self._pos < len(self._text) and self._text[self._pos].isspace():
+            self._pos += 1
+
+    def _peek(self):
+        self._skip_space()
+        return self._text[self._pos] if self._pos < len(self._text) else ""
+
+    def read_until(self, stops):
+        start = self._pos
+        while self._pos < len(self._text) and self._text[self._pos] not in stops:
+            self._pos += 1
+        return self._text[start:self._pos].strip()
+
+    def expect(self, chars):
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"expected {chars!r} at position {self._pos}")
+        self._pos += 1
+        return ch
+
+    def _read_delimited(self, closer):
+        """Reads a {...} or "..." value part, keeping nested braces."""
+        start = self._pos
+        depth = 0
+        while self._pos < len(self._text):
+            ch = self._text[self._pos]
+            if ch == "{":
+                depth += 1
+            elif ch == "}" and depth > 0:
+                depth -= 1
+            elif ch == closer and depth == 0:
+                value = self._text[start:self._pos]
+                self._pos += 1
+                return value
+            self._pos += 1
+        raise ValueError("unterminated value")
+
+    def read_value(self, closer):
+        """Reads a field value, joining '#' concatenated parts and
+        expanding @string macros."""
+        parts = []
+        while True:
+            ch = self._peek()
+            if ch == "{":
+                self._pos += 1
+                parts.append(self._read_delimited("}"))
+            elif ch == '"':
+                self._pos += 1
+                parts.append(self._read_delimited('"'))
+            else:
+                word = self.read_until(f",#{closer}")
+                if not word:
+                    raise ValueError("missing value")
+                parts.append(self._macros.get(word.lower(), word))
+
+            if self._peek() != "#":
+                return "".join(parts)
+            self._pos += 1
+
+    def at(self, chars):
+        ch = self._peek()
+        return bool(ch) and ch in chars
+
+
+def _parse_entry(entry_text, macros):
+    """Parses one entry into (entry_type, citation_key, fields).
+
+    @string entries are added to macros and @comment/@preamble entries are
+    skipped; both return None.
+    """
+    scanner = _EntryScanner(entry_text, macros)
+    scanner.expect("@")
+    entry_type = scanner.read_until("{(").lower()
+    closer = {"{": "}", "(": ")"}[scanner.expect("{(")]
+
+    if entry_type in _SKIPPED_ENTRY_TYPES:
+        return None
+
+    if entry_type == "string":
+        name = scanner.read_until("=").lower()
+        scanner.expect("=")
+        macros[name] = scanner.read_value(closer)
+        return None
+
+    citation_key = scanner.read_until(f",{closer}")
+    fields = {}
+
+    while scanner.at(","):
+        scanner.expect(",")
+        if scanner.at(closer):
+            break
+        name = scanner.read_until(f"={closer}").lower()
+        scanner.expect("=")
+        fields[name] = scanner.read_value(closer)
+
+    scanner.expect(closer)
+
+    return entry_type, citation_key, fields
+
+
+def parse_bibtex(stream):
+    """Parses a BibTeX stream incrementally, one entry at a time.
+
+    Yields a dict per entry with `line`, `entry_type`, `citation_key`,
+    `fields` and `tags` (from the keywords field), or with `line`,
+    `citation_key` and `error` when the entry cannot be used.
+    """
+    macros = {}
+
+    for line, entry_text in _read_entries(stream):
+        try:
+            parsed = _parse_entry(entry_text, macros)
+        except ValueError as e:
+            yield {"line": line, "citation_key": None, "error": f"Malformed entry: {e}"}
+            continue
+
+        if parsed is None:
+            continue
+
+        entry_type, raw_key, raw_fields = parsed
+
+        try:
+            citation_key = util.extract_citation_key({"citation_key": raw_key})
+            keywords = raw_fields.pop("keywords", "")
+            fields = util.extract_fields(raw_fields)
+        except ValueError as e:
+            yield {"line": line, "citation_key": raw_key or None, "error": str(e)}
+            continue
+
+        tags = [
+            util.sanitize(k)
+            for k in keywords.replace(";", ",").split(",")
+            if util.sanitize(k)
+        ]
+
+        yield {
+            "line": line,
+            "entry_type": entry_type,
+            "citation_key": citation_key,
+            "fields": fields,
+            "tags": list(dict.fromkeys(tags)),
+        }
+
+
+def import_bibtex(stream, batch_size=IMPORT_BATCH_SIZE, categories=None, tags=None):
+    """Imports the entries of a BibTeX stream in batches.
+
+    Each batch of `batch_size` entries is written in its own transaction.
+    The given categories and tags are added to every imported citation,
+    next to the tags read from each entry's keywords.
+
+    Returns a report dict with the number of `created` citations and lists
+    of `conflicts` (keys that already exist) and `errors`, both as
+    (line, citation_key, message) tuples.
+    """
+    entry_types = {et.name: et.id for et in get_entry_types()}
+    report = {"created": 0, "conflicts": [], "errors": []}
+    batch = []
+
+    def _flush():
+        try:
+            created, conflicts = create_citations_bulk(batch)
+        except SQLAlchemyError as e:
+            report["errors"].extend(
+                (entry["line"], entry["citation_key"], f"Database error: {e}")
+                for entry in batch)
+            return
+
+        report["created"] += len(created)
+
+        lines = {}
+        for entry in batch:
+            lines.setdefault(entry["citation_key"], []).append(entry["line"])
+        for key in conflicts:
+            report["conflicts"].append(
+                (lines[key].pop(), key, f"Citation key '{key}' already exists."))
+
+    for entry in parse_bibtex(stream):
+        if "error" in entry:
+            report["errors"].append(
+                (entry["line"], entry["citation_key"], entry["error"]))
+            continue
+
+        entry_type_id = entry_types.get(entry["entry_type"])
+        if entry_type_id is None:
+            report["errors"].append((
+                entry["line"],
+                entry["citation_key"],
+                f"Unknown entry type '{entry['entry_type']}'.",
+            ))
+            continue
+
+        entry["entry_type_id"] = entry_type_id
+        entry["tags"] = list(dict.fromkeys(entry["tags"] + list(tags or [])))
+        entry["categories"] = list(categories or [])
+        batch.append(entry)
+
+        if len(batch) >= batch_size:
+            _flush()
+            batch = []
+
+    if batch:
+        _flush()
+
+    return report
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Import citations from a BibTeX (.bib) file.")
+    parser.add_argument("path", help="path to the .bib file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--category", action="append", default=[],
+                        help="category added to every imported citation")
+    parser.add_argument("--tag", action="append", default=[],
+                        help="tag added to every imported citation")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.path == "-":
+            report = import_bibtex(
+                sys.stdin, args.batch_size, args.category, args.tag)
+        else:
+            with open(args.path, "r", encoding="utf-8") as f:
+                report = import_bibtex(f, args.batch_size, args.category, args.tag)
+
+    for line, key, message in report["conflicts"] + report["errors"]:
+        print(f"line {line}: {key or '?'}: {message}")
+
+    print(
+        f"Imported {report['created']} citation(s), "
+        f"{len(report['conflicts'])} conflict(s), {len(report['errors'])} error(s)"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
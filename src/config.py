@@ -4,12 +4,38 @@ from dotenv import load_dotenv
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
+import db_pool
+import doi_cache
+import doi_client
+import json_codec
+import query_stats
+
 load_dotenv()
 
 test_env = getenv("TEST_ENV") == "true"
+internal_metrics = getenv("INTERNAL_METRICS") == "true"
 print(f"Test environment: {test_env}")
 
 app = Flask(__name__)
 app.secret_key = getenv("SECRET_KEY")
+app.json = json_codec.CodecJSONProvider(app)
 app.config["SQLALCHEMY_DATABASE_URI"] = getenv("DATABASE_URL")
+# psycopg2 decodes json and jsonb columns with the codec's loads, registered
+# as a type caster on each new connection, so rows carry ready-made objects
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "json_serializer": json_codec.dumps,
+    "json_deserializer": json_codec.loads,
+}
+app.config["DB_POOL"] = db_pool.pool_settings()
+app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(db_pool.engine_options(app.config["DB_POOL"]))
 db = SQLAlchemy(app)
+
+app.config["QUERY_STATS"] = query_stats.query_stats_settings()
+app.config["DOI_CACHE"] = doi_cache.doi_cache_settings()
+doi_cache.install(app.config["DOI_CACHE"])
+app.config["DOI_CLIENT"] = doi_client.doi_client_settings()
+doi_client.install(app.config["DOI_CLIENT"])
+
+with app.app_context():
+    db_pool.install(db.engine, app.config["DB_POOL"])
+    query_stats.install(app, db.engine, app.config["QUERY_STATS"])
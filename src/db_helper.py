@@ -1,9 +1,11 @@
 import os
 import re
+import sys
 
 from sqlalchemy import text
 
 from config import app, db
+from repositories.reference_data import invalidate_reference_data
 
 _IDENTIFIER_RE = re.compile(r"^\w*$")
 
@@ -22,6 +24,7 @@ def reset_db():
     Used mainly for tests.
     """
     print("\nClearing contents from all tables")
+    invalidate_reference_data()
 
     tables_in_db = tables()
     if not tables_in_db:
@@ -118,11 +121,45 @@ def init_db():
     sql = text(initial_data_sql)
     db.session.execute(sql)
     db.session.commit()
+    invalidate_reference_data()
 
     print("Initialized database with initial data")
 
 
+def migrate_db():
+    """
+    Applies the SQL migrations in sql/migrations to an existing database.
+    Migrations are applied in filename order and must be idempotent,
+    since fresh databases already get the same changes from schema.sql.
+    """
+    migrations_path = os.path.join(
+        os.path.dirname(__file__), "sql", "migrations")
+
+    if not os.path.isdir(migrations_path):
+        print(f"No migrations directory found; skipping: ({migrations_path})")
+        return
+
+    migration_files = sorted(
+        f for f in os.listdir(migrations_path) if f.endswith(".sql"))
+
+    for migration_file in migration_files:
+        print(f"Applying migration {migration_file}")
+
+        path = os.path.join(migrations_path, migration_file)
+        with open(path, "r", encoding="utf-8") as f:
+            migration_sql = f.read().strip()
+
+        sql = text(migration_sql)
+        db.session.execute(sql)
+        db.session.commit()
+
+    print(f"Applied {len(migration_files)} migration(s)")
+
+
 if __name__ == "__main__":  # pragma: no cover
     with app.app_context():
-        setup_db()
-        init_db()
+        if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+            migrate_db()
+        else:
+            setup_db()
+            init_db()
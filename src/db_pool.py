@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_APPLICATION_NAME = "ohtu-miniprojekti"
+
+# Connection pool settings, read from the environment:
+#   DB_POOL_SIZE            connections kept open (default 5)
+#   DB_MAX_OVERFLOW         extra connections opened under load (default 10)
+#   DB_POOL_TIMEOUT         seconds to wait for a free connection (default 30)
+#   DB_POOL_RECYCLE         seconds after which a connection is replaced (default 1800)
+#   DB_POOL_PRE_PING        test connections before use, true/false (default true)
+#   DB_STATEMENT_TIMEOUT_MS statement timeout in milliseconds, 0 for none (default 0)
+#   DB_APPLICATION_NAME     application_name shown in pg_stat_activity
+#   DB_PGBOUNCER            connect through PgBouncer in transaction pooling
+#                           mode, true/false (default false)
+#   DB_PREPARED_STATEMENTS  prepare the hottest queries on the server,
+#                           true/false (default true, always false with PgBouncer)
+#
+# In PgBouncer mode no session state is set up on the server: the statement
+# timeout is set for each transaction instead of as a startup option, and
+# server-side prepared statements are not used.
+
+
+def env_int(environ, name, default):
+    """Reads a non-negative integer setting, or returns default if it is unset."""
+    value = environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError as error:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from error
+    if number < 0:
+        raise ValueError(f"{name} must not be negative, got {value!r}")
+    return number
+
+
+def env_bool(environ, name, default):
+    """Reads a true/false setting, or returns default if it is unset."""
+    value = environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be true or false, got {value!r}")
+
+
+def pool_settings(environ=None):
+    """Reads the connection pool settings from the environment."""
+    environ = os.environ if environ is None else environ
+    pgbouncer = env_bool(environ, "DB_PGBOUNCER", False)
+
+    return {
+        "pool_size": env_int(environ, "DB_POOL_SIZE", 5),
+        "max_overflow": env_int(environ, "DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_int(environ, "DB_POOL_TIMEOUT", 30),
+        "pool_recycle": env_int(environ, "DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": env_bool(environ, "DB_POOL_PRE_PING", True),
+        "statement_timeout_ms": env_int(environ, "DB_STATEMENT_TIMEOUT_MS", 0),
+        "application_name": (
+            environ.get("DB_APPLICATION_NAME", "").strip() or DEFAULT_APPLICATION_NAME),
+        "pgbouncer": pgbouncer,
+        "prepared_statements": (
+            env_bool(environ, "DB_PREPARED_STATEMENTS", True) and not pgbouncer),
+    }
+
+
+def engine_options(settings):
+    """Returns the create_engine() options for the given pool settings."""
+
+    connect_args = {"application_name": settings["application_name"]}
+    if settings["statement_timeout_ms"] and not settings["pgbouncer"]:
+        # PgBouncer rejects unknown startup parameters such as options
+        connect_args["options"] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings["pool_size"],
+        "max_overflow": settings["max_overflow"],
+        "pool_timeout": settings["pool_timeout"],
+        "pool_recycle": settings["pool_recycle"],
+        "pool_pre_ping": settings["pool_pre_ping"],
+        "connect_args": connect_args,
+    }
+
+
+class PoolMetrics:
+    """Thread-safe counters of connection pool activity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._checkouts = 0
+            self._timeouts = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+            self._connects = 0
+            self._invalidations = 0
+
+    def record_checkout(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+    def record_connect(self):
+        with self._lock:
+            self._connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self._invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            waits = self._checkouts + self._timeouts
+            return {
+                "checkouts": self._checkouts,
+                "checkout_timeouts": self._timeouts,
+                "wait_ms_total": round(self._wait_total * 1000, 3),
+                "wait_ms_avg": round(self._wait_total * 1000 / waits, 3) if waits else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+            }
+
+
+metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """A QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except Exception:
+            metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_checkout(time.perf_counter() - start)
+        return entry
+
+
+def install(engine, settings):
+    """Registers the pool metrics and per-transaction settings on an engine."""
+
+    event.listen(engine, "connect", lambda *_: metrics.record_connect())
+    event.listen(engine, "invalidate", lambda *_: metrics.record_invalidation())
+
+    if settings["pgbouncer"] and settings["statement_timeout_ms"]:
+        timeout = str(settings["statement_timeout_ms"])
+
+        @event.listens_for(engine, "begin")
+        def _set_statement_timeout(conn):
+            conn.execute(
+                text("SELECT set_config('statement_timeout', :timeout, true)"),
+                {"timeout": timeout},
+            )
+
+
+def pool_status(engine, settings):
+    """Returns the current state of the engine's pool and its counters."""
+
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings["max_overflow"],
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool counts overflow from -pool_size until the pool is full
+        "overflow": max(pool.overflow(), 0),
+        "pgbouncer": settings["pgbouncer"],
+        **metrics.snapshot(),
+    }
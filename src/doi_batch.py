@@ -0,0 +1,121 @@
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import json_codec
+import util
+from config import app
+from doi_cache import ERROR, FOUND, normalize_doi
+
+# Largest number of DOIs accepted in one batch
+MAX_BATCH_DOIS = 1000
+
+# Lookups run at the same time per batch; the upstream service is shared,
+# so this stays small
+DEFAULT_WORKERS = 8
+
+
+class RateLimiter:  # pylint: disable=too-few-public-methods
+    """Spaces calls from any number of threads at least 1 / rate seconds apart."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """Blocks until the caller's turn."""
+        with self._lock:
+            now = time.monotonic()
+            turn = max(now, self._next)
+            self._next = turn + self.interval
+        if turn > now:
+            time.sleep(turn - now)
+
+
+def unique_dois(values):
+    """Extracts the DOIs from the given inputs, dropping repeated ones.
+
+    Returns a tuple of (dois, invalid), where dois lists (input, doi) pairs in
+    the order the DOIs first appear and invalid lists the inputs that contain
+    no DOI. DOIs are compared case-insensitively.
+    """
+    dois, invalid, seen = [], [], set()
+    for value in values:
+        value = str(value).strip()
+        if not value:
+            continue
+        doi = util._doi_extract(value)  # pylint: disable=protected-access
+        if not doi:
+            invalid.append(value)
+        elif normalize_doi(doi) not in seen:
+            seen.add(normalize_doi(doi))
+            dois.append((value, doi))
+    return dois, invalid
+
+
+def _lookup(value, doi, limiter):
+    if limiter:
+        limiter.wait()
+    # Each worker thread reads the DOI cache through its own session
+    with app.app_context():
+        status, fields = util.lookup_doi(doi)
+    return {"input": value, "doi": doi, "status": status, "fields": fields}
+
+
+def resolve_dois(values, workers=DEFAULT_WORKERS, rate=None):
+    """Resolves the DOIs of the given inputs concurrently, starting at most
+    `rate` lookups per second if given.
+
+    Yields one result dict per unique DOI as soon as its lookup completes,
+    so results arrive in completion order. The status is "found",
+    "not_found", or "error" when the lookup failed and may succeed if
+    retried. Inputs without a DOI are yielded first with the status
+    "invalid". If the caller stops iterating, lookups
+    that have not started are cancelled.
+    """
+    dois, invalid = unique_dois(values)
+    for value in invalid:
+        yield {"input": value, "doi": None, "status": "invalid", "fields": None}
+
+    if not dois:
+        return
+
+    limiter = RateLimiter(rate) if rate else None
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(dois))))
+    try:
+        futures = [executor.submit(_lookup, value, doi, limiter) for value, doi in dois]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Resolve DOI metadata, printing one JSON line per DOI.")
+    parser.add_argument("path", help="file with one DOI or DOI link per line, or - for stdin")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="lookups run at the same time")
+    args = parser.parse_args()
+
+    if args.path == "-":
+        values = sys.stdin.read().splitlines()
+    else:
+        with open(args.path, "r", encoding="utf-8") as f:
+            values = f.read().splitlines()
+
+    statuses = Counter()
+    for result in resolve_dois(values, args.workers):
+        statuses[result["status"]] += 1
+        print(json_codec.dumps(result), flush=True)
+
+    print(f"Resolved {statuses[FOUND]} of {len(values)} line(s), "
+          f"{statuses[ERROR]} failed and may be retried", file=sys.stderr)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from db_pool import env_bool, env_int
+
+# DOI metadata cache, read from the environment:
+#   DOI_CACHE          cache DOI lookups, true/false (default true)
+#   DOI_CACHE_TTL      seconds resolved metadata is served from the cache
+#                      (default 2592000, 30 days)
+#   DOI_NEGATIVE_TTL   seconds a DOI the resolver did not find is remembered
+#                      (default 86400, one day)
+#   DOI_CACHE_SIZE     DOIs kept in the in-process LRU in front of the
+#                      doi_cache table (default 4096)
+#
+# Lookups that fail for any other reason (timeouts, server errors, invalid
+# responses) are not cached, so they are retried on the next lookup; an
+# expired entry of the DOI is served in the meantime.
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+DEFAULT_MEMORY_SIZE = 4096
+
+# A cached lookup: status is FOUND or NOT_FOUND, fields is None unless found,
+# and expires_at is a time.time() timestamp
+CachedDoi = namedtuple("CachedDoi", "status fields expires_at")
+
+
+def doi_cache_settings(environ=None):
+    """Reads the DOI cache settings from the environment."""
+    environ = os.environ if environ is None else environ
+
+    return {
+        "enabled": env_bool(environ, "DOI_CACHE", True),
+        "ttl": env_int(environ, "DOI_CACHE_TTL", 30 * 24 * 3600),
+        "negative_ttl": env_int(environ, "DOI_NEGATIVE_TTL", 24 * 3600),
+        "size": env_int(environ, "DOI_CACHE_SIZE", DEFAULT_MEMORY_SIZE),
+    }
+
+
+def normalize_doi(doi):
+    """Returns the cache key of a DOI. DOIs are case-insensitive."""
+    return doi.strip().lower()
+
+
+def ttl_of(status, settings):
+    """Returns how many seconds a lookup with the given status is cached."""
+    return settings["ttl"] if status == FOUND else settings["negative_ttl"]
+
+
+class DoiLru:
+    """A bounded, thread-safe LRU of cached lookups that drops expired ones."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doi, now):
+        with self._lock:
+            entry = self._items.get(doi)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._items[doi]
+                return None
+            self._items.move_to_end(doi)
+            return entry
+
+    def put(self, doi, entry):
+        with self._lock:
+            self._items[doi] = entry
+            self._items.move_to_end(doi)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DoiCacheStats:
+    """Thread-safe counters of DOI cache activity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(
+                ("memory_hits", "db_hits", "negative_hits", "stale_hits", "misses", "stores",
+                 "errors"), 0)
+
+    def record(self, name, negative=False):
+        with self._lock:
+            self._counts[name] += 1
+            if negative:
+                self._counts["negative_hits"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["memory_hits"] + counts["db_hits"] + counts["misses"]
+        hits = counts["memory_hits"] + counts["db_hits"]
+        return {
+            **counts,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(memory),
+            "memory_size": memory.maxsize,
+        }
+
+
+memory = DoiLru(DEFAULT_MEMORY_SIZE)
+stats = DoiCacheStats()
+
+
+def install(settings):
+    """Sizes the in-process LRU from the settings."""
+    memory.maxsize = settings["size"]
@@ -0,0 +1,272 @@
+import os
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import json_codec
+from db_pool import env_int
+
+# HTTP client of the DOI metadata service, read from the environment:
+#   DOI_METADATA_URL            CSL-JSON metadata endpoint
+#                               (default https://citation.doi.org/metadata)
+#   DOI_HTTP_POOL_SIZE          keep-alive connections per host, also the
+#                               most requests in flight at once (default 10)
+#   DOI_HTTP_CONNECT_TIMEOUT_MS connect timeout (default 2000)
+#   DOI_HTTP_READ_TIMEOUT_MS    read timeout (default 5000)
+#   DOI_HTTP_RETRIES            retries of timeouts, connection errors and
+#                               429/5xx responses (default 2)
+#   DOI_HTTP_BACKOFF_MS         base delay before a retry, doubled on every
+#                               retry and jittered (default 200)
+#   DOI_BREAKER_THRESHOLD       consecutive failed lookups that open the
+#                               circuit breaker, 0 to disable it (default 5)
+#   DOI_BREAKER_RESET_SECONDS   seconds the breaker stays open before one
+#                               trial lookup is let through (default 30)
+#   DOI_OFFLINE                 use of the doi_metadata table imported from
+#                               a local dump (see doi_dump): off, first to
+#                               look DOIs up there before calling the
+#                               service, or only to never call it (default off)
+#
+# While the breaker is open lookups fail immediately instead of waiting on
+# the service, and the DOI cache serves what it has, even if expired.
+
+DEFAULT_METADATA_URL = "https://citation.doi.org/metadata"
+
+ACCEPT = "application/vnd.citationstyles.csl+json, application/json"
+
+OFFLINE_OFF = "off"
+OFFLINE_FIRST = "first"
+OFFLINE_ONLY = "only"
+OFFLINE_MODES = (OFFLINE_OFF, OFFLINE_FIRST, OFFLINE_ONLY)
+
+# Responses worth retrying: rate limiting and server side failures
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# Recent request latencies kept for the percentiles in the metrics
+LATENCY_SAMPLES = 1024
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling the service while the circuit breaker is open."""
+
+
+def doi_client_settings(environ=None):
+    """Reads the DOI metadata client settings from the environment."""
+    environ = os.environ if environ is None else environ
+    offline = environ.get("DOI_OFFLINE", "").strip().lower() or OFFLINE_OFF
+    if offline not in OFFLINE_MODES:
+        raise ValueError(f"DOI_OFFLINE must be one of {', '.join(OFFLINE_MODES)}, got {offline!r}")
+
+    return {
+        "url": environ.get("DOI_METADATA_URL", "").strip() or DEFAULT_METADATA_URL,
+        "pool_size": max(env_int(environ, "DOI_HTTP_POOL_SIZE", 10), 1),
+        "connect_timeout_ms": env_int(environ, "DOI_HTTP_CONNECT_TIMEOUT_MS", 2000),
+        "read_timeout_ms": env_int(environ, "DOI_HTTP_READ_TIMEOUT_MS", 5000),
+        "retries": env_int(environ, "DOI_HTTP_RETRIES", 2),
+        "backoff_ms": env_int(environ, "DOI_HTTP_BACKOFF_MS", 200),
+        "breaker_threshold": env_int(environ, "DOI_BREAKER_THRESHOLD", 5),
+        "breaker_reset_seconds": env_int(environ, "DOI_BREAKER_RESET_SECONDS", 30),
+        "offline": offline,
+    }
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and then lets one trial
+    call through every `reset_seconds` until one succeeds."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self):
+        """Returns whether a call may be made now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_seconds:
+                # The next trial is only let through after another period,
+                # even if this one never reports back
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.threshold and (
+                    self.state == self.HALF_OPEN or self.failures >= self.threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class DoiClientMetrics:
+    """Thread-safe counters and latencies of requests to the metadata service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys((
+                "requests", "retries", "timeouts", "connection_errors",
+                "server_errors", "short_circuits"), 0)
+            self._latency_total = 0.0
+            self._latency_max = 0.0
+            self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._counts["requests"] += 1
+            self._latency_total += seconds
+            self._latency_max = max(self._latency_max, seconds)
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+            total, maximum = self._latency_total, self._latency_max
+
+        percentiles = {"latency_ms_p50": 0.0, "latency_ms_p95": 0.0}
+        if len(latencies) > 1:
+            cuts = statistics.quantiles(latencies, n=20)
+            percentiles = {
+                "latency_ms_p50": round(statistics.median(latencies) * 1000, 3),
+                "latency_ms_p95": round(cuts[-1] * 1000, 3),
+            }
+        elif latencies:
+            percentiles = dict.fromkeys(percentiles, round(latencies[0] * 1000, 3))
+
+        return {
+            **counts,
+            "latency_ms_avg": round(total * 1000 / counts["requests"], 3)
+            if counts["requests"] else 0.0,
+            "latency_ms_max": round(maximum * 1000, 3),
+            **percentiles,
+        }
+
+
+metrics = DoiClientMetrics()
+
+
+class DoiClient:
+    """A shared keep-alive session to the DOI metadata service with retries
+    and a circuit breaker."""
+
+    def __init__(self, settings):
+        self.configure(settings)
+
+    def configure(self, settings):
+        """Replaces the session and the breaker for the given settings."""
+        self.settings = settings
+
+        # pool_block caps the connections, and so the requests in flight, per host
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=settings["pool_size"], pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = ACCEPT
+
+        self.breaker = CircuitBreaker(
+            settings["breaker_threshold"], settings["breaker_reset_seconds"])
+
+    def _backoff(self, retry):
+        """Returns the jittered delay in seconds before the given retry."""
+        delay = self.settings["backoff_ms"] / 1000 * 2 ** (retry - 1)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _request(self, doi):
+        timeout = (
+            self.settings["connect_timeout_ms"] / 1000,
+            self.settings["read_timeout_ms"] / 1000,
+        )
+        start = time.perf_counter()
+        try:
+            return self.session.get(self.settings["url"], params={"doi": doi}, timeout=timeout)
+        finally:
+            metrics.record_latency(time.perf_counter() - start)
+
+    def get_json(self, doi):
+        """Returns the decoded metadata record of a DOI.
+
+        Raises requests.HTTPError for error responses (404 for unknown DOIs),
+        CircuitOpenError while the breaker is open, and the last error once
+        the retries of a failing lookup run out.
+        """
+
+        if not self.breaker.allow():
+            metrics.record("short_circuits")
+            raise CircuitOpenError("DOI metadata service is unavailable, not retrying yet")
+
+        error = None
+        for attempt in range(self.settings["retries"] + 1):
+            if attempt:
+                metrics.record("retries")
+                time.sleep(self._backoff(attempt))
+
+            try:
+                resp = self._request(doi)
+            except requests.Timeout as e:
+                metrics.record("timeouts")
+                error = e
+                continue
+            except requests.ConnectionError as e:
+                metrics.record("connection_errors")
+                error = e
+                continue
+
+            if resp.status_code in RETRY_STATUSES:
+                metrics.record("server_errors")
+                error = requests.HTTPError(
+                    f"{resp.status_code} from the DOI metadata service", response=resp)
+                continue
+
+            # Any other answer, 404 included, means the service is up
+            self.breaker.record_success()
+            resp.raise_for_status()
+            return json_codec.loads(resp.content)
+
+        self.breaker.record_failure()
+        raise error
+
+    def status(self):
+        """Returns the breaker state and the request metrics."""
+        return {
+            "offline": self.settings["offline"],
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            **metrics.snapshot(),
+        }
+
+
+client = DoiClient(doi_client_settings())
+
+
+def install(settings):
+    """Configures the shared client with the given settings."""
+    client.configure(settings)
@@ -0,0 +1,123 @@
+import argparse
+import gzip
+import sys
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import json_codec
+import util
+from config import app, db
+from repositories.doi_metadata_repository import store_dump_fields
+
+# Imports a local JSON-Lines dump of DOI metadata, one CSL-JSON record per
+# line as returned by the metadata service, into the doi_metadata table.
+# Lookups use it when DOI_OFFLINE is set (see doi_client).
+
+DUMP_BATCH_SIZE = 5000
+
+
+def read_dump(stream):
+    """Parses a JSON-Lines dump incrementally, one record at a time.
+
+    Yields (line_number, doi, fields) for each record with a DOI and usable
+    metadata, and (line_number, None, message) for the others.
+    """
+    # pylint: disable=protected-access
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json_codec.loads(line)
+        except ValueError:
+            yield line_number, None, "Malformed JSON"
+            continue
+
+        if not isinstance(record, dict):
+            yield line_number, None, "Not a JSON object"
+            continue
+
+        doi = util._doi_extract(record.get("DOI") or record.get("doi") or "")
+        if not doi:
+            yield line_number, None, "No DOI"
+            continue
+
+        fields = util._doi_parse_fields(record)
+        if not fields:
+            yield line_number, None, f"No usable metadata for {doi}"
+            continue
+
+        yield line_number, doi, fields
+
+
+def import_dump(stream, batch_size=DUMP_BATCH_SIZE, progress=None, on_skip=None):
+    """Imports the records of a dump stream in batches.
+
+    Each batch of `batch_size` records is written in its own transaction;
+    progress(report) is called after each one and on_skip(line, message)
+    for each record that is skipped.
+
+    Returns a report dict with the number of `imported` and `skipped`
+    records.
+    """
+    report = {"imported": 0, "skipped": 0}
+    batch = []
+
+    def _flush():
+        try:
+            report["imported"] += store_dump_fields(batch)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+        batch.clear()
+        if progress:
+            progress(report)
+
+    for line_number, doi, fields in read_dump(stream):
+        if doi is None:
+            report["skipped"] += 1
+            if on_skip:
+                on_skip(line_number, fields)
+            continue
+
+        batch.append((doi, fields))
+        if len(batch) >= batch_size:
+            _flush()
+
+    if batch:
+        _flush()
+
+    return report
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Import a JSON-Lines dump of DOI metadata for offline lookups.")
+    parser.add_argument("path", help="path to the .jsonl or .jsonl.gz dump, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=DUMP_BATCH_SIZE)
+    parser.add_argument("--verbose", action="store_true", help="list the skipped records")
+    args = parser.parse_args()
+
+    def _progress(report):
+        print(f"{report['imported']} imported, {report['skipped']} skipped",
+              file=sys.stderr, flush=True)
+
+    def _skipped(line, message):
+        print(f"line {line}: {message}")
+
+    on_skip = _skipped if args.verbose else None
+
+    with app.app_context():
+        if args.path == "-":
+            report = import_dump(sys.stdin, args.batch_size, _progress, on_skip)
+        else:
+            opener = gzip.open if args.path.endswith(".gz") else open
+            with opener(args.path, "rt", encoding="utf-8") as f:
+                report = import_dump(f, args.batch_size, _progress, on_skip)
+
+    print(f"Imported {report['imported']} record(s), skipped {report['skipped']}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,130 @@
+import argparse
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import util
+from config import app, db
+from doi_batch import DEFAULT_WORKERS, resolve_dois
+from doi_cache import normalize_doi
+from repositories.citation_enrichment_repository import (
+    get_citations_with_doi,
+    merge_citation_fields,
+)
+from repositories.job_checkpoint_repository import (
+    delete_checkpoint,
+    get_checkpoint,
+    save_checkpoint,
+)
+
+# Fills in the fields that citations with a DOI are missing from the DOI's
+# metadata. It runs as its own process (e.g. from cron) rather than in the
+# request workers, and resumes from its checkpoint after the last committed
+# batch.
+
+JOB_NAME = "doi_enrichment"
+
+ENRICHMENT_BATCH_SIZE = 200
+
+# Lookups started per second, so the job leaves most of the metadata
+# service's capacity to interactive lookups
+DEFAULT_RATE = 5.0
+
+
+def missing_fields(fields, fetched):
+    """Returns the fetched fields that are missing or blank in fields."""
+    return {
+        name: value
+        for name, value in fetched.items()
+        if value not in (None, "") and not str(fields.get(name) or "").strip()
+    }
+
+
+def enrich_batch(rows, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
+    """Resolves the DOIs of a batch of citation rows.
+
+    Returns the patches for merge_citation_fields, one per citation that
+    gains at least one field.
+    """
+    fetched = {}
+    for result in resolve_dois([row.doi for row in rows], workers, rate):
+        if result["fields"]:
+            fetched[normalize_doi(result["doi"])] = result["fields"]
+
+    patches = []
+    for row in rows:
+        doi = util._doi_extract(row.doi)  # pylint: disable=protected-access
+        fields = missing_fields(row.fields, fetched.get(normalize_doi(doi), {})) if doi else {}
+        if fields:
+            patches.append((row.id, row.row_version, fields))
+    return patches
+
+
+def run_enrichment(batch_size=ENRICHMENT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                   rate=DEFAULT_RATE, limit=None, progress=None):
+    """Enriches citations batch by batch from the job's checkpoint.
+
+    Each batch is merged and the checkpoint moved past it in one
+    transaction. No transaction is held open while DOIs are resolved. Stops
+    after `limit` citations if given; progress(report) is called after each
+    batch.
+
+    Returns a report dict with the number of `scanned` and `updated`
+    citations and the id `position` reached.
+    """
+    position = get_checkpoint(JOB_NAME) or 0
+    report = {"scanned": 0, "updated": 0, "position": position}
+
+    while limit is None or report["scanned"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - report["scanned"])
+        rows = get_citations_with_doi(position, size)
+        db.session.rollback()
+        if not rows:
+            break
+
+        patches = enrich_batch(rows, workers, rate)
+        try:
+            updated = merge_citation_fields(patches)
+            save_checkpoint(JOB_NAME, rows[-1].id)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+
+        position = rows[-1].id
+        report["scanned"] += len(rows)
+        report["updated"] += len(updated)
+        report["position"] = position
+        if progress:
+            progress(report)
+
+    return report
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Fill in missing citation fields from DOI metadata.")
+    parser.add_argument("--batch-size", type=int, default=ENRICHMENT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="lookups run at the same time")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="lookups started per second, 0 for no limit")
+    parser.add_argument("--limit", type=int, help="stop after this many citations")
+    parser.add_argument("--restart", action="store_true",
+                        help="start from the first citation instead of the checkpoint")
+    args = parser.parse_args()
+
+    def _progress(report):
+        print(f"{report['scanned']} scanned, {report['updated']} updated, "
+              f"at id {report['position']}", flush=True)
+
+    with app.app_context():
+        if args.restart:
+            delete_checkpoint(JOB_NAME)
+        report = run_enrichment(
+            args.batch_size, args.workers, args.rate or None, args.limit, _progress)
+
+    print(f"Enriched {report['updated']} of {report['scanned']} citation(s)")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
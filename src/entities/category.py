@@ -1,6 +1,8 @@
 class Category():
     """A Category represents a classification for entries."""
 
+    __slots__ = ("_id", "_name")
+
     def __init__(self, category_id, name):
         self._id = category_id
         self._name = name
@@ -30,6 +32,8 @@ class Category():
 
 class Tag(Category):
     """A Tag is a specialized Category used for tagging entries."""
+
+    __slots__ = ()
     # pylint: disable=W0246
 
     def __init__(self, tag_id, name):
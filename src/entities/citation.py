@@ -1,10 +1,29 @@
+from entities.fragment_cache import cached_fragment
+
+
+def _as_list(values):
+    if isinstance(values, list):
+        return values
+    return list(values or [])
+
+
 class Citation:
     """Represents a citation entity."""
 
-    def __init__(self, citation_id, entry_type, citation_key, fields, metadata=None):
+    # Without a per-instance __dict__, a citation is a handful of pointers,
+    # which matters when materialising whole libraries for exports.
+    __slots__ = (
+        "_id", "_entry_type", "_citation_key", "_fields", "_row_version",
+        "_tags", "_categories",
+    )
+
+    def __init__(
+            self, citation_id, entry_type, citation_key, fields, metadata=None, row_version=None
+    ):
         """
         Initializes a Citation instance.
         Metadata may include optional `tags` and `categories`.
+        The row version, when known, lets the rendered forms be cached.
         """
         # pylint: disable=too-many-arguments, too-many-positional-arguments
 
@@ -12,10 +31,13 @@ class Citation:
         self._entry_type = entry_type
         self._citation_key = citation_key
         self._fields = fields
+        self._row_version = row_version
 
+        # Lists are kept as given rather than copied; citations read from
+        # the database own the lists built for them by the driver.
         metadata = metadata or {}
-        self._tags = list(metadata.get("tags") or [])
-        self._categories = list(metadata.get("categories") or [])
+        self._tags = _as_list(metadata.get("tags"))
+        self._categories = _as_list(metadata.get("categories"))
 
     @property
     def id(self):
@@ -33,6 +55,10 @@ class Citation:
     def fields(self):
         return self._fields
 
+    @property
+    def row_version(self):
+        return self._row_version
+
     @property
     def tags(self):
         return self._tags
@@ -68,6 +94,7 @@ class Citation:
 
         return ", ".join(s for s in segments if s)
 
+    @cached_fragment
     def to_human_readable(self):
         """Return a human-readable string representation of the citation."""
         data = self.fields or {}
@@ -95,6 +122,7 @@ class Citation:
 
         return result
 
+    @cached_fragment
     def to_compact(self):
         """Return a compact one-line representation: entry type — key — brief fields."""
         items = sorted(self.fields.items())
@@ -104,6 +132,7 @@ class Citation:
 
         return f"{self.entry_type} — {self.citation_key} — {brief}"
 
+    @cached_fragment
     def to_bibtex(self):
         """Return a BibTeX string representation of the citation."""
         tab_size = 2  # Maybe able to configure?
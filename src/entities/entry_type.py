@@ -1,6 +1,8 @@
 class EntryType:
     """Represents an entry type entity."""
 
+    __slots__ = ("_id", "_name")
+
     def __init__(self, entry_type_id, name):
         self._id = entry_type_id
         self._name = name
@@ -0,0 +1,73 @@
+import functools
+import threading
+from collections import OrderedDict
+
+# Enough for the BibTeX, human-readable and compact forms of a few thousand citations
+FRAGMENT_CACHE_SIZE = 20000
+
+
+class FragmentCache:
+    """A bounded, thread-safe LRU of rendered citation fragments.
+
+    Keys are (citation id, row version, format). Any change to a citation
+    gives it a new row version, so an entry can never be served stale;
+    invalidate() only frees the space of entries that can no longer be hit.
+    """
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, citation_ids):
+        """Drops every fragment of the given citations."""
+        citation_ids = set(citation_ids)
+        with self._lock:
+            for key in [k for k in self._items if k[0] in citation_ids]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+fragments = FragmentCache()
+
+
+def cached_fragment(method):
+    """Memoises a Citation formatting method in the shared fragment cache.
+
+    Citations without an id or row version (e.g., ones built in memory) are
+    formatted every time.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if self.id is None or self.row_version is None:
+            return method(self)
+
+        key = (self.id, self.row_version, method.__name__)
+        value = fragments.get(key)
+        if value is None:
+            value = method(self)
+            fragments.put(key, value)
+        return value
+
+    return wrapper
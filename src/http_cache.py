@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from flask import make_response, request, session
+
+_TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "templates")
+
+
+def _templates_digest():
+    """Hashes the templates, so that validators change when the markup does."""
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(_TEMPLATES_PATH)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+_TEMPLATES_DIGEST = _templates_digest()
+
+
+def make_etag(*parts):
+    """Returns an entity tag for a response built from the given version parts."""
+    digest = hashlib.sha1(_TEMPLATES_DIGEST.encode())
+    for part in parts:
+        digest.update(b"\0" + str(part).encode())
+    return digest.hexdigest()
+
+
+def _is_not_modified(etag, last_modified):
+    # If-Modified-Since is only considered when If-None-Match is absent
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_response(render, etag_parts, last_modified=None):
+    """Returns 304 Not Modified when the client already has the version of the
+    page identified by etag_parts and last_modified, otherwise the response
+    returned by render().
+
+    Responses carry the validators with Cache-Control: no-cache, so browsers
+    and proxies revalidate on every use. Pages showing flashed messages are
+    never validated, as the messages are meant to be shown only once.
+    """
+    if session.get("_flashes"):
+        return render()
+
+    etag = make_etag(*etag_parts)
+
+    if _is_not_modified(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+
+    return response
@@ -0,0 +1,60 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+# All JSON encoding and decoding in the app goes through this module, so
+# that the optional orjson package is used wherever it is installed and the
+# standard library is used otherwise. Both backends produce compact output
+# and raise JSONDecodeError (orjson's error subclasses the stdlib one).
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj, default=None, sort_keys=False):
+    """Serializes obj to a compact JSON string.
+
+    `default` is called for objects the backend cannot serialize and
+    `sort_keys` orders the keys of every object in the output.
+    """
+
+    if orjson is not None:
+        # Dates are left to `default`, as with the stdlib, so that both
+        # backends format them the same way
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def loads(s):
+    """Deserializes a JSON document given as str or UTF-8 bytes."""
+
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes responses (jsonify) and decodes
+    request bodies (request.json) with the app's codec.
+
+    Indented output, used in debug mode, is still produced by the stdlib.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=kwargs.get("default", self.default), sort_keys=self.sort_keys)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
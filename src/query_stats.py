@@ -0,0 +1,195 @@
+import heapq
+import os
+import time
+from collections import Counter
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+from db_pool import env_bool, env_int
+
+# Per-request query instrumentation, read from the environment:
+#   QUERY_STATS               record the queries of each request (default true)
+#   QUERY_STATS_SERVER_TIMING add a Server-Timing header with the query count
+#                             and times, true/false (default false, as it is
+#                             sent to every client)
+#   SLOW_REQUEST_MS           log requests slower than this, 0 to log none (default 500)
+#   QUERY_STATS_TOP           number of slowest statements kept per request (default 3)
+#
+# Only statement shapes are logged: parameters are reduced to their names
+# and types, never their values. Streamed responses get no Server-Timing
+# header, as their body is generated after the headers are sent; they are
+# checked for the slow request log once the response is closed.
+
+# Longest SQL text included in a slow request log line
+MAX_LOGGED_SQL = 500
+
+# A statement run this many times in one request is called out in the log
+REPEATED_STATEMENT_HINT = 3
+
+
+def query_stats_settings(environ=None):
+    """Reads the query instrumentation settings from the environment."""
+    environ = os.environ if environ is None else environ
+
+    return {
+        "enabled": env_bool(environ, "QUERY_STATS", True),
+        "server_timing": env_bool(environ, "QUERY_STATS_SERVER_TIMING", False),
+        "slow_request_ms": env_int(environ, "SLOW_REQUEST_MS", 500),
+        "top": env_int(environ, "QUERY_STATS_TOP", 3),
+    }
+
+
+def _value_shape(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def params_shape(parameters, executemany=False):
+    """Describes the parameters of a statement by their names and types."""
+    if executemany:
+        rows = list(parameters)
+        first = params_shape(rows[0]) if rows else None
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        return {name: _value_shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def _compact_sql(sql):
+    sql = " ".join(sql.split())
+    if len(sql) > MAX_LOGGED_SQL:
+        return sql[:MAX_LOGGED_SQL] + "..."
+    return sql
+
+
+class QueryStats:
+    """Queries run while serving one request."""
+
+    def __init__(self, top):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self._top = top
+        self._slowest = []
+        self._statements = Counter()
+
+    def record(self, sql, parameters, executemany, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self._statements[sql] += 1
+
+        if self._top:
+            # Shapes are only computed for statements that make the list
+            entry = (seconds, self.count, sql, parameters, executemany)
+            if len(self._slowest) < self._top:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        """Returns the slowest statements as (ms, sql, params shape), slowest first."""
+        return [
+            (seconds * 1000, _compact_sql(sql), params_shape(parameters, executemany))
+            for seconds, _, sql, parameters, executemany in sorted(self._slowest, reverse=True)
+        ]
+
+    def most_repeated(self):
+        """Returns (times, sql) of the statement run most often, a hint of N+1 queries."""
+        if not self._statements:
+            return 0, None
+        sql, times = self._statements.most_common(1)[0]
+        return times, _compact_sql(sql)
+
+    def server_timing(self):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f"app;dur={total_ms:.1f}"
+        )
+
+
+def current_stats():
+    """Returns the stats of the request being served, or None."""
+    if not has_app_context():
+        return None
+    return g.get("query_stats")
+
+
+def _before_cursor_execute(conn, *_):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, sql, parameters, _context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(sql, parameters, executemany, time.perf_counter() - started)
+
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
+def _request_line(response):
+    path = request.full_path.rstrip("?")
+    return f"{request.method} {path} -> {response.status_code}"
+
+
+def _log_slow_request(app, stats, request_line, threshold_ms):
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    if not threshold_ms or total_ms < threshold_ms:
+        return
+
+    lines = [
+        f"Slow request: {request_line} in {total_ms:.1f} ms, "
+        f"{stats.count} queries, {stats.seconds * 1000:.1f} ms in db"
+    ]
+    for ms, sql, shape in stats.slowest():
+        lines.append(f"  {ms:.1f} ms: {sql} params={shape}")
+
+    times, sql = stats.most_repeated()
+    if times >= REPEATED_STATEMENT_HINT:
+        lines.append(f"  repeated {times}x: {sql}")
+
+    app.logger.warning("\n".join(lines))
+
+
+def install(app, engine, settings):
+    """Records the queries of every request and reports them on the response."""
+
+    if not settings["enabled"]:
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats(settings["top"])
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = current_stats()
+        if stats is None:
+            return response
+
+        request_line = _request_line(response)
+        threshold_ms = settings["slow_request_ms"]
+
+        if response.is_streamed:
+            # The body has not been generated yet, so neither have its queries
+            response.call_on_close(
+                lambda: _log_slow_request(app, stats, request_line, threshold_ms))
+            return response
+
+        if settings["server_timing"]:
+            response.headers.add("Server-Timing", stats.server_timing())
+        _log_slow_request(app, stats, request_line, threshold_ms)
+        return response
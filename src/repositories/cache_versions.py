@@ -0,0 +1,124 @@
+import threading
+
+from flask import g, has_request_context
+
+from config import db
+from repositories.statements import PreparedStatement
+
+# Versions of data cached by the app processes live in the cache_versions
+# table. A writer bumps a version in the same statement that changes the
+# data, and every process validates its cached copy against the current
+# version. The versions of all process caches are read with one query per
+# request (see VersionedCache).
+
+# Names of the versions that VersionedCache instances are validated against
+_cached_names = set()
+
+
+_CACHE_VERSIONS = PreparedStatement(
+    "cache_versions",
+    """
+    SELECT name, version, updated_at
+    FROM cache_versions
+    WHERE name = ANY(:names)
+    """,
+    {"names": "text[]"},
+)
+
+
+def get_cache_versions(names):
+    """Returns a dict mapping each tracked cache name to its (version, updated_at) row."""
+
+    result = _CACHE_VERSIONS.execute(db.session, {"names": list(names)}).fetchall()
+    return {row.name: row for row in result}
+
+
+def request_cache_versions():
+    """Returns a dict mapping the name of each process cache to its version.
+
+    The versions are read once per request and kept on flask.g, so a page
+    that reads several caches makes a single round trip for them. Outside
+    a request they are read on every call.
+    """
+
+    if has_request_context() and "cache_versions" in g:
+        return g.cache_versions
+
+    rows = get_cache_versions(sorted(_cached_names))
+    versions = {name: row.version for name, row in rows.items()}
+    if has_request_context():
+        g.cache_versions = versions
+    return versions
+
+
+class VersionedCache:
+    """A value loaded once per process with load() and served from memory
+    while its version in cache_versions is unchanged.
+
+    Nothing is cached while the version is missing, or when `keep(value)`
+    returns False for a loaded value.
+    """
+
+    def __init__(self, name, load, keep=None):
+        self.name = name
+        self._load = load
+        self._keep = keep or (lambda value: True)
+        self._lock = threading.Lock()
+        self._entry = None
+        _cached_names.add(name)
+
+    def get(self):
+        """Returns the cached value, reloading it if its version changed."""
+
+        # The version is read before the data, so a concurrent change can only
+        # make the cached copy look older than it is, never newer.
+        version = request_cache_versions().get(self.name)
+
+        with self._lock:
+            if version is not None and self._entry and self._entry[0] == version:
+                return self._entry[1]
+
+        value = self._load()
+        if version is not None and self._keep(value):
+            with self._lock:
+                self._entry = (version, value)
+        return value
+
+    def invalidate(self):
+        """Drops the cached value so that it is reloaded on next use."""
+
+        with self._lock:
+            self._entry = None
+
+
+def bump_version_cte(name, source):
+    """Returns a CTE that bumps the named cache version if the CTE `source`
+    returned any rows.
+
+    Data-modifying CTEs run even when the main query does not read them, so
+    this can be appended to the WITH list of the statement doing the write.
+    """
+
+    return f"""
+        bump_{name} AS (
+            UPDATE cache_versions
+            SET version = nextval('cache_versions_seq'), updated_at = now()
+            WHERE name = '{name}' AND EXISTS (SELECT 1 FROM {source})
+        )
+    """
+
+
+def touch_citations_cte(source):
+    """Returns CTEs that give the citations listed in the `citation_id`
+    column of the CTE `source` a new row version, and bump the library-wide
+    'citations' version if there were any.
+    """
+
+    return f"""
+        touch_citations AS (
+            UPDATE citations
+            SET updated_at = now(), row_version = nextval('cache_versions_seq')
+            WHERE id IN (SELECT citation_id FROM {source})
+        ),
+        {bump_version_cte("citations", source)}
+    """
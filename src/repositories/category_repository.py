@@ -1,13 +1,32 @@
-from sqlalchemy import text
-
 from config import db
+from repositories.cache_versions import (
+    VersionedCache,
+    bump_version_cte,
+    touch_citations_cte,
+)
+from repositories.statements import statement
 from util import to_category, to_tag
 
 
+def _touching_citations(write_sql):
+    """Wraps a link table INSERT or DELETE that returns citation_id, so that
+    the same statement also gives the affected citations a new version."""
+
+    return f"""
+        WITH changed AS ({write_sql}),
+        {touch_citations_cte("changed")}
+        SELECT count(*) FROM changed
+    """
+
+
 def get_categories():
-    """Fetches all categories from the database"""
+    """Fetches all categories, from the process cache when it is up to date"""
+
+    return list(_categories_cache.get())
 
-    sql = text(
+
+def _load_categories():
+    sql = statement(
         """
         SELECT id, name
         FROM categories
@@ -24,9 +43,13 @@ def get_categories():
 
 
 def get_tags():
-    """Fetches all tags from the database"""
+    """Fetches all tags, from the process cache when it is up to date"""
+
+    return list(_tags_cache.get())
 
-    sql = text(
+
+def _load_tags():
+    sql = statement(
         """
         SELECT id, name
         FROM tags
@@ -42,10 +65,15 @@ def get_tags():
     return [to_tag(row) for row in result]
 
 
+# Full tag and category lists per process
+_categories_cache = VersionedCache("categories", _load_categories)
+_tags_cache = VersionedCache("tags", _load_tags)
+
+
 def get_category(category_id):
     """Fetches a category by its ID from the database"""
 
-    sql = text(
+    sql = statement(
         """
         SELECT id, name
         FROM categories
@@ -68,7 +96,7 @@ def get_category(category_id):
 def get_tag(tag_id):
     """Fetches a tag by its ID from the database"""
 
-    sql = text(
+    sql = statement(
         """
         SELECT id, name
         FROM tags
@@ -91,11 +119,15 @@ def get_tag(tag_id):
 def create_category(name):
     """Creates a new category in the database"""
 
-    sql = text(
-        """
-        INSERT INTO categories (name)
-        VALUES (:name)
-        RETURNING id, name
+    sql = statement(
+        f"""
+        WITH inserted AS (
+            INSERT INTO categories (name)
+            VALUES (:name)
+            RETURNING id, name
+        ),
+        {bump_version_cte("categories", "inserted")}
+        SELECT id, name FROM inserted
         """
     )
 
@@ -112,11 +144,15 @@ def create_category(name):
 def create_categories(category_names):
     """Creates multiple categories in the database"""
 
-    sql = text(
-        """
-        INSERT INTO categories (name)
-        VALUES (:name)
-        RETURNING id, name
+    sql = statement(
+        f"""
+        WITH inserted AS (
+            INSERT INTO categories (name)
+            VALUES (:name)
+            RETURNING id, name
+        ),
+        {bump_version_cte("categories", "inserted")}
+        SELECT id, name FROM inserted
         """
     )
 
@@ -137,11 +173,15 @@ def create_categories(category_names):
 def create_tag(name):
     """Creates a new tag in the database"""
 
-    sql = text(
-        """
-        INSERT INTO tags (name)
-        VALUES (:name)
-        RETURNING id, name
+    sql = statement(
+        f"""
+        WITH inserted AS (
+            INSERT INTO tags (name)
+            VALUES (:name)
+            RETURNING id, name
+        ),
+        {bump_version_cte("tags", "inserted")}
+        SELECT id, name FROM inserted
         """
     )
 
@@ -158,11 +198,15 @@ def create_tag(name):
 def create_tags(tag_names):
     """Creates multiple tags in the database"""
 
-    sql = text(
-        """
-        INSERT INTO tags (name)
-        VALUES (:name)
-        RETURNING id, name
+    sql = statement(
+        f"""
+        WITH inserted AS (
+            INSERT INTO tags (name)
+            VALUES (:name)
+            RETURNING id, name
+        ),
+        {bump_version_cte("tags", "inserted")}
+        SELECT id, name FROM inserted
         """
     )
 
@@ -183,7 +227,7 @@ def create_tags(tag_names):
 def get_or_create_category(name):
     """Fetches a category by name or creates a new one if it does not exist"""
 
-    sql = text(
+    sql = statement(
         """
         SELECT id, name
         FROM categories
@@ -206,7 +250,7 @@ def get_or_create_category(name):
 def get_or_create_tag(name):
     """Fetches a tag by name or creates a new one if it does not exist"""
 
-    sql = text(
+    sql = statement(
         """
         SELECT id, name
         FROM tags
@@ -227,68 +271,98 @@ def get_or_create_tag(name):
 
 
 def get_or_create_categories(category_names):
-    """Fetches multiple categories by name or creates them if they do not exist"""
+    """Fetches multiple categories by name or creates them if they do not exist
 
-    existing_categories = {}
-    sql = text(
-        """
-        SELECT id, name
-        FROM categories
-        WHERE name = :name
-        """
-    )
+    Returns the categories in the order of their first occurrence in
+    category_names.
+    """
 
-    for name in category_names:
-        params = {
-            "name": name,
-        }
+    categories = upsert_categories(category_names)
+    db.session.commit()
 
-        result = db.session.execute(sql, params).fetchone()
+    return [categories[name] for name in dict.fromkeys(category_names)]
 
-        if result:
-            existing_categories[name] = to_category(result)
 
-    categories_to_create = [
-        name for name in category_names if name not in existing_categories]
+def get_or_create_tags(tag_names):
+    """Fetches multiple tags by name or creates them if they do not exist
 
-    created_categories = create_categories(categories_to_create)
+    Returns the tags in the order of their first occurrence in tag_names.
+    """
 
-    for category in created_categories:
-        existing_categories[category.name] = category
+    tags = upsert_tags(tag_names)
+    db.session.commit()
 
-    return list(existing_categories.values())
+    return [tags[name] for name in dict.fromkeys(tag_names)]
 
 
-def get_or_create_tags(tag_names):
-    """Fetches multiple tags by name or creates them if they do not exist"""
+def _get_or_create_by_name(table, names):
+    """Fetches or creates rows of a name table (tags or categories) by name
+    using set-based statements. Does not commit.
 
-    existing_tags = {}
-    sql = text(
-        """
-        SELECT id, name
-        FROM tags
-        WHERE name = :name
+    Returns a dict mapping each name to its (id, name) row.
+    """
+
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    sql = statement(
+        f"""
+        WITH input AS (
+            SELECT DISTINCT unnest(CAST(:names AS text[])) AS name
+        ),
+        inserted AS (
+            INSERT INTO {table} (name)
+            SELECT name FROM input
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id, name
+        ),
+        {bump_version_cte(table, "inserted")}
+        SELECT id, name FROM inserted
+        UNION ALL
+        SELECT x.id, x.name
+        FROM {table} x
+        JOIN input i ON i.name = x.name
         """
     )
 
-    for name in tag_names:
-        params = {
-            "name": name,
-        }
+    result = db.session.execute(sql, {"names": names}).fetchall()
+    rows = {row.name: row for row in result}
+
+    # Rows committed by a concurrent writer after this statement started are
+    # skipped by ON CONFLICT but not visible to it; a new statement sees them.
+    missing = [name for name in names if name not in rows]
+    if missing:
+        sql = statement(
+            f"""
+            SELECT id, name
+            FROM {table}
+            WHERE name = ANY(:names)
+            """
+        )
+
+        result = db.session.execute(sql, {"names": missing}).fetchall()
+        rows.update({row.name: row for row in result})
+
+    return rows
 
-        result = db.session.execute(sql, params).fetchone()
 
-        if result:
-            existing_tags[name] = to_tag(result)
+def upsert_tags(tag_names):
+    """Fetches or creates tags by name in bulk, without committing.
 
-    tags_to_create = [name for name in tag_names if name not in existing_tags]
+    Returns a dict mapping each tag name to its Tag.
+    """
+    rows = _get_or_create_by_name("tags", tag_names)
+    return {name: to_tag(row) for name, row in rows.items()}
 
-    created_tags = create_tags(tags_to_create)
 
-    for tag in created_tags:
-        existing_tags[tag.name] = tag
+def upsert_categories(category_names):
+    """Fetches or creates categories by name in bulk, without committing.
 
-    return list(existing_tags.values())
+    Returns a dict mapping each category name to its Category.
+    """
+    rows = _get_or_create_by_name("categories", category_names)
+    return {name: to_category(row) for name, row in rows.items()}
 
 
 def get_or_create_metadata(category_names, tag_names):
@@ -306,13 +380,14 @@ def get_or_create_metadata(category_names, tag_names):
 def assign_tag_to_citation(citation_id, tag):
     """Assigns a single tag to a citation."""
 
-    sql = text(
+    sql = statement(_touching_citations(
         """
         INSERT INTO citations_to_tags (citation_id, tag_id)
         VALUES (:citation_id, :tag_id)
         ON CONFLICT DO NOTHING
+        RETURNING citation_id
         """
-    )
+    ))
 
     params = {
         "citation_id": citation_id,
@@ -326,35 +401,21 @@ def assign_tag_to_citation(citation_id, tag):
 def assign_tags_to_citation(citation_id, tags):
     """Assigns multiple tags to a citation"""
 
-    sql = text(
-        """
-        INSERT INTO citations_to_tags (citation_id, tag_id)
-        VALUES (:citation_id, :tag_id)
-        ON CONFLICT DO NOTHING
-        """
-    )
-
-    for tag in tags:
-        params = {
-            "citation_id": citation_id,
-            "tag_id": tag.id,
-        }
-
-        db.session.execute(sql, params)
-
+    link_tags_to_citations([(citation_id, tag.id) for tag in tags])
     db.session.commit()
 
 
 def assign_category_to_citation(citation_id, category_id):
     """Assigns a category to a citation"""
 
-    sql = text(
+    sql = statement(_touching_citations(
         """
         INSERT INTO citations_to_categories (citation_id, category_id)
         VALUES (:citation_id, :category_id)
         ON CONFLICT DO NOTHING
+        RETURNING citation_id
         """
-    )
+    ))
 
     params = {
         "citation_id": citation_id,
@@ -368,22 +429,7 @@ def assign_category_to_citation(citation_id, category_id):
 def assign_categories_to_citation(citation_id, categories):
     """Assigns multiple categories to a citation"""
 
-    sql = text(
-        """
-        INSERT INTO citations_to_categories (citation_id, category_id)
-        VALUES (:citation_id, :category_id)
-        ON CONFLICT DO NOTHING
-        """
-    )
-
-    for c in categories:
-        params = {
-            "citation_id": citation_id,
-            "category_id": c.id,
-        }
-
-        db.session.execute(sql, params)
-
+    link_categories_to_citations([(citation_id, c.id) for c in categories])
     db.session.commit()
 
 
@@ -400,12 +446,13 @@ def assign_metadata_to_citation(citation_id, categories, tags):
 def remove_tag_from_citation(tag_id, citation_id):
     """Removes a tag from a citation"""
 
-    sql = text(
+    sql = statement(_touching_citations(
         """
         DELETE FROM citations_to_tags
         WHERE citation_id = :citation_id AND tag_id = :tag_id
+        RETURNING citation_id
         """
-    )
+    ))
 
     params = {
         "citation_id": citation_id,
@@ -419,12 +466,13 @@ def remove_tag_from_citation(tag_id, citation_id):
 def remove_category_from_citation(category_id, citation_id):
     """Removes a category from a citation"""
 
-    sql = text(
+    sql = statement(_touching_citations(
         """
         DELETE FROM citations_to_categories
         WHERE citation_id = :citation_id AND category_id = :category_id
+        RETURNING citation_id
         """
-    )
+    ))
 
     params = {
         "citation_id": citation_id,
@@ -433,3 +481,137 @@ def remove_category_from_citation(category_id, citation_id):
 
     db.session.execute(sql, params)
     db.session.commit()
+
+
+def link_tags_to_citations(links, touch=True):
+    """Inserts (citation_id, tag_id) pairs with one statement, without committing.
+
+    The linked citations get a new version unless touch is False, which is
+    meant for citations created in the same transaction.
+    """
+
+    if not links:
+        return
+
+    sql = """
+        INSERT INTO citations_to_tags (citation_id, tag_id)
+        SELECT * FROM unnest(CAST(:citation_ids AS int[]), CAST(:tag_ids AS int[]))
+        ON CONFLICT DO NOTHING
+        RETURNING citation_id
+    """
+
+    params = {
+        "citation_ids": [citation_id for citation_id, _ in links],
+        "tag_ids": [tag_id for _, tag_id in links],
+    }
+
+    if touch:
+        sql = _touching_citations(sql)
+
+    db.session.execute(statement(sql), params)
+
+
+def link_categories_to_citations(links, touch=True):
+    """Inserts (citation_id, category_id) pairs with one statement, without committing.
+
+    The linked citations get a new version unless touch is False, which is
+    meant for citations created in the same transaction.
+    """
+
+    if not links:
+        return
+
+    sql = """
+        INSERT INTO citations_to_categories (citation_id, category_id)
+        SELECT * FROM unnest(CAST(:citation_ids AS int[]), CAST(:category_ids AS int[]))
+        ON CONFLICT DO NOTHING
+        RETURNING citation_id
+    """
+
+    params = {
+        "citation_ids": [citation_id for citation_id, _ in links],
+        "category_ids": [category_id for _, category_id in links],
+    }
+
+    if touch:
+        sql = _touching_citations(sql)
+
+    db.session.execute(statement(sql), params)
+
+
+def _sync_links(table, column, citation_id, ids):
+    """Makes the links of a citation in a link table match the given ids,
+    touching only the rows that change. Does not commit.
+
+    Returns a tuple of (added_ids, removed_ids).
+    """
+
+    sql = statement(
+        f"""
+        SELECT {column}
+        FROM {table}
+        WHERE citation_id = :citation_id
+        """
+    )
+
+    result = db.session.execute(sql, {"citation_id": citation_id}).fetchall()
+    current = {row[0] for row in result}
+
+    wanted = list(dict.fromkeys(ids))
+    added = [i for i in wanted if i not in current]
+    removed = sorted(current.difference(wanted))
+
+    if added:
+        sql = statement(_touching_citations(
+            f"""
+            INSERT INTO {table} (citation_id, {column})
+            SELECT :citation_id, unnest(CAST(:ids AS int[]))
+            ON CONFLICT DO NOTHING
+            RETURNING citation_id
+            """
+        ))
+        db.session.execute(sql, {"citation_id": citation_id, "ids": added})
+
+    if removed:
+        sql = statement(_touching_citations(
+            f"""
+            DELETE FROM {table}
+            WHERE citation_id = :citation_id AND {column} = ANY(:ids)
+            RETURNING citation_id
+            """
+        ))
+        db.session.execute(sql, {"citation_id": citation_id, "ids": removed})
+
+    return added, removed
+
+
+def sync_citation_tags(citation_id, tags):
+    """Replaces the tags of a citation with the given tags, without committing.
+
+    Returns a tuple of (added_ids, removed_ids).
+    """
+    return _sync_links(
+        "citations_to_tags", "tag_id", citation_id, [tag.id for tag in tags])
+
+
+def sync_citation_categories(citation_id, categories):
+    """Replaces the categories of a citation with the given categories,
+    without committing.
+
+    Returns a tuple of (added_ids, removed_ids).
+    """
+    return _sync_links(
+        "citations_to_categories", "category_id", citation_id, [c.id for c in categories])
+
+
+def sync_citation_metadata(citation_id, categories, tags):
+    """Replaces the categories and tags of a citation, without committing.
+
+    Either one is left untouched when it is not a list.
+    """
+
+    if isinstance(categories, list):
+        sync_citation_categories(citation_id, categories)
+
+    if isinstance(tags, list):
+        sync_citation_tags(citation_id, tags)
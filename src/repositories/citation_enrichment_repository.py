@@ -0,0 +1,76 @@
+import json_codec
+from config import db
+from entities.fragment_cache import fragments
+from repositories.cache_versions import bump_version_cte
+from repositories.statements import statement
+
+# Queries of the DOI enrichment job (see doi_enrichment), which reads
+# citations in id order and merges fields into them in batches.
+
+
+def get_citations_with_doi(after_id, limit):
+    """Fetches up to `limit` citations that have a DOI field, in id order
+    after the given id.
+
+    Returns rows of (id, doi, fields, row_version).
+    """
+
+    sql = statement(
+        """
+        SELECT id, fields->>'doi' AS doi, fields, row_version
+        FROM citations
+        WHERE id > :after_id AND fields ? 'doi'
+        ORDER BY id
+        LIMIT :limit
+        """
+    )
+
+    return db.session.execute(sql, {"after_id": after_id, "limit": limit}).fetchall()
+
+
+def merge_citation_fields(patches):
+    """Adds fields to a batch of citations in one statement, without committing.
+
+    Each patch is a tuple of (citation_id, row_version, fields). The given
+    fields replace those of the citation, so callers only pass the fields to
+    fill in. A citation whose row version has changed since it was read is
+    skipped, so concurrent edits are never overwritten.
+
+    Returns the IDs of the updated citations.
+    """
+
+    if not patches:
+        return []
+
+    sql = statement(
+        f"""
+        WITH patches AS (
+            SELECT * FROM unnest(
+                CAST(:citation_ids AS int[]),
+                CAST(:row_versions AS bigint[]),
+                CAST(:fields AS jsonb[])
+            ) AS p(id, row_version, fields)
+        ),
+        updated AS (
+            UPDATE citations c
+            SET fields = c.fields || p.fields,
+                updated_at = now(),
+                row_version = nextval('cache_versions_seq')
+            FROM patches p
+            WHERE c.id = p.id AND c.row_version = p.row_version
+            RETURNING c.id
+        ),
+        {bump_version_cte("citations", "updated")}
+        SELECT id FROM updated
+        """
+    )
+
+    params = {
+        "citation_ids": [p[0] for p in patches],
+        "row_versions": [p[1] for p in patches],
+        "fields": [json_codec.dumps(p[2]) for p in patches],
+    }
+
+    updated = db.session.execute(sql, params).scalars().all()
+    fragments.invalidate(updated)
+    return updated
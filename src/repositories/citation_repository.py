@@ -1,56 +1,148 @@
-import json
+import base64
 
-from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
+import json_codec
 from config import db
+from entities.fragment_cache import fragments
 from errors import CitationNotFoundError
+from repositories.cache_versions import bump_version_cte
 from repositories.category_repository import (
-    assign_categories_to_citation,
     assign_metadata_to_citation,
-    assign_tags_to_citation,
+    link_categories_to_citations,
+    link_tags_to_citations,
+    sync_citation_metadata,
+    upsert_categories,
+    upsert_tags,
 )
+from repositories.statements import PreparedStatement, statement
 from util import to_citation
 
+# Text search configuration; must match the one used for
+# citations.search_vector in sql/schema.sql so the GIN index is used.
+_TS_QUERY = "websearch_to_tsquery('simple', :q)"
 
-def get_citations(page=None, per_page=None):
-    """Fetches all citations from the database, with optional pagination."""
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-    base_sql = (
-        """
+# Rows fetched per round trip when streaming citations from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
+# pg_trgm's default word similarity threshold (0.6) rejects most single
+# letter typos in short names, so fuzzy author search uses a looser one.
+FUZZY_AUTHOR_THRESHOLD = 0.4
+
+
+def _like_pattern(value):
+    """Wraps a value in % wildcards, escaping LIKE metacharacters in it."""
+    escaped = (
+        value.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+    return f"%{escaped}%"
+
+
+def _citations_sql(filters=None, order_terms=None, limit_sql="", field_names=None):
+    """Builds a query reading citations together with their tags and categories.
+
+    The matching citations are filtered, sorted and limited first. Their tags
+    and categories are then aggregated in a single grouped pass over each link
+    table, instead of running two correlated subqueries for every row.
+
+    `order_terms` is a list of (expression, direction) pairs. Each term is
+    also returned as a `sort_key_<n>` column, which keyset pagination uses.
+
+    When `field_names` is given, only those keys of the fields document are
+    returned, read from the :field_names param (see _projection_params).
+    """
+    order_terms = order_terms or [("c.id", "ASC")]
+
+    fields_sql = "c.fields"
+    row_version_sql = "c.row_version"
+    if field_names is not None:
+        fields_sql = """COALESCE(
+                    (
+                        SELECT jsonb_object_agg(f.key, f.value)
+                        FROM jsonb_each(c.fields) f
+                        WHERE f.key = ANY(:field_names)
+                    ),
+                    '{}'::jsonb
+                ) AS fields"""
+        # Partial citations must never be rendered into the fragment cache
+        row_version_sql = "NULL::bigint AS row_version"
+
+    sort_columns = "".join(
+        f",\n                {e} AS sort_key_{i}" for i, (e, _) in enumerate(order_terms))
+    where_sql = f"WHERE {" AND ".join(filters)}" if filters else ""
+    outer_order = ", ".join(
+        f"m.sort_key_{i} {d}" for i, (_, d) in enumerate(order_terms))
+
+    return f"""
+        WITH matched AS (
+            SELECT
+                c.id,
+                et.name AS entry_type,
+                c.citation_key,
+                {fields_sql},
+                {row_version_sql}{sort_columns}
+            FROM citations c
+            JOIN entry_types et ON c.entry_type_id = et.id
+            {where_sql}
+            {_order_by_sql(order_terms)}
+            {limit_sql}
+        ),
+        matched_tags AS (
+            SELECT ctt.citation_id, array_agg(t.name ORDER BY t.name) AS tags
+            FROM citations_to_tags ctt
+            JOIN tags t ON t.id = ctt.tag_id
+            WHERE ctt.citation_id IN (SELECT id FROM matched)
+            GROUP BY ctt.citation_id
+        ),
+        matched_categories AS (
+            SELECT ctc.citation_id, array_agg(cat.name ORDER BY cat.name) AS categories
+            FROM citations_to_categories ctc
+            JOIN categories cat ON cat.id = ctc.category_id
+            WHERE ctc.citation_id IN (SELECT id FROM matched)
+            GROUP BY ctc.citation_id
+        )
         SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        ORDER BY c.id
+            m.*,
+            COALESCE(mt.tags, ARRAY[]::text[]) AS tags,
+            COALESCE(mc.categories, ARRAY[]::text[]) AS categories
+        FROM matched m
+        LEFT JOIN matched_tags mt ON mt.citation_id = m.id
+        LEFT JOIN matched_categories mc ON mc.citation_id = m.id
+        ORDER BY {outer_order}
         """
-    )
 
+
+def _projection_params(params, field_names):
+    """Adds the :field_names param used by a projected _citations_sql query."""
+    if field_names is not None:
+        params["field_names"] = list(field_names)
+    return params
+
+
+def _order_by_sql(order_terms):
+    return "ORDER BY " + ", ".join(f"{e} {d}" for e, d in order_terms)
+
+
+def get_citations(page=None, per_page=None):
+    """Fetches all citations from the database, with optional pagination."""
+
+    limit_sql = ""
     params = {}
     if isinstance(page, int) and isinstance(per_page, int):
         page = max(page, 1)
         per_page = max(per_page, 1)
         offset = (page - 1) * per_page
 
-        base_sql = base_sql + " LIMIT :limit OFFSET :offset"
+        limit_sql = "LIMIT :limit OFFSET :offset"
         params["limit"] = per_page
         params["offset"] = offset
 
-    sql = text(base_sql)
+    sql = statement(_citations_sql(limit_sql=limit_sql))
     result = db.session.execute(sql, params).fetchall()
 
     if not result:
@@ -66,40 +158,28 @@ def validate_citation(citation_id):
         raise CitationNotFoundError("Citation not found.")
 
 
-def get_citation_by_id(citation_id):
-    """Fetches a citation by its ID from the database"""
+_CITATION_BY_ID = PreparedStatement(
+    "citation_by_id",
+    _citations_sql(filters=["c.id = :citation_id"]),
+    {"citation_id": "bigint"},
+)
 
-    sql = text(
-        """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        WHERE c.id = :citation_id
-        ORDER BY et.name
-        """
-    )
+
+def get_citation_by_id(citation_id, field_names=None):
+    """Fetches a citation by its ID from the database.
+
+    If field_names is given, only those fields of the citation are read.
+    """
 
     params = {
         "citation_id": citation_id,
     }
 
-    result = db.session.execute(sql, params).fetchone()
+    if field_names is None:
+        result = _CITATION_BY_ID.execute(db.session, params).fetchone()
+    else:
+        sql = statement(_citations_sql(filters=["c.id = :citation_id"], field_names=field_names))
+        result = db.session.execute(sql, _projection_params(params, field_names)).fetchone()
 
     if not result:
         raise CitationNotFoundError("Citation not found.")
@@ -107,41 +187,44 @@ def get_citation_by_id(citation_id):
     return to_citation(result)
 
 
-def get_citations_by_ids(citation_ids):
-    """Fetches multiple citations by their IDs from the database"""
+_CITATION_VERSION = PreparedStatement(
+    "citation_version",
+    """
+    SELECT row_version, updated_at
+    FROM citations
+    WHERE id = :citation_id
+    """,
+    {"citation_id": "bigint"},
+)
+
+
+def get_citation_version(citation_id):
+    """Fetches the row version and last change time of a citation by its ID.
+
+    Returns None if the citation does not exist.
+    """
+
+    return _CITATION_VERSION.execute(db.session, {"citation_id": citation_id}).fetchone()
+
+
+def get_citations_by_ids(citation_ids, field_names=None):
+    """Fetches multiple citations by their IDs from the database.
+
+    If field_names is given, only those fields of the citations are read.
+    """
 
     if not citation_ids:
         return []
 
-    sql = text(
-        """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        WHERE c.id IN :citation_ids
-        ORDER BY et.name
-        """
-    )
+    sql = statement(_citations_sql(
+        filters=["c.id IN :citation_ids"],
+        order_terms=[("et.name", "ASC"), ("c.id", "ASC")],
+        field_names=field_names,
+    ))
 
-    params = {
+    params = _projection_params({
         "citation_ids": tuple(citation_ids),
-    }
+    }, field_names)
 
     result = db.session.execute(sql, params).fetchall()
 
@@ -157,40 +240,21 @@ def get_citations_by_ids(citation_ids):
     return values
 
 
+_CITATION_BY_KEY = PreparedStatement(
+    "citation_by_key",
+    _citations_sql(filters=["c.citation_key = :citation_key"]),
+    {"citation_key": "text"},
+)
+
+
 def get_citation_by_key(citation_key):
     """Fetches a citation by its citation key from the database"""
 
-    sql = text(
-        """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        WHERE c.citation_key = :citation_key
-        ORDER BY et.name
-        """
-    )
-
     params = {
         "citation_key": citation_key,
     }
 
-    result = db.session.execute(sql, params).fetchone()
+    result = _CITATION_BY_KEY.execute(db.session, params).fetchone()
 
     if not result:
         return None
@@ -198,41 +262,24 @@ def get_citation_by_key(citation_key):
     return to_citation(result)
 
 
-def get_citations_by_keys(citation_keys):
-    """Fetches multiple citations by their citation keys from the database"""
+def get_citations_by_keys(citation_keys, field_names=None):
+    """Fetches multiple citations by their citation keys from the database.
+
+    If field_names is given, only those fields of the citations are read.
+    """
 
     if not citation_keys:
         return []
 
-    sql = text(
-        """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        WHERE c.citation_key IN :citation_keys
-        ORDER BY et.name
-        """
-    )
+    sql = statement(_citations_sql(
+        filters=["c.citation_key IN :citation_keys"],
+        order_terms=[("et.name", "ASC"), ("c.id", "ASC")],
+        field_names=field_names,
+    ))
 
-    params = {
+    params = _projection_params({
         "citation_keys": tuple(citation_keys),
-    }
+    }, field_names)
 
     result = db.session.execute(sql, params).fetchall()
 
@@ -248,39 +295,81 @@ def get_citations_by_keys(citation_keys):
     return values
 
 
+def _stream_citations(sql, params, batch_size):
+    """Yields citations read through a server-side cursor in batches."""
+    result = db.session.execute(
+        sql,
+        params,
+        execution_options={"stream_results": True, "yield_per": batch_size},
+    )
+
+    for partition in result.partitions():
+        for row in partition:
+            yield to_citation(row)
+
+
+def stream_citations_by_ids(citation_ids, batch_size=STREAM_BATCH_SIZE):
+    """Yields citations by their IDs without loading them all into memory."""
+
+    if not citation_ids:
+        return
+
+    sql = statement(_citations_sql(
+        filters=["c.id IN :citation_ids"],
+        order_terms=[("et.name", "ASC"), ("c.id", "ASC")],
+    ))
+
+    params = {
+        "citation_ids": tuple(citation_ids),
+    }
+
+    yield from _stream_citations(sql, params, batch_size)
+
+
+def stream_citations_by_keys(citation_keys, batch_size=STREAM_BATCH_SIZE):
+    """Yields citations by their keys without loading them all into memory."""
+
+    if not citation_keys:
+        return
+
+    sql = statement(_citations_sql(
+        filters=["c.citation_key IN :citation_keys"],
+        order_terms=[("et.name", "ASC"), ("c.id", "ASC")],
+    ))
+
+    params = {
+        "citation_keys": tuple(citation_keys),
+    }
+
+    yield from _stream_citations(sql, params, batch_size)
+
+
 def create_citation(entry_type_id, citation_key, fields):
     """Creates a new citation entry in the database."""
 
-    sql = text(
-        """
+    # A new citation has no tags or categories linked to it yet
+    sql = statement(
+        f"""
         WITH inserted AS (
             INSERT INTO citations (entry_type_id, citation_key, fields)
             VALUES (:entry_type_id, :citation_key, :fields)
-            RETURNING id, entry_type_id, citation_key, fields
-        )
+            RETURNING id, entry_type_id, citation_key, fields, row_version
+        ),
+        {bump_version_cte("citations", "inserted")}
         SELECT
             i.id,
             et.name AS entry_type,
             i.citation_key,
             i.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = i.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = i.id
-            ), ARRAY[]::text[]) AS categories
+            i.row_version,
+            ARRAY[]::text[] AS tags,
+            ARRAY[]::text[] AS categories
         FROM inserted i
         JOIN entry_types et ON i.entry_type_id = et.id
         """
     )
 
-    serialized = json.dumps(fields or {})
+    serialized = json_codec.dumps(fields or {})
 
     params = {
         "entry_type_id": entry_type_id,
@@ -324,13 +413,84 @@ def create_citation_with_metadata(
     return citation
 
 
-def update_citation(
-        citation_id,
-        entry_type_id=None,
-        citation_key=None,
-        fields=None
-):
-    """Updates an existing citation entry in the database."""
+def create_citations_bulk(entries):
+    """Creates a batch of citations with their tags and categories in one
+    transaction, using one multi-row statement per table.
+
+    Each entry is a dict with `entry_type_id`, `citation_key`, `fields` and
+    optional `tags` and `categories` name lists. Entries whose key already
+    exists, or repeats an earlier entry in the batch, are skipped.
+
+    Returns a tuple of (created_keys, conflicting_keys).
+    """
+
+    if not entries:
+        return [], []
+
+    sql = statement(
+        f"""
+        WITH inserted AS (
+            INSERT INTO citations (entry_type_id, citation_key, fields)
+            SELECT * FROM unnest(
+                CAST(:entry_type_ids AS int[]),
+                CAST(:citation_keys AS text[]),
+                CAST(:fields AS jsonb[])
+            )
+            ON CONFLICT (citation_key) DO NOTHING
+            RETURNING id, citation_key
+        ),
+        {bump_version_cte("citations", "inserted")}
+        SELECT id, citation_key FROM inserted
+        """
+    )
+
+    params = {
+        "entry_type_ids": [e["entry_type_id"] for e in entries],
+        "citation_keys": [e["citation_key"] for e in entries],
+        "fields": [json_codec.dumps(e["fields"] or {}) for e in entries],
+    }
+
+    try:
+        result = db.session.execute(sql, params).fetchall()
+        inserted_ids = {row.citation_key: row.id for row in result}
+
+        unclaimed = set(inserted_ids)
+        created_entries, conflicts = [], []
+        for entry in entries:
+            # A key repeated within the batch is only created once
+            if entry["citation_key"] in unclaimed:
+                unclaimed.discard(entry["citation_key"])
+                created_entries.append(entry)
+            else:
+                conflicts.append(entry["citation_key"])
+
+        tags = upsert_tags(
+            name for e in created_entries for name in e.get("tags") or [])
+        categories = upsert_categories(
+            name for e in created_entries for name in e.get("categories") or [])
+
+        link_tags_to_citations([
+            (inserted_ids[e["citation_key"]], tags[name].id)
+            for e in created_entries for name in e.get("tags") or []
+        ], touch=False)
+        link_categories_to_citations([
+            (inserted_ids[e["citation_key"]], categories[name].id)
+            for e in created_entries for name in e.get("categories") or []
+        ], touch=False)
+
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+    return [e["citation_key"] for e in created_entries], conflicts
+
+
+def _execute_citation_update(citation_id, entry_type_id, citation_key, fields):
+    """Executes the UPDATE for the given non-empty values without committing.
+
+    Returns False when there is nothing to update.
+    """
 
     values = []
     params = {"citation_id": citation_id}
@@ -344,27 +504,48 @@ def update_citation(
         params["citation_key"] = citation_key
 
     if fields:
-        serialized = json.dumps(fields or {})
+        serialized = json_codec.dumps(fields or {})
         values.append("fields = :fields")
         params["fields"] = serialized
 
-    # Nothing to update; returning.
-    # Should this return a value or raise?
     if not values:
-        return
+        return False
+
+    values.append("updated_at = now()")
+    values.append("row_version = nextval('cache_versions_seq')")
 
     base_sql = (
         f"""
-        UPDATE citations
-        SET {", ".join(values)}
-        WHERE id = :citation_id
+        WITH updated AS (
+            UPDATE citations
+            SET {", ".join(values)}
+            WHERE id = :citation_id
+            RETURNING id
+        ),
+        {bump_version_cte("citations", "updated")}
+        SELECT count(*) FROM updated
         """
     )
 
-    sql = text(base_sql)
+    sql = statement(base_sql)
 
     db.session.execute(sql, params)
-    db.session.commit()
+    return True
+
+
+def update_citation(
+        citation_id,
+        entry_type_id=None,
+        citation_key=None,
+        fields=None
+):
+    """Updates an existing citation entry in the database."""
+
+    # Nothing to update; returning.
+    # Should this return a value or raise?
+    if _execute_citation_update(citation_id, entry_type_id, citation_key, fields):
+        db.session.commit()
+        fragments.invalidate([citation_id])
 
 
 def update_citation_with_metadata(
@@ -375,161 +556,126 @@ def update_citation_with_metadata(
     tags=None,
     entry_type_id=None,
 ):  # pylint: disable=R0913,R0917
-    """Updates a citation along with its associated categories and tags."""
+    """Updates a citation along with its associated categories and tags.
 
-    update_args = {
-        "citation_id": citation_id,
-        "citation_key": citation_key,
-        "fields": fields,
-    }
-    if entry_type_id is not None:
-        update_args["entry_type_id"] = entry_type_id
-
-    update_citation(**update_args)
-
-    if isinstance(categories, list):
-        db.session.execute(
-            text(
-                """
-                DELETE FROM citations_to_categories
-                WHERE citation_id = :citation_id
-                """
-            ),
-            {"citation_id": citation_id}
-        )
-        assign_categories_to_citation(citation_id, categories)
-
-    if isinstance(tags, list):
-        db.session.execute(
-            text(
-                """DELETE FROM citations_to_tags
-                WHERE citation_id = :citation_id
-                """
-            ),
-            {"citation_id": citation_id}
-        )
+    The citation row and only the links that actually change are written
+    in one transaction.
+    """
 
-        assign_tags_to_citation(citation_id, tags)
+    try:
+        _execute_citation_update(citation_id, entry_type_id, citation_key, fields)
+        sync_citation_metadata(citation_id, categories, tags)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
 
+    fragments.invalidate([citation_id])
 
-def delete_citation(citation_id):
-    """Deletes a citation by its ID and cleans up orphaned categories and tags."""
 
-    if not citation_id:
-        return
+def delete_citations(citation_ids):
+    """Deletes citations by their IDs and cleans up orphaned categories and tags.
 
-    cat_rows = db.session.execute(
-        text(
-            """
-            SELECT category_id
-            FROM citations_to_categories
-            WHERE citation_id = :citation_id
-            """
-        ),
-        {"citation_id": citation_id},
-    ).fetchall()
-    cat_ids = [r[0] for r in cat_rows] if cat_rows else []
+    Link rows go with the citations through ON DELETE CASCADE, so the whole
+    batch takes at most three statements in one transaction.
 
-    tag_rows = db.session.execute(
-        text(
-            """
-            SELECT tag_id
-            FROM citations_to_tags
-            WHERE citation_id = :citation_id
-            """
-        ),
-        {"citation_id": citation_id},
-    ).fetchall()
-    tag_ids = [r[0] for r in tag_rows] if tag_rows else []
-
-    db.session.execute(
-        text(
-            """
-            DELETE FROM citations_to_categories
-            WHERE citation_id = :citation_id
-            """
-        ),
-        {"citation_id": citation_id},
-    )
+    Returns the number of deleted citations.
+    """
 
-    db.session.execute(
-        text(
-            """
-            DELETE FROM citations_to_tags
-            WHERE citation_id = :citation_id
-            """
-        ),
-        {"citation_id": citation_id},
-    )
+    citation_ids = [int(i) for i in dict.fromkeys(citation_ids) if i]
+    if not citation_ids:
+        return 0
 
-    db.session.execute(
-        text(
-            """
+    # The link rows are still visible to the other CTEs of the statement
+    # that deletes their citations, so the affected ids are collected here.
+    sql = statement(
+        f"""
+        WITH deleted AS (
             DELETE FROM citations
-            WHERE id = :citation_id
-            """
+            WHERE id = ANY(:citation_ids)
+            RETURNING id
         ),
-        {"citation_id": citation_id}
+        {bump_version_cte("citations", "deleted")}
+        SELECT
+            (SELECT count(*) FROM deleted) AS deleted,
+            ARRAY(
+                SELECT DISTINCT category_id
+                FROM citations_to_categories
+                WHERE citation_id IN (SELECT id FROM deleted)
+            ) AS category_ids,
+            ARRAY(
+                SELECT DISTINCT tag_id
+                FROM citations_to_tags
+                WHERE citation_id IN (SELECT id FROM deleted)
+            ) AS tag_ids
+        """
     )
 
-    for cat_id in cat_ids:
-        db.session.execute(
-            text(
-                """
-                DELETE FROM categories c
-                WHERE c.id = :category_id
-                  AND NOT EXISTS (
-                      SELECT 1 FROM citations_to_categories ctc
-                      WHERE ctc.category_id = c.id
-                  )
-                """
-            ),
-            {"category_id": cat_id},
-        )
+    try:
+        result = db.session.execute(sql, {"citation_ids": citation_ids}).fetchone()
+
+        if result.category_ids:
+            db.session.execute(
+                statement(
+                    f"""
+                    WITH removed AS (
+                        DELETE FROM categories c
+                        WHERE c.id = ANY(:category_ids)
+                          AND NOT EXISTS (
+                              SELECT 1 FROM citations_to_categories ctc
+                              WHERE ctc.category_id = c.id
+                          )
+                        RETURNING c.id
+                    ),
+                    {bump_version_cte("categories", "removed")}
+                    SELECT count(*) FROM removed
+                    """
+                ),
+                {"category_ids": list(result.category_ids)},
+            )
 
-    for tag_id in tag_ids:
-        db.session.execute(
-            text(
-                """
-                DELETE FROM tags t
-                WHERE t.id = :tag_id
-                  AND NOT EXISTS (
-                      SELECT 1 FROM citations_to_tags ctt
-                      WHERE ctt.tag_id = t.id
-                  )
-                """
-            ),
-            {"tag_id": tag_id},
-        )
+        if result.tag_ids:
+            db.session.execute(
+                statement(
+                    f"""
+                    WITH removed AS (
+                        DELETE FROM tags t
+                        WHERE t.id = ANY(:tag_ids)
+                          AND NOT EXISTS (
+                              SELECT 1 FROM citations_to_tags ctt
+                              WHERE ctt.tag_id = t.id
+                          )
+                        RETURNING t.id
+                    ),
+                    {bump_version_cte("tags", "removed")}
+                    SELECT count(*) FROM removed
+                    """
+                ),
+                {"tag_ids": list(result.tag_ids)},
+            )
 
-    db.session.commit()
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
 
+    fragments.invalidate(citation_ids)
 
-def search_citations(queries=None):
-    # pylint: disable=too-many-branches, too-many-statements
-    if queries is None:
-        queries = {}
-    base_sql = """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields,
-            COALESCE((
-                SELECT array_agg(t2.name)
-                FROM citations_to_tags ctt2
-                JOIN tags t2 ON t2.id = ctt2.tag_id
-                WHERE ctt2.citation_id = c.id
-            ), ARRAY[]::text[]) AS tags,
-            COALESCE((
-                SELECT array_agg(cat2.name)
-                FROM citations_to_categories ctc2
-                JOIN categories cat2 ON cat2.id = ctc2.category_id
-                WHERE ctc2.citation_id = c.id
-            ), ARRAY[]::text[]) AS categories
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-    """
+    return result.deleted
+
+
+def delete_citation(citation_id):
+    """Deletes a citation by its ID and cleans up orphaned categories and tags."""
+
+    if not citation_id:
+        return
+
+    delete_citations([citation_id])
+
+
+def _search_filters(queries):
+    """Builds the WHERE filters and their params for a search."""
+    # pylint: disable=too-many-branches
 
     def _to_int(v):
         if v is None or v == "":
@@ -546,20 +692,25 @@ def search_citations(queries=None):
     params = {}
 
     if queries.get("q"):
-        filters.append("c.fields::text ILIKE :q")
-        params["q"] = f"%{queries.get('q')}%"
+        filters.append(f"c.search_vector @@ {_TS_QUERY}")
+        params["q"] = queries.get("q")
 
+    # Substring filters below are served by the pg_trgm GIN indexes
     if queries.get("citation_key"):
         filters.append("c.citation_key ILIKE :citation_key")
-        params["citation_key"] = f"%{queries.get('citation_key')}%"
+        params["citation_key"] = _like_pattern(queries.get("citation_key"))
 
     if queries.get("entry_type"):
         filters.append("et.name = :entry_type")
         params["entry_type"] = queries.get('entry_type')
 
-    if queries.get("author"):
+    if _is_fuzzy_author(queries):
+        # Typo-tolerant match against any word sequence of the author list
+        filters.append(":author <% (c.fields->>'author')")
+        params["author"] = queries.get("author")
+    elif queries.get("author"):
         filters.append("c.fields->>'author' ILIKE :author")
-        params["author"] = f"%{queries.get('author')}%"
+        params["author"] = _like_pattern(queries.get("author"))
 
     if year_from:
         filters.append("(c.fields->>'year')::int >= :year_from")
@@ -593,9 +744,30 @@ def search_citations(queries=None):
         """)
         params["category_names"] = category_names
 
-    if filters:
-        base_sql += " WHERE " + " AND ".join(filters)
+    return filters, params
+
+
+def _is_fuzzy_author(queries):
+    return bool(queries.get("author") and queries.get("fuzzy_author"))
+
+
+def _prepare_search(queries):
+    """Applies transaction-local settings the search query depends on."""
+    if _is_fuzzy_author(queries):
+        sql = statement(
+            """
+            SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)
+            """
+        )
+        db.session.execute(sql, {"threshold": str(FUZZY_AUTHOR_THRESHOLD)})
+
 
+def _search_order(queries):
+    """Returns the active sort as a list of (expression, direction) terms.
+
+    The list always ends with c.id so that every row has a unique sort key,
+    which keyset pagination relies on.
+    """
     allowed_sort_by = {"year", "citation_key"}
     allowed_direction = {"ASC", "DESC"}
     sort_by = (queries.get("sort_by") or "").lower()
@@ -605,13 +777,177 @@ def search_citations(queries=None):
     direction = direction if direction in allowed_direction else "ASC"
 
     if sort_by == "year":
-        base_sql += f" ORDER BY (c.fields->>'year')::int {direction}"
-    elif sort_by == "citation_key":
-        base_sql += f" ORDER BY c.citation_key {direction}"
-    else:
-        base_sql += " ORDER BY c.id ASC"
+        # Citations without a year sort before year 0
+        return [
+            ("COALESCE((c.fields->>'year')::int, -1)", direction),
+            ("c.id", direction),
+        ]
+
+    if sort_by == "citation_key":
+        return [("c.citation_key", direction), ("c.id", direction)]
+
+    # Most relevant matches first when no explicit sort was requested
+    ranks = []
+    if queries.get("q"):
+        ranks.append((f"ts_rank_cd(c.search_vector, {_TS_QUERY})", "DESC"))
+    if _is_fuzzy_author(queries):
+        ranks.append(("word_similarity(:author, c.fields->>'author')", "DESC"))
+
+    return ranks + [("c.id", "ASC")]
+
+
+def _keyset_filter(order_terms, params, values):
+    """Builds a filter selecting the rows that sort after the given key values.
+
+    Adds the key values to params as :cursor_<n>.
+    """
+    for i, value in enumerate(values):
+        params[f"cursor_{i}"] = value
+
+    directions = {d for _, d in order_terms}
+    if len(directions) == 1:
+        # A row comparison lets PostgreSQL use a matching index directly
+        op = ">" if directions.pop() == "ASC" else "<"
+        exprs = ", ".join(e for e, _ in order_terms)
+        cursors = ", ".join(f":cursor_{i}" for i in range(len(order_terms)))
+        return f"({exprs}) {op} ({cursors})"
+
+    alternatives = []
+    for i, (expr, direction) in enumerate(order_terms):
+        op = ">" if direction == "ASC" else "<"
+        equal = [f"{e} = :cursor_{j}" for j, (e, _) in enumerate(order_terms[:i])]
+        alternatives.append(
+            "(" + " AND ".join(equal + [f"{expr} {op} :cursor_{i}"]) + ")")
+    return "(" + " OR ".join(alternatives) + ")"
+
+
+def _sort_key(row, order_terms):
+    """Returns the sort key values _citations_sql selected for a row."""
+    return [getattr(row, f"sort_key_{i}") for i in range(len(order_terms))]
+
+
+def _encode_cursor(direction, values):
+    """Encodes a page position as an opaque URL-safe token."""
+    payload = json_codec.dumps({"d": direction, "v": list(values)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _cursor_value_valid(expr, value):
+    """Tells whether a cursor value has the type of its sort expression."""
+    if isinstance(value, bool):
+        return False
+    if expr == "c.citation_key":
+        return isinstance(value, str)
+    if expr.startswith(("ts_rank_cd(", "word_similarity(")):
+        return isinstance(value, (int, float))
+    return isinstance(value, int)
+
+
+def _decode_cursor(cursor, order_terms):
+    """Decodes a cursor token for the given sort, returning None for missing
+    or invalid tokens, including ones whose values do not fit the sort."""
+    if not cursor:
+        return None
+
+    try:
+        payload = json_codec.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        return None
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("d") not in ("next", "prev")
+        or not isinstance(payload.get("v"), list)
+        or len(payload["v"]) != len(order_terms)
+        or not all(
+            _cursor_value_valid(expr, value)
+            for (expr, _), value in zip(order_terms, payload["v"]))
+    ):
+        return None
 
-    sql = text(base_sql)
+    return payload
+
+
+def search_citations(queries=None):
+    """Fetches all citations matching the given search queries."""
+    if queries is None:
+        queries = {}
+
+    filters, params = _search_filters(queries)
+    sql = statement(_citations_sql(filters, _search_order(queries)))
+
+    _prepare_search(queries)
 
     result = db.session.execute(sql, params).fetchall()
     return [to_citation(r) for r in result]
+
+
+def search_citations_page(queries=None, field_names=None):
+    """Fetches one page of citations matching the given search queries.
+
+    Uses keyset pagination on the active sort, so deep pages cost the same
+    as the first one. The page is selected by the opaque `cursor` token and
+    its size by `per_page` in queries. If field_names is given, only those
+    fields of the citations are read.
+
+    Returns a tuple of (citations, next_cursor, prev_cursor), where a cursor
+    is None when there is no page in that direction.
+    """
+    if queries is None:
+        queries = {}
+
+    per_page = queries.get("per_page")
+    if not isinstance(per_page, int):
+        per_page = DEFAULT_PAGE_SIZE
+    per_page = min(max(per_page, 1), MAX_PAGE_SIZE)
+
+    filters, params = _search_filters(queries)
+    order_terms = _search_order(queries)
+
+    cursor = _decode_cursor(queries.get("cursor"), order_terms)
+    backwards = bool(cursor) and cursor["d"] == "prev"
+
+    # Previous pages are fetched by walking the sort backwards from the cursor
+    if backwards:
+        order_terms = [
+            (e, "DESC" if d == "ASC" else "ASC") for e, d in order_terms]
+
+    if cursor:
+        filters.append(_keyset_filter(order_terms, params, cursor["v"]))
+
+    # One extra row tells whether another page follows
+    params["limit"] = per_page + 1
+    _projection_params(params, field_names)
+    sql = statement(_citations_sql(filters, order_terms, "LIMIT :limit", field_names))
+
+    _prepare_search(queries)
+    rows = db.session.execute(sql, params).fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return [], None, None
+
+    has_next = cursor is not None if backwards else has_more
+    has_prev = has_more if backwards else cursor is not None
+
+    next_cursor = _encode_cursor("next", _sort_key(rows[-1], order_terms)) if has_next else None
+    prev_cursor = _encode_cursor("prev", _sort_key(rows[0], order_terms)) if has_prev else None
+
+    return [to_citation(r) for r in rows], next_cursor, prev_cursor
+
+
+def stream_search_citations(queries=None, batch_size=STREAM_BATCH_SIZE):
+    """Yields all citations matching the search queries without loading
+    them all into memory. Pagination keys in queries are ignored."""
+    if queries is None:
+        queries = {}
+
+    filters, params = _search_filters(queries)
+    sql = statement(_citations_sql(filters, _search_order(queries)))
+
+    _prepare_search(queries)
+    yield from _stream_citations(sql, params, batch_size)
@@ -0,0 +1,130 @@
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import json_codec
+from config import app, db
+from doi_cache import (
+    ERROR,
+    NOT_FOUND,
+    CachedDoi,
+    memory,
+    normalize_doi,
+    stats,
+    ttl_of,
+)
+from repositories.statements import PreparedStatement, statement
+
+# Resolved DOIs are cached in the doi_cache table, shared by all processes,
+# with a per-process LRU in front of it (see doi_cache). Expiry is computed
+# from fetched_at when an entry is read, so TTL changes apply to existing
+# entries too.
+
+_DOI_CACHE_ENTRY = PreparedStatement(
+    "doi_cache_entry",
+    """
+    SELECT status, fields, extract(epoch FROM fetched_at) AS fetched_at
+    FROM doi_cache
+    WHERE doi = :doi
+    """,
+    {"doi": "text"},
+)
+
+
+def get_cached_doi(doi, settings):
+    """Returns the cache entry of a normalized DOI, or None.
+
+    Expired entries are returned too, so that they can still be served while
+    the metadata service is failing.
+    """
+
+    row = _DOI_CACHE_ENTRY.execute(db.session, {"doi": doi}).fetchone()
+    if row is None:
+        return None
+
+    expires_at = float(row.fetched_at) + ttl_of(row.status, settings)
+    return CachedDoi(row.status, row.fields, expires_at)
+
+
+def store_cached_doi(doi, status, fields):
+    """Saves the result of resolving a normalized DOI, replacing any older one."""
+
+    sql = statement(
+        """
+        INSERT INTO doi_cache (doi, status, fields, fetched_at)
+        VALUES (:doi, :status, CAST(:fields AS jsonb), now())
+        ON CONFLICT (doi) DO UPDATE
+        SET status = EXCLUDED.status,
+            fields = EXCLUDED.fields,
+            fetched_at = EXCLUDED.fetched_at
+        """
+    )
+
+    db.session.execute(sql, {
+        "doi": doi,
+        "status": status,
+        "fields": json_codec.dumps(fields) if fields is not None else None,
+    })
+    db.session.commit()
+
+
+def _read_through(doi, settings):
+    """Returns the entry from the table, or None if it is missing or the
+    table can not be read."""
+    try:
+        return get_cached_doi(doi, settings)
+    except SQLAlchemyError as error:
+        db.session.rollback()
+        stats.record("errors")
+        app.logger.warning("DOI cache read failed: %s", error)
+        return None
+
+
+def _write_through(doi, status, fields):
+    try:
+        store_cached_doi(doi, status, fields)
+        stats.record("stores")
+    except SQLAlchemyError as error:
+        db.session.rollback()
+        stats.record("errors")
+        app.logger.warning("DOI cache write failed: %s", error)
+
+
+def cached_doi_lookup(doi, resolve):
+    """Returns the (status, fields) of a DOI from the cache, or resolves it.
+
+    resolve(doi) returns a (status, fields) tuple. Found and not found
+    results are cached for their TTLs; errors are not, but an expired entry
+    of the DOI is served when resolving it fails. The cache never makes a
+    lookup fail: if the table can not be used, the DOI is resolved.
+    """
+
+    settings = app.config["DOI_CACHE"]
+    if not settings["enabled"]:
+        return resolve(doi)
+
+    key = normalize_doi(doi)
+    now = time.time()
+
+    entry = memory.get(key, now)
+    if entry is not None:
+        stats.record("memory_hits", negative=entry.status == NOT_FOUND)
+        return entry.status, entry.fields
+
+    entry = _read_through(key, settings)
+    if entry is not None and entry.expires_at > now:
+        stats.record("db_hits", negative=entry.status == NOT_FOUND)
+        memory.put(key, entry)
+        return entry.status, entry.fields
+
+    stats.record("misses")
+    status, fields = resolve(doi)
+    if status == ERROR:
+        if entry is not None:
+            stats.record("stale_hits")
+            return entry.status, entry.fields
+        return ERROR, None
+
+    memory.put(key, CachedDoi(status, fields, now + ttl_of(status, settings)))
+    _write_through(key, status, fields)
+    return status, fields
@@ -0,0 +1,67 @@
+from sqlalchemy.exc import SQLAlchemyError
+
+import json_codec
+from config import app, db
+from doi_cache import normalize_doi
+from repositories.statements import PreparedStatement, statement
+
+# Metadata imported from a local dump (see doi_dump) is kept in the
+# doi_metadata table, one row of ready-made fields per lower-cased DOI, so a
+# lookup is a single primary key read.
+
+_DOI_METADATA_FIELDS = PreparedStatement(
+    "doi_metadata_fields",
+    "SELECT fields FROM doi_metadata WHERE doi = :doi",
+    {"doi": "text"},
+)
+
+
+def get_dump_fields(doi):
+    """Returns the imported fields of a DOI, or None if the dump lacks it."""
+
+    return _DOI_METADATA_FIELDS.execute(db.session, {"doi": normalize_doi(doi)}).scalar()
+
+
+def store_dump_fields(records):
+    """Saves a batch of (doi, fields) records, replacing older ones, without
+    committing.
+
+    Returns the number of records saved. A DOI repeated in the batch keeps
+    its last fields.
+    """
+
+    batch = {normalize_doi(doi): fields for doi, fields in records}
+    if not batch:
+        return 0
+
+    sql = statement(
+        """
+        INSERT INTO doi_metadata (doi, fields, imported_at)
+        SELECT doi, fields, now()
+        FROM unnest(CAST(:dois AS text[]), CAST(:fields AS jsonb[])) AS r(doi, fields)
+        ON CONFLICT (doi) DO UPDATE
+        SET fields = EXCLUDED.fields,
+            imported_at = EXCLUDED.imported_at
+        """
+    )
+
+    db.session.execute(sql, {
+        "dois": list(batch),
+        "fields": [json_codec.dumps(fields) for fields in batch.values()],
+    })
+    return len(batch)
+
+
+def offline_doi_lookup(doi):
+    """Returns a (found, fields) tuple from the imported dump.
+
+    A table that can not be read counts as a miss, so the lookup falls back
+    to the metadata service where that is allowed.
+    """
+    try:
+        fields = get_dump_fields(doi)
+    except SQLAlchemyError as error:
+        db.session.rollback()
+        app.logger.warning("DOI metadata read failed: %s", error)
+        return False, None
+    return fields is not None, fields
@@ -1,45 +1,13 @@
-from sqlalchemy import text
-
-from config import db
+from repositories.reference_data import get_reference_data
 
 
 def get_entry_fields(entry_type_id):
-    """Fetches default entry fields for a given entry type ID from the database"""
-
-    sql = text(
-        """
-        SELECT df.name
-        FROM default_entry_fields def
-        JOIN default_fields df ON def.default_field_id = df.id
-        WHERE def.entry_type_id = :entry_type_id
-        ORDER BY df.name
-        """
-    )
-
-    params = {"entry_type_id": entry_type_id}
-
-    result = db.session.execute(sql, params).fetchall()
+    """Fetches default entry fields for a given entry type ID"""
 
-    if not result:
-        return []
-
-    return [r.name for r in result]
+    return list(get_reference_data()["entry_fields"].get(entry_type_id, []))
 
 
 def get_default_fields():
-    """Returns all available default field names from the database."""
-
-    sql = text(
-        """
-        SELECT name
-        FROM default_fields
-        ORDER BY name
-        """
-    )
-
-    result = db.session.execute(sql).fetchall()
-
-    if not result:
-        return []
+    """Returns all available default field names."""
 
-    return [r.name for r in result]
+    return list(get_reference_data()["default_fields"])
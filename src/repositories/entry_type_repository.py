@@ -1,69 +1,24 @@
-from sqlalchemy import text
-
-from config import db
-from util import to_entry_type
+from repositories.reference_data import get_reference_data
 
 
 def get_entry_types():
-    """Fetches all entry types from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        ORDER BY name, id
-        """
-    )
-
-    result = db.session.execute(sql).fetchall()
+    """Fetches all entry types, ordered by name"""
 
-    if not result:
-        return []
-
-    return [to_entry_type(row) for row in result]
+    return list(get_reference_data()["entry_types"])
 
 
 def get_entry_type(entry_type_id):
-    """Fetches an entry type by its ID from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        WHERE id = :entry_type_id
-        """
-    )
-
-    params = {
-        "entry_type_id": entry_type_id,
-    }
+    """Fetches an entry type by its ID, given as an int or a numeric string"""
 
-    result = db.session.execute(sql, params).fetchone()
-
-    if not result:
+    try:
+        entry_type_id = int(entry_type_id)
+    except (TypeError, ValueError):
         return None
 
-    return to_entry_type(result)
+    return get_reference_data()["entry_types_by_id"].get(entry_type_id)
 
 
 def get_entry_type_by_name(entry_type):
-    """Fetches an entry type by its name from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        WHERE name = :entry_type
-        """
-    )
-
-    params = {
-        "entry_type": entry_type,
-    }
-
-    result = db.session.execute(sql, params).fetchone()
-
-    if not result:
-        return None
+    """Fetches an entry type by its name"""
 
-    return to_entry_type(result)
+    return get_reference_data()["entry_types_by_name"].get(entry_type)
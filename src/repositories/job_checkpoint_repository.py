@@ -0,0 +1,44 @@
+from config import db
+from repositories.statements import statement
+
+# Background jobs record how far they have got in the job_checkpoints
+# table, in the same transaction as the work itself, so a job that is
+# stopped resumes after the last batch it committed.
+
+
+def get_checkpoint(name):
+    """Returns the position saved by the named job, or None if it has none."""
+
+    sql = statement(
+        """
+        SELECT position
+        FROM job_checkpoints
+        WHERE name = :name
+        """
+    )
+
+    return db.session.execute(sql, {"name": name}).scalar()
+
+
+def save_checkpoint(name, position):
+    """Saves the position of the named job without committing."""
+
+    sql = statement(
+        """
+        INSERT INTO job_checkpoints (name, position, updated_at)
+        VALUES (:name, :position, now())
+        ON CONFLICT (name) DO UPDATE
+        SET position = EXCLUDED.position, updated_at = EXCLUDED.updated_at
+        """
+    )
+
+    db.session.execute(sql, {"name": name, "position": position})
+
+
+def delete_checkpoint(name):
+    """Forgets the position of the named job, so it starts over."""
+
+    sql = statement("DELETE FROM job_checkpoints WHERE name = :name")
+
+    db.session.execute(sql, {"name": name})
+    db.session.commit()
@@ -0,0 +1,86 @@
+from config import db
+from repositories.cache_versions import VersionedCache
+from repositories.statements import statement
+from util import to_entry_type
+
+# Entry types, default fields and their links are static reference data
+# loaded from sql/initial_data.sql, so each process reads them once and
+# serves them from memory while their 'reference_data' version in
+# cache_versions is unchanged. Loading the initial data bumps the version,
+# so every process reloads after a database reset, which gives the entry
+# types new ids.
+
+
+def _load():
+    """Reads all reference data from the database."""
+
+    entry_types = [
+        to_entry_type(row)
+        for row in db.session.execute(
+            statement(
+                """
+                SELECT id, name
+                FROM entry_types
+                ORDER BY name, id
+                """
+            )
+        ).fetchall()
+    ]
+
+    default_fields = [
+        row.name
+        for row in db.session.execute(
+            statement(
+                """
+                SELECT name
+                FROM default_fields
+                ORDER BY name
+                """
+            )
+        ).fetchall()
+    ]
+
+    entry_fields = {}
+    for row in db.session.execute(
+        statement(
+            """
+            SELECT def.entry_type_id, df.name
+            FROM default_entry_fields def
+            JOIN default_fields df ON def.default_field_id = df.id
+            ORDER BY df.name
+            """
+        )
+    ).fetchall():
+        entry_fields.setdefault(row.entry_type_id, []).append(row.name)
+
+    return {
+        "entry_types": entry_types,
+        "entry_types_by_id": {et.id: et for et in entry_types},
+        "entry_types_by_name": {et.name: et for et in entry_types},
+        "default_fields": default_fields,
+        "entry_fields": entry_fields,
+    }
+
+
+# Nothing is cached while there are no entry types, as that means the
+# database has not been initialized yet
+_cache = VersionedCache("reference_data", _load, keep=lambda data: data["entry_types"])
+
+
+def get_reference_data():
+    """Returns the cached reference data while its version in the database
+    is unchanged, otherwise reloads it."""
+
+    return _cache.get()
+
+
+def invalidate_reference_data():
+    """Drops this process's cached reference data so that it is reloaded on
+    next use.
+
+    Other processes reload once the 'reference_data' version is bumped, so
+    that must happen whenever entry_types, default_fields or
+    default_entry_fields are changed.
+    """
+
+    _cache.invalidate()
@@ -0,0 +1,62 @@
+import functools
+import re
+
+from sqlalchemy import text
+
+from config import app
+
+# Repository queries are compiled into text() clauses once and reused, so a
+# request only pays for binding its parameters. The hottest single-row
+# reads are also prepared on the server (see PreparedStatement), which
+# skips parsing and planning them on every execution.
+
+# Queries are only ever built from code, never from request values, so the
+# number of distinct statements is small and fixed
+STATEMENT_CACHE_SIZE = 1024
+
+_BIND_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def statement(sql):
+    """Returns the text() clause for the given SQL, compiling it only once."""
+    return text(sql)
+
+
+def _prepared_statements_enabled():
+    return app.config["DB_POOL"]["prepared_statements"]
+
+
+class PreparedStatement:  # pylint: disable=too-few-public-methods
+    """A query prepared once on each database connection and then run with
+    EXECUTE.
+
+    `params` maps the query's :name parameters to their PostgreSQL types.
+    Prepared statements are session state, so they are not used in
+    PgBouncer mode or when disabled with DB_PREPARED_STATEMENTS=false; the
+    query then runs as a regular statement.
+    """
+
+    def __init__(self, name, sql, params):
+        self.name = name
+        self.statement = text(sql)
+
+        positions = {param: i for i, param in enumerate(params, start=1)}
+        body = _BIND_PARAM.sub(lambda m: f"${positions[m.group(1)]}", sql)
+        self._prepare = text(f"PREPARE {name} ({', '.join(params.values())}) AS {body}")
+        self._execute = text(f"EXECUTE {name} ({', '.join(f':{p}' for p in params)})")
+
+    def execute(self, session, params):
+        """Runs the statement in the given session with the given params."""
+
+        if not _prepared_statements_enabled():
+            return session.execute(self.statement, params)
+
+        # Connection.info lives as long as the underlying DBAPI connection,
+        # and is cleared when the pool replaces it
+        prepared = session.connection().info.setdefault("prepared_statements", set())
+        if self.name not in prepared:
+            session.execute(self._prepare)
+            prepared.add(self.name)
+
+        return session.execute(self._execute, params)
@@ -0,0 +1,172 @@
+from flask import jsonify, request
+
+from errors import CitationNotFoundError
+from http_cache import conditional_response
+from repositories.cache_versions import get_cache_versions
+from repositories.citation_repository import (
+    get_citation_by_id,
+    get_citation_version,
+    get_citations_by_ids,
+    get_citations_by_keys,
+    search_citations_page,
+)
+from util import parse_search_queries
+
+# Attributes of a citation that can be selected with fields=. Any other name
+# selects a key of the citation's fields document (e.g. title or year).
+CITATION_ATTRIBUTES = ("id", "entry_type", "citation_key", "fields", "tags", "categories")
+
+# Upper limit of ids and keys accepted by one batchGet request
+MAX_BATCH_SIZE = 1000
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def _split(values):
+    """Splits repeated and comma-separated query values into a flat list."""
+    return [v.strip() for value in values for v in str(value).split(",") if v.strip()]
+
+
+def _parse_projection(value):
+    """Parses a fields= value into (attributes, field_names).
+
+    attributes is the set of citation attributes to return, always including
+    the id, and field_names the keys of the fields document to read, or None
+    for the whole document. Both are None when no projection was requested.
+    """
+    names = _split([value]) if value else []
+    if not names:
+        return None, None
+
+    attributes = {"id"} | {n for n in names if n in CITATION_ATTRIBUTES}
+    field_names = [n for n in names if n not in CITATION_ATTRIBUTES]
+
+    if "fields" in attributes:
+        field_names = None
+    elif field_names:
+        attributes.add("fields")
+
+    return attributes, field_names
+
+
+def _to_json(citation, attributes):
+    data = citation.to_dict()
+    if attributes is None:
+        return data
+    return {k: v for k, v in data.items() if k in attributes}
+
+
+def list_citations():
+    """Returns one page of citations matching the search query parameters.
+
+    Pages are walked with the opaque next_cursor and prev_cursor tokens of
+    the response, passed back as cursor=.
+    """
+
+    def render():
+        attributes, field_names = _parse_projection(request.args.get("fields"))
+        queries = parse_search_queries(request.args) or {}
+        citations, next_cursor, prev_cursor = search_citations_page(queries, field_names)
+        return jsonify({
+            "citations": [_to_json(c, attributes) for c in citations],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        })
+
+    versions = get_cache_versions(["citations", "tags", "categories"])
+    if len(versions) < 3:
+        return render()
+
+    return conditional_response(
+        render,
+        ["api", request.full_path] + [versions[name].version for name in sorted(versions)],
+        max(v.updated_at for v in versions.values()),
+    )
+
+
+def get_citation(citation_id):
+    """Returns a single citation by its ID."""
+
+    attributes, field_names = _parse_projection(request.args.get("fields"))
+
+    def render():
+        citation = get_citation_by_id(citation_id, field_names)
+        return jsonify(_to_json(citation, attributes))
+
+    version = get_citation_version(citation_id)
+    if not version:
+        return _error("Citation not found.", 404)
+
+    try:
+        return conditional_response(
+            render,
+            ("api", request.full_path, version.row_version),
+            version.updated_at,
+        )
+    except CitationNotFoundError:
+        # Deleted between the version check and the read
+        return _error("Citation not found.", 404)
+
+
+def _batch_arguments():
+    """Reads the requested ids and keys from the query string or a JSON body."""
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object with ids and/or keys.")
+        ids, keys = body.get("ids") or [], body.get("keys") or []
+        if not isinstance(ids, list) or not isinstance(keys, list):
+            raise ValueError("ids and keys must be lists.")
+        projection = body.get("fields")
+        if isinstance(projection, list):
+            projection = ",".join(str(p) for p in projection)
+    else:
+        ids = _split(request.args.getlist("ids"))
+        keys = _split(request.args.getlist("keys"))
+        projection = request.args.get("fields")
+
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError) as error:
+        raise ValueError("ids must be integers.") from error
+    keys = list(dict.fromkeys(str(k) for k in keys))
+
+    if not ids and not keys:
+        raise ValueError("No ids or keys given.")
+    if len(ids) + len(keys) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} ids and keys can be requested at once.")
+
+    return ids, keys, projection
+
+
+def batch_get():
+    """Returns the citations with the given ids and/or citation keys.
+
+    Citations are listed in the order they were requested, ids first, and
+    the ids and keys that matched no citation are listed in not_found.
+    """
+    try:
+        ids, keys, projection = _batch_arguments()
+    except ValueError as error:
+        return _error(str(error), 400)
+
+    attributes, field_names = _parse_projection(projection)
+
+    by_id = {c.id: c for c in get_citations_by_ids(ids, field_names)}
+    by_key = {c.citation_key: c for c in get_citations_by_keys(keys, field_names)}
+
+    citations = {}
+    not_found = []
+    requested = [(i, by_id.get(i)) for i in ids] + [(k, by_key.get(k)) for k in keys]
+    for value, found in requested:
+        if found is None:
+            not_found.append(value)
+        else:
+            citations.setdefault(found.id, found)
+
+    return jsonify({
+        "citations": [_to_json(c, attributes) for c in citations.values()],
+        "not_found": not_found,
+    })
@@ -1,9 +1,19 @@
 from flask import render_template
 
-from repositories.citation_repository import get_citation_by_id
+from http_cache import conditional_response
+from repositories.citation_repository import get_citation_by_id, get_citation_version
 
 
 def get(citation_id):
     """Renders the BibTeX page for a specific citation by its ID"""
-    citation = get_citation_by_id(citation_id)
-    return render_template("bibtex.html", citation=citation)
+
+    def render():
+        citation = get_citation_by_id(citation_id)
+        return render_template("bibtex.html", citation=citation)
+
+    version = get_citation_version(citation_id)
+    if not version:
+        return render()
+
+    return conditional_response(
+        render, ("bibtex", citation_id, version.row_version), version.updated_at)
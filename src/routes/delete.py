@@ -1,7 +1,7 @@
-from flask import flash, redirect, url_for
+from flask import flash, redirect, request, url_for
 from sqlalchemy.exc import SQLAlchemyError
 
-from repositories.citation_repository import delete_citation
+from repositories.citation_repository import delete_citation, delete_citations
 
 
 def post(citation_id):
@@ -14,3 +14,26 @@ def post(citation_id):
         flash(
             f"An error occurred while deleting the citation: {str(e)}", "error")
     return redirect(url_for("citations_view"))
+
+
+def post_batch():
+    """Handles the deletion of the selected citations by their IDs.
+
+    The IDs are read from one or more comma separated `citation_ids` values.
+    """
+    try:
+        ids = [
+            int(i)
+            for value in request.form.getlist("citation_ids")
+            for i in value.split(",")
+            if i.strip()
+        ]
+        if not ids:
+            raise ValueError("No citations selected.")
+
+        deleted = delete_citations(ids)
+        flash(f"Deleted {deleted} citation(s).", "success")
+    except (ValueError, TypeError, SQLAlchemyError) as e:
+        flash(
+            f"An error occurred while deleting the citations: {str(e)}", "error")
+    return redirect(url_for("citations_view"))
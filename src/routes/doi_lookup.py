@@ -1,5 +1,7 @@
-from flask import jsonify, request
+from flask import Response, jsonify, request, stream_with_context
 
+import doi_batch
+import json_codec
 import util
 
 
@@ -19,3 +21,28 @@ def post():
         return jsonify({"error": "Metadata not found for provided DOI."}), 404
 
     return jsonify({"fields": fields}), 200
+
+
+def _batch_values():
+    """Returns the DOIs posted as a JSON list under 'dois', or as the lines
+    of the 'dois' form field."""
+    if request.is_json:
+        body = request.get_json(silent=True)
+        values = body.get("dois") if isinstance(body, dict) else None
+        return values if isinstance(values, list) else []
+    return request.form.get("dois", "").splitlines()
+
+
+def post_batch():
+    """Resolves many DOIs at once and streams one JSON line per DOI as each
+    lookup completes."""
+    values = [v for v in _batch_values() if str(v).strip()]
+
+    if not values:
+        return jsonify({"error": "No DOIs provided."}), 400
+    if len(values) > doi_batch.MAX_BATCH_DOIS:
+        return jsonify(
+            {"error": f"At most {doi_batch.MAX_BATCH_DOIS} DOIs can be resolved at once."}), 400
+
+    lines = (json_codec.dumps(result) + "\n" for result in doi_batch.resolve_dois(values))
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
@@ -1,24 +1,70 @@
-from flask import Response, request
+from flask import Response, request, stream_with_context
 
-from repositories.citation_repository import get_citations_by_ids, get_citations_by_keys
+from http_cache import conditional_response
+from repositories.cache_versions import get_cache_versions
+from repositories.citation_repository import (
+    stream_citations_by_ids,
+    stream_citations_by_keys,
+    stream_search_citations,
+)
+from util import parse_search_queries
+
+
+def _bibtex_chunks(citations):
+    """Yields the BibTeX entries one at a time as they are formatted."""
+    for i, citation in enumerate(citations):
+        yield ("\n\n" if i else "") + citation.to_bibtex()
+    yield "\n"
+
+
+def _bibtex_response(citations, filename):
+    """Streams the citations to the client as a chunked .bib download."""
+    response = Response(
+        stream_with_context(_bibtex_chunks(citations)),
+        mimetype='application/x-bibtex',
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+
+    return response
+
+
+def _conditional_export(render):
+    """Answers with 304 Not Modified when no citation has changed since the
+    client downloaded the same export."""
+
+    library = get_cache_versions(["citations"]).get("citations")
+    if not library:
+        return render()
+
+    return conditional_response(
+        render, (request.full_path, library.version), library.updated_at)
 
 
 def get():
     """Exports selected citations as a .bib file"""
+    return _conditional_export(_export_selected)
 
+
+def _export_selected():
     ids_string = request.args.get("citation_ids", "")
     if ids_string:
         ids = [int(id) for id in ids_string.split(",")]
-        citations = get_citations_by_ids(ids)
+        citations = stream_citations_by_ids(ids)
     else:
         keys_string = request.args.get("citation_keys", "")
         keys = keys_string.split(",")
-        citations = get_citations_by_keys(keys)
+        citations = stream_citations_by_keys(keys)
 
-    bibtex = "\n\n".join(c.to_bibtex() for c in citations)
-    bibtex += "\n"
+    return _bibtex_response(citations, "selected_citations.bib")
 
-    response = Response(bibtex, mimetype='application/x-bibtex')
-    response.headers['Content-Disposition'] = 'attachment; filename=selected_citations.bib'
 
-    return response
+def search():
+    """Exports all citations matching the search query parameters as a .bib file"""
+    return _conditional_export(_export_search)
+
+
+def _export_search():
+    queries = parse_search_queries(request.args) or {}
+    citations = stream_search_citations(queries)
+
+    return _bibtex_response(citations, "search_results.bib")
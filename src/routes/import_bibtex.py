@@ -0,0 +1,37 @@
+import io
+
+from flask import flash, redirect, request, url_for
+
+import util
+from bibtex_import import import_bibtex
+
+# Number of individual conflicts/errors listed in the flash messages
+_MAX_REPORTED = 10
+
+
+def post():
+    """Imports the citations of an uploaded .bib file."""
+
+    upload = request.files.get("bib_file")
+    if not upload or not upload.filename:
+        flash("No .bib file selected.", "error")
+        return redirect(url_for("index"))
+
+    meta = util.extract_metadata(request.form)
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", errors="replace")
+
+    report = import_bibtex(
+        stream, categories=meta["categories"], tags=meta["tags"])
+
+    flash(
+        f"Imported {report['created']} citation(s) from {upload.filename}.",
+        "success" if report["created"] else "info",
+    )
+
+    problems = report["conflicts"] + report["errors"]
+    for line, key, message in problems[:_MAX_REPORTED]:
+        flash(f"Line {line} ({key or 'unknown key'}): {message}", "error")
+    if len(problems) > _MAX_REPORTED:
+        flash(f"...and {len(problems) - _MAX_REPORTED} more problem(s).", "error")
+
+    return redirect(url_for("citations_view"))
@@ -0,0 +1,21 @@
+from flask import jsonify
+
+import db_pool
+import doi_cache
+import doi_client
+from config import app, db
+
+
+def pool_metrics():
+    """Returns the state of the database connection pool in JSON format."""
+    return jsonify(db_pool.pool_status(db.engine, app.config["DB_POOL"]))
+
+
+def doi_cache_metrics():
+    """Returns the DOI cache counters in JSON format."""
+    return jsonify(doi_cache.stats.snapshot())
+
+
+def doi_client_metrics():
+    """Returns the DOI metadata service breaker state and latencies in JSON format."""
+    return jsonify(doi_client.client.status())
@@ -1,19 +1,47 @@
-from flask import render_template, request
+from flask import render_template, request, url_for
 
+from http_cache import conditional_response
+from repositories.cache_versions import get_cache_versions
 from repositories.category_repository import get_categories, get_tags
-from repositories.citation_repository import search_citations
+from repositories.citation_repository import search_citations_page
 from repositories.entry_type_repository import get_entry_types
 from util import parse_search_queries
 
 
+def _page_url(cursor):
+    """Returns the current search URL pointing at the given page cursor."""
+    if not cursor:
+        return None
+    args = request.args.to_dict(flat=False)
+    args["cursor"] = cursor
+    return url_for(request.endpoint, **args)
+
+
 def get():
+    """Renders the citations page, or 304 Not Modified when neither the
+    citations nor the tag and category lists have changed since the client
+    last loaded it."""
+
+    versions = get_cache_versions(["citations", "tags", "categories"])
+    if len(versions) < 3:
+        return _render()
+
+    return conditional_response(
+        _render,
+        [request.full_path] + [versions[name].version for name in sorted(versions)],
+        max(v.updated_at for v in versions.values()),
+    )
+
+
+def _render():
     queries = parse_search_queries(request.args) or {}
-    citations = search_citations(queries)
+    citations, next_cursor, prev_cursor = search_citations_page(queries)
     entry_types = get_entry_types()
     advanced_open = any([
         request.args.get("entry_type"),
         request.args.get("citation_key"),
         request.args.get("author"),
+        request.args.get("fuzzy_author"),
         request.args.get("year_from"),
         request.args.get("year_to"),
         request.args.get("advanced"),
@@ -32,5 +60,7 @@ def get():
         categories=get_categories(),
         selected_tags=selected_tags,
         selected_categories=selected_categories,
-        advanced_open=advanced_open
+        advanced_open=advanced_open,
+        next_url=_page_url(next_cursor),
+        prev_url=_page_url(prev_cursor),
     )
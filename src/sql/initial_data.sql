@@ -141,4 +141,14 @@ FROM entry_types et JOIN default_fields df ON df.name IN ('author','title','note
 WHERE et.name = 'unpublished'
 ON CONFLICT (entry_type_id, default_field_id) DO NOTHING;
 
+-- Insert versions of the lists cached by the app processes
+INSERT INTO cache_versions (name) VALUES
+  ('tags'), ('categories'), ('citations')
+ON CONFLICT (name) DO NOTHING;
+
+-- The reference data above is new, so processes caching it must reload it
+INSERT INTO cache_versions (name) VALUES ('reference_data')
+ON CONFLICT (name) DO UPDATE
+SET version = nextval('cache_versions_seq'), updated_at = now();
+
 COMMIT;
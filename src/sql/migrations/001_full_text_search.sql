@@ -0,0 +1,16 @@
+-- Adds the weighted full-text search column and its GIN index to an existing database.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+ALTER TABLE citations ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+  setweight(to_tsvector('simple', coalesce(fields->>'title', '')), 'A') ||
+  setweight(to_tsvector('simple', coalesce(fields->>'author', '')), 'B') ||
+  setweight(to_tsvector('simple',
+    coalesce(fields->>'abstract', '') || ' ' || coalesce(fields->>'note', '')), 'C') ||
+  setweight(jsonb_to_tsvector('simple',
+    fields - ARRAY['title', 'author', 'abstract', 'note'], '["string", "numeric"]'), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS citations_search_vector_gin ON citations USING GIN (search_vector);
+
+COMMIT;
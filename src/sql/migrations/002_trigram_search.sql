@@ -0,0 +1,10 @@
+-- Adds trigram indexes for citation key and author substring/fuzzy search.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS citations_citation_key_trgm ON citations USING GIN (citation_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS citations_author_trgm ON citations USING GIN ((fields->>'author') gin_trgm_ops);
+
+COMMIT;
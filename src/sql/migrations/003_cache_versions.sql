@@ -0,0 +1,16 @@
+-- Adds the version counters used to validate the tag and category lists cached by the app.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS cache_versions_seq;
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+  name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT nextval('cache_versions_seq')
+);
+
+INSERT INTO cache_versions (name) VALUES
+  ('tags'), ('categories')
+ON CONFLICT (name) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,14 @@
+-- Adds per-citation and library-wide versions used for HTTP ETag/Last-Modified validators.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+ALTER TABLE citations ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE citations ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT nextval('cache_versions_seq');
+
+ALTER TABLE cache_versions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+INSERT INTO cache_versions (name) VALUES
+  ('citations')
+ON CONFLICT (name) DO NOTHING;
+
+COMMIT;
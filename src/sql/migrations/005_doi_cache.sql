@@ -0,0 +1,12 @@
+-- Adds the table caching DOI metadata resolved from the upstream service.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS doi_cache (
+  doi TEXT PRIMARY KEY,
+  status TEXT NOT NULL CHECK (status IN ('found', 'not_found')),
+  fields JSONB,
+  fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Adds the table recording the progress of resumable background jobs.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+  name TEXT PRIMARY KEY,
+  position BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Adds the table holding DOI metadata imported from a local dump.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS doi_metadata (
+  doi TEXT PRIMARY KEY,
+  fields JSONB NOT NULL,
+  imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Adds the version counter used to validate the reference data (entry types
+-- and default fields) cached by the app.
+-- Idempotent: safe to run against databases created from the current schema.sql.
+BEGIN;
+
+INSERT INTO cache_versions (name) VALUES
+  ('reference_data')
+ON CONFLICT (name) DO NOTHING;
+
+COMMIT;
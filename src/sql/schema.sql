@@ -7,9 +7,20 @@ DROP TABLE IF EXISTS tags;
 DROP TABLE IF EXISTS categories;
 DROP TABLE IF EXISTS citations_to_tags;
 DROP TABLE IF EXISTS citations_to_categories;
+DROP TABLE IF EXISTS cache_versions;
+DROP TABLE IF EXISTS doi_cache;
+DROP TABLE IF EXISTS job_checkpoints;
+DROP TABLE IF EXISTS doi_metadata;
 
 
 BEGIN;
+-- Trigram matching, used for substring and fuzzy search on citation keys and authors
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Versions of cached data and citation rows are drawn from this sequence,
+-- so they never repeat even after the tables are truncated.
+CREATE SEQUENCE IF NOT EXISTS cache_versions_seq;
+
 -- This is for storing predefined entry types (e.g., article, book, inproceedings)
 CREATE TABLE entry_types (
   id SERIAL PRIMARY KEY,
@@ -21,7 +32,20 @@ CREATE TABLE citations (
   id SERIAL PRIMARY KEY,
   entry_type_id INTEGER REFERENCES entry_types(id),
   citation_key TEXT NOT NULL UNIQUE,
-  fields JSONB NOT NULL DEFAULT '{}'::jsonb
+  fields JSONB NOT NULL DEFAULT '{}'::jsonb,
+  -- Set on every change to the citation or its tags and categories; used for HTTP validators
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  row_version BIGINT NOT NULL DEFAULT nextval('cache_versions_seq'),
+  -- Weighted full-text document kept up to date by PostgreSQL itself.
+  -- Title ranks above author, which ranks above abstract/note and the rest.
+  search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(fields->>'title', '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(fields->>'author', '')), 'B') ||
+    setweight(to_tsvector('simple',
+      coalesce(fields->>'abstract', '') || ' ' || coalesce(fields->>'note', '')), 'C') ||
+    setweight(jsonb_to_tsvector('simple',
+      fields - ARRAY['title', 'author', 'abstract', 'note'], '["string", "numeric"]'), 'D')
+  ) STORED
 );
 
 -- This is for storing predefined field names (e.g., title, author, year)
@@ -63,10 +87,50 @@ CREATE TABLE citations_to_categories (
   PRIMARY KEY (citation_id, category_id)
 );
 
+-- This is for the versions of data cached by the app processes or by HTTP clients
+-- (e.g., the tag list, or 'citations' for the whole library)
+CREATE TABLE cache_versions (
+  name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT nextval('cache_versions_seq'),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- This is for DOI metadata resolved from the upstream service; DOIs are stored
+-- lower-cased and 'not_found' rows remember DOIs the service did not know
+CREATE TABLE doi_cache (
+  doi TEXT PRIMARY KEY,
+  status TEXT NOT NULL CHECK (status IN ('found', 'not_found')),
+  fields JSONB,
+  fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- This is for the progress of resumable background jobs (e.g., the last
+-- citation id processed by the DOI enrichment job)
+CREATE TABLE job_checkpoints (
+  name TEXT PRIMARY KEY,
+  position BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- This is for DOI metadata imported from a local dump, consulted before (or
+-- instead of) the upstream service; DOIs are stored lower-cased
+CREATE TABLE doi_metadata (
+  doi TEXT PRIMARY KEY,
+  fields JSONB NOT NULL,
+  imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
 -- Indices to improve query performance
 -- GIN index for fast jsonb containment queries on citation fields
 CREATE INDEX IF NOT EXISTS citations_fields_gin ON citations USING GIN (fields);
 
+-- GIN index for full-text search over the weighted search_vector column
+CREATE INDEX IF NOT EXISTS citations_search_vector_gin ON citations USING GIN (search_vector);
+
+-- Trigram indexes serving substring (ILIKE '%...%') and fuzzy similarity searches
+CREATE INDEX IF NOT EXISTS citations_citation_key_trgm ON citations USING GIN (citation_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS citations_author_trgm ON citations USING GIN ((fields->>'author') gin_trgm_ops);
+
 -- Index for filtering by entry_type_id (useful when listing citations by type)
 CREATE INDEX IF NOT EXISTS citations_entry_type_idx ON citations (entry_type_id);
 
@@ -0,0 +1,32 @@
+// Collect selected citation ids and submit the delete form as hidden input
+(function () {
+  function deleteSelected() {
+    var form = document.forms['deleteform'];
+    if (!form) return;
+
+    var selectedIds = [];
+    document.querySelectorAll('.export-checkbox input[type="checkbox"]:checked').forEach(function (checkbox) {
+      selectedIds.push(checkbox.id);
+    });
+    if (selectedIds.length === 0) {
+      alert('Please select at least one citation to delete.');
+      return;
+    }
+    if (!confirm('Are you sure you want to delete ' + selectedIds.length + ' citation(s)?')) {
+      return;
+    }
+
+    while (form.lastChild && form.lastChild.name === 'citation_ids') {
+      form.removeChild(form.lastChild);
+    }
+    var input = document.createElement('input');
+    input.type = 'hidden';
+    input.name = 'citation_ids';
+    input.value = selectedIds;
+    form.appendChild(input);
+    form.submit();
+  }
+
+  // expose global function used by templates
+  window.delete_selected = deleteSelected;
+})();
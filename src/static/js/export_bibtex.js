@@ -5,7 +5,7 @@
     if (!form) return;
 
     var selectedIds = [];
-    document.querySelectorAll('input[type="checkbox"]:checked').forEach(function (checkbox) {
+    document.querySelectorAll('.export-checkbox input[type="checkbox"]:checked').forEach(function (checkbox) {
       selectedIds.push(checkbox.id);
     });
     if (selectedIds.length === 0) {
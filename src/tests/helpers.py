@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from config import app
+from repositories.reference_data import invalidate_reference_data
+
+
+def results(*row_lists):
+    """Returns mocked query results whose fetchall() returns each list of
+    rows in turn, for use as a session.execute side effect."""
+
+    mocked = []
+    for rows in row_lists:
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = rows
+        mocked.append(mock_result)
+    return mocked
+
+
+class ConfigPatchTestCase(unittest.TestCase):
+    """Runs the tests of a class with `config_patches`, a dict of app.config
+    keys to the values patched into them."""
+
+    config_patches = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for key, values in cls.config_patches.items():
+            patcher = patch.dict(app.config[key], values)
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+
+
+class PlainStatementsTestCase(ConfigPatchTestCase):
+    """Runs prepared statements as regular ones, so mocked sessions receive
+    the SQL. Prepared statement execution is covered in test_statements."""
+
+    config_patches = {"DB_POOL": {"prepared_statements": False}}
+
+
+class UncachedDoiTestCase(ConfigPatchTestCase):
+    """Resolves DOIs without the DOI cache, which is covered in
+    test_doi_cache_repository."""
+
+    config_patches = {"DOI_CACHE": {"enabled": False}}
+
+
+class CacheVersionsTestCase(unittest.TestCase):
+    """Serves `cache_versions`, a dict of cache names to versions, as the
+    versions process caches are validated against. self.mock_versions
+    can be given other return values by the tests."""
+
+    cache_versions = {}
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("repositories.cache_versions.request_cache_versions",
+                        return_value=dict(self.cache_versions))
+        self.mock_versions = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class ReferenceDataTestCase(CacheVersionsTestCase):
+    """Starts each test with the reference data cache empty and its version
+    unchanged, so the first read loads it."""
+
+    cache_versions = {"reference_data": 1}
+
+    def setUp(self):
+        super().setUp()
+        invalidate_reference_data()
+        self.addCleanup(invalidate_reference_data)
@@ -0,0 +1,137 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import routes.api as api
+from app import app
+from entities.citation import Citation
+from errors import CitationNotFoundError
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 30, 15, tzinfo=timezone.utc)
+
+
+def _citation(citation_id, key, fields=None):
+    return Citation(citation_id, "article", key, fields or {"title": f"T{citation_id}"},
+                    metadata={"tags": ["t"], "categories": []})
+
+
+class TestApiProjection(unittest.TestCase):
+    def test_no_projection(self):
+        self.assertEqual(api._parse_projection(None), (None, None))
+        self.assertEqual(api._parse_projection(" , "), (None, None))
+
+    def test_attributes_and_field_names(self):
+        attributes, field_names = api._parse_projection("citation_key, title,year")
+        self.assertEqual(attributes, {"id", "citation_key", "fields"})
+        self.assertEqual(field_names, ["title", "year"])
+
+    def test_attributes_only_reads_no_fields(self):
+        attributes, field_names = api._parse_projection("tags")
+        self.assertEqual(attributes, {"id", "tags"})
+        self.assertEqual(field_names, [])
+
+    def test_fields_attribute_reads_whole_document(self):
+        attributes, field_names = api._parse_projection("fields,title")
+        self.assertEqual(attributes, {"id", "fields"})
+        self.assertIsNone(field_names)
+
+
+@patch.dict(app.config, {"SECRET_KEY": "test"})
+class TestApiRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch("routes.api.get_cache_versions", return_value={})
+    @patch("routes.api.search_citations_page")
+    def test_list_citations_page(self, mock_page, _):
+        mock_page.return_value = ([_citation(1, "k1")], "next-token", None)
+
+        response = self.client.get("/api/citations?per_page=1&fields=citation_key")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            "citations": [{"id": 1, "citation_key": "k1"}],
+            "next_cursor": "next-token",
+            "prev_cursor": None,
+        })
+        queries, field_names = mock_page.call_args[0]
+        self.assertEqual(queries["per_page"], 1)
+        self.assertEqual(field_names, [])
+
+    @patch("routes.api.get_citation_version")
+    @patch("routes.api.get_citation_by_id")
+    def test_get_citation_and_revalidate(self, mock_get, mock_version):
+        mock_version.return_value = SimpleNamespace(row_version=7, updated_at=UPDATED_AT)
+        mock_get.return_value = _citation(1, "k1")
+
+        response = self.client.get("/api/citations/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["citation_key"], "k1")
+
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/citations/1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        mock_get.assert_called_once_with(1, None)
+
+    @patch("routes.api.get_citation_version", return_value=None)
+    def test_get_missing_citation(self, _):
+        response = self.client.get("/api/citations/5")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {"error": "Citation not found."})
+
+    @patch("routes.api.get_citation_version")
+    @patch("routes.api.get_citation_by_id", side_effect=CitationNotFoundError("gone"))
+    def test_get_citation_deleted_after_version_check(self, _, mock_version):
+        mock_version.return_value = SimpleNamespace(row_version=7, updated_at=UPDATED_AT)
+        response = self.client.get("/api/citations/5")
+        self.assertEqual(response.status_code, 404)
+
+    @patch("routes.api.get_citations_by_keys")
+    @patch("routes.api.get_citations_by_ids")
+    def test_batch_get_keeps_request_order_and_reports_missing(self, mock_ids, mock_keys):
+        mock_ids.return_value = [_citation(2, "k2"), _citation(1, "k1")]
+        mock_keys.return_value = [_citation(1, "k1"), _citation(3, "k3")]
+
+        response = self.client.get(
+            "/api/citations:batchGet?ids=1,2&ids=9&keys=k3,k1,nope&fields=title")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([c["id"] for c in data["citations"]], [1, 2, 3])
+        self.assertEqual(data["citations"][0], {"id": 1, "fields": {"title": "T1"}})
+        self.assertEqual(data["not_found"], [9, "nope"])
+        mock_ids.assert_called_once_with([1, 2, 9], ["title"])
+        mock_keys.assert_called_once_with(["k3", "k1", "nope"], ["title"])
+
+    @patch("routes.api.get_citations_by_keys", return_value=[])
+    @patch("routes.api.get_citations_by_ids", return_value=[])
+    def test_batch_get_accepts_json_body(self, mock_ids, mock_keys):
+        response = self.client.post(
+            "/api/citations:batchGet", json={"ids": [4, 4], "fields": ["tags"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["not_found"], [4])
+        mock_ids.assert_called_once_with([4], [])
+        mock_keys.assert_called_once_with([], [])
+
+    def test_batch_get_rejects_invalid_requests(self):
+        for kwargs in (
+            {"path": "/api/citations:batchGet"},
+            {"path": "/api/citations:batchGet?ids=x"},
+            {"path": "/api/citations:batchGet", "method": "POST", "json": {"ids": 1}},
+            {"path": "/api/citations:batchGet", "method": "POST", "data": "nope"},
+        ):
+            with self.subTest(**kwargs):
+                response = self.client.open(**kwargs)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.get_json())
+
+    def test_batch_get_rejects_too_many_ids(self):
+        ids = ",".join(str(i) for i in range(api.MAX_BATCH_SIZE + 1))
+        response = self.client.get(f"/api/citations:batchGet?ids={ids}")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import io
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import bibtex_import
+
+SAMPLE = """
+% A comment line outside of any entry
+@string{nips = "Advances in Neural Information Processing Systems"}
+
+@inproceedings{vaswani2017,
+  author = {Ashish Vaswani and Noam Shazeer},
+  title = {Attention Is {All} You Need},
+  booktitle = nips,
+  year = 2017,
+  keywords = {transformer; nlp, transformer},
+}
+
+@Article(lecun2015,
+  title = "Deep " # {learning},
+  year = {2015}
+)
+
+@comment{ignored entirely}
+"""
+
+
+class TestBibtexImport(unittest.TestCase):
+    def test_parse_bibtex_reads_entries(self):
+        entries = list(bibtex_import.parse_bibtex(io.StringIO(SAMPLE)))
+
+        self.assertEqual(len(entries), 2)
+
+        first = entries[0]
+        self.assertEqual(first["line"], 5)
+        self.assertEqual(first["entry_type"], "inproceedings")
+        self.assertEqual(first["citation_key"], "vaswani2017")
+        self.assertEqual(first["fields"], {
+            "author": "Ashish Vaswani and Noam Shazeer",
+            "title": "Attention Is {All} You Need",
+            "booktitle": "Advances in Neural Information Processing Systems",
+            "year": "2017",
+        })
+        self.assertEqual(first["tags"], ["transformer", "nlp"])
+
+        second = entries[1]
+        self.assertEqual(second["entry_type"], "article")
+        self.assertEqual(second["fields"], {"title": "Deep learning", "year": "2015"})
+        self.assertEqual(second["tags"], [])
+
+    def test_parse_bibtex_reports_bad_entries_and_continues(self):
+        text = (
+            "@article{broken,\n"
+            "  title = {Never closed\n"
+            "@book{badyear, year = {20x1}}\n"
+            "@misc{ , title = {No key}}\n"
+            "@misc{fine, title = {Fine}}\n"
+        )
+        entries = list(bibtex_import.parse_bibtex(io.StringIO(text)))
+
+        self.assertEqual([e.get("error") is not None for e in entries],
+                         [True, True, True, False])
+        self.assertEqual(entries[0]["line"], 1)
+        self.assertIn("Malformed entry", entries[0]["error"])
+        self.assertEqual(entries[1]["citation_key"], "badyear")
+        self.assertIn("Year", entries[1]["error"])
+        self.assertEqual(entries[3]["citation_key"], "fine")
+
+    @patch("bibtex_import.create_citations_bulk")
+    @patch("bibtex_import.get_entry_types")
+    def test_import_bibtex_batches_and_reports(self, mock_types, mock_bulk):
+        mock_types.return_value = [
+            SimpleNamespace(id=1, name="misc"),
+            SimpleNamespace(id=2, name="article"),
+        ]
+        mock_bulk.side_effect = [
+            (["a", "b"], []),
+            (["c"], ["a"]),
+        ]
+        text = (
+            "@misc{a, title={A}}\n"
+            "@misc{b, title={B}}\n"
+            "@unknown{x, title={X}}\n"
+            "@article{c, title={C}, keywords={k}}\n"
+            "@misc{a, title={A again}}\n"
+        )
+
+        report = bibtex_import.import_bibtex(
+            io.StringIO(text), batch_size=2, categories=["Cat"], tags=["imported"])
+
+        self.assertEqual(report["created"], 3)
+        self.assertEqual(report["conflicts"],
+                         [(5, "a", "Citation key 'a' already exists.")])
+        self.assertEqual(report["errors"],
+                         [(3, "x", "Unknown entry type 'unknown'.")])
+
+        self.assertEqual(mock_bulk.call_count, 2)
+        second_batch = mock_bulk.call_args_list[1][0][0]
+        self.assertEqual([e["citation_key"] for e in second_batch], ["c", "a"])
+        self.assertEqual(second_batch[0]["entry_type_id"], 2)
+        self.assertEqual(second_batch[0]["tags"], ["k", "imported"])
+        self.assertEqual(second_batch[0]["categories"], ["Cat"])
+
+    @patch("bibtex_import.create_citations_bulk")
+    @patch("bibtex_import.get_entry_types")
+    def test_import_bibtex_reports_failed_batch(self, mock_types, mock_bulk):
+        mock_types.return_value = [SimpleNamespace(id=1, name="misc")]
+        mock_bulk.side_effect = SQLAlchemyError("db down")
+
+        report = bibtex_import.import_bibtex(
+            io.StringIO("@misc{a, title={A}}\n@misc{b, title={B}}\n"))
+
+        self.assertEqual(report["created"], 0)
+        self.assertEqual([e[1] for e in report["errors"]], ["a", "b"])
+        self.assertIn("Database error", report["errors"][0][2])
+
+
+if __name__ == "__main__":
+    unittest.main()
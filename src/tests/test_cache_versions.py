@@ -0,0 +1,81 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import repositories.cache_versions as repo
+import routes.main as main
+from repositories import category_repository, reference_data
+from config import app, db
+from tests.helpers import PlainStatementsTestCase, results
+
+
+class TestCacheVersions(PlainStatementsTestCase):
+    @patch("repositories.cache_versions.db")
+    def test_get_cache_versions(self, mock_db):
+        row = SimpleNamespace(name="tags", version=12, updated_at=None)
+        mock_db.session.execute.return_value.fetchall.return_value = [row]
+
+        self.assertEqual(repo.get_cache_versions(["tags", "categories"]), {"tags": row})
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("FROM cache_versions", str(sql))
+        self.assertEqual(params, {"names": ["tags", "categories"]})
+
+    @patch("repositories.cache_versions.get_cache_versions")
+    def test_request_cache_versions_are_read_once_per_request(self, mock_versions):
+        mock_versions.return_value = {
+            "tags": SimpleNamespace(version=3), "reference_data": SimpleNamespace(version=4)}
+
+        with app.test_request_context("/"):
+            self.assertEqual(repo.request_cache_versions(), {"tags": 3, "reference_data": 4})
+            repo.request_cache_versions()
+        mock_versions.assert_called_once()
+        self.assertTrue({"reference_data", "tags", "categories"}.issubset(
+            mock_versions.call_args[0][0]))
+
+        with app.test_request_context("/"):
+            repo.request_cache_versions()
+        self.assertEqual(mock_versions.call_count, 2)
+
+    def test_bump_version_cte_depends_on_source(self):
+        sql = repo.bump_version_cte("categories", "removed")
+
+        self.assertIn("bump_categories AS (", sql)
+        self.assertIn("nextval('cache_versions_seq')", sql)
+        self.assertIn("EXISTS (SELECT 1 FROM removed)", sql)
+
+
+
+class TestIndexPageQueries(PlainStatementsTestCase):
+    def setUp(self):
+        for cache in (reference_data._cache, category_repository._categories_cache,
+                      category_repository._tags_cache):
+            cache.invalidate()
+            self.addCleanup(cache.invalidate)
+
+    @patch("routes.main.render_template", return_value="")
+    def test_warm_index_page_reads_only_the_cache_versions(self, _):
+        def execute(sql, params=None):
+            if "FROM cache_versions" in str(sql):
+                rows = [SimpleNamespace(name=name, version=1, updated_at=None)
+                        for name in params["names"]]
+            elif "FROM entry_types" in str(sql):
+                rows = [SimpleNamespace(id=1, name="article")]
+            else:
+                rows = []
+            return results(rows)[0]
+
+        with patch.object(db, "session", MagicMock()) as session:
+            session.execute.side_effect = execute
+            with app.test_request_context("/"):
+                main.get()
+            session.execute.reset_mock()
+
+            with app.test_request_context("/"):
+                main.get()
+
+        self.assertEqual(session.execute.call_count, 1)
+        self.assertIn("FROM cache_versions", str(session.execute.call_args[0][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,6 +26,10 @@ class TestCategoryEntity(unittest.TestCase):
         self.assertEqual(t.name, "taggy")
         self.assertIsInstance(t, Category)
 
+    def test_category_and_tag_use_slots(self):
+        self.assertFalse(hasattr(Category(1, "a"), "__dict__"))
+        self.assertFalse(hasattr(Tag(1, "a"), "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
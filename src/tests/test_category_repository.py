@@ -3,9 +3,17 @@ from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import repositories.category_repository as repo
+from tests.helpers import CacheVersionsTestCase
 
 
-class TestCategoryRepository(unittest.TestCase):
+class TestCategoryRepository(CacheVersionsTestCase):
+    def setUp(self):
+        # The list caches are not validated unless a test gives them a version
+        super().setUp()
+        for cache in (repo._categories_cache, repo._tags_cache):
+            cache.invalidate()
+            self.addCleanup(cache.invalidate)
+
     @patch("repositories.category_repository.db")
     def test_get_categories_returns_list(self, mock_db):
         rows = [
@@ -243,50 +251,43 @@ class TestCategoryRepository(unittest.TestCase):
 
     @patch("repositories.category_repository.db")
     def test_get_or_create_tags_mixes_existing_and_new(self, mock_db):
-        # simulate first name exists, second does not; then create_tags returns the missing one
-        def fake_execute(sql, params=None):
-            mock = MagicMock()
-            name = params.get("name") if params else None
-            if name == "exist":
-                mock.fetchone.return_value = SimpleNamespace(
-                    id=77, name="exist")
-            else:
-                mock.fetchone.return_value = None
-            return mock
-
-        mock_db.session.execute.side_effect = fake_execute
+        # the statement returns newly inserted rows before existing ones
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            SimpleNamespace(id=88, name="new"),
+            SimpleNamespace(id=77, name="exist"),
+        ]
+        mock_db.session.execute.return_value = mock_result
 
-        with patch("repositories.category_repository.create_tags") as mock_create_tags:
-            mock_create_tags.return_value = [
-                SimpleNamespace(id=88, name="new")]
-            out = repo.get_or_create_tags(["exist", "new"])
+        out = repo.get_or_create_tags(["exist", "new", "exist"])
 
-        # order not guaranteed; check contents
-        names = sorted([t.name for t in out])
-        self.assertEqual(names, ["exist", "new"])
+        self.assertEqual([(t.id, t.name) for t in out],
+                         [(77, "exist"), (88, "new")])
+        mock_db.session.execute.assert_called_once()
+        self.assertEqual(
+            mock_db.session.execute.call_args[0][1]["names"], ["exist", "new"])
+        mock_db.session.commit.assert_called_once()
 
     @patch("repositories.category_repository.db")
     def test_get_or_create_categories_mixes_existing_and_new(self, mock_db):
-        # simulate first name exists, second does not; then create_categories returns the missing one
-        def fake_execute(sql, params=None):
-            mock = MagicMock()
-            name = params.get("name") if params else None
-            if name == "existc":
-                mock.fetchone.return_value = SimpleNamespace(
-                    id=301, name="existc")
-            else:
-                mock.fetchone.return_value = None
-            return mock
-
-        mock_db.session.execute.side_effect = fake_execute
-
-        with patch("repositories.category_repository.create_categories") as mock_create_cats:
-            mock_create_cats.return_value = [
-                SimpleNamespace(id=302, name="newc")]
-            out = repo.get_or_create_categories(["existc", "newc"])
-
-        names = sorted([c.name for c in out])
-        self.assertEqual(names, ["existc", "newc"])
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            SimpleNamespace(id=302, name="newc"),
+            SimpleNamespace(id=301, name="existc"),
+        ]
+        mock_db.session.execute.return_value = mock_result
+
+        out = repo.get_or_create_categories(["existc", "newc"])
+
+        self.assertEqual([c.name for c in out], ["existc", "newc"])
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("INSERT INTO categories", sql)
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.category_repository.db")
+    def test_get_or_create_tags_empty(self, mock_db):
+        self.assertEqual(repo.get_or_create_tags([]), [])
+        mock_db.session.execute.assert_not_called()
 
     def test_assign_metadata_to_citation_ignores_non_list(self):
         # when categories/tags are not lists, assign subcalls should not be invoked
@@ -309,14 +310,18 @@ class TestCategoryRepository(unittest.TestCase):
     def test_assign_tags_to_citation_executes_multiple(self, mock_db):
         tags = [SimpleNamespace(id=3), SimpleNamespace(id=4)]
         repo.assign_tags_to_citation(11, tags)
-        self.assertEqual(mock_db.session.execute.call_count, 2)
+        mock_db.session.execute.assert_called_once()
+        params = mock_db.session.execute.call_args[0][1]
+        self.assertEqual(params, {"citation_ids": [11, 11], "tag_ids": [3, 4]})
         mock_db.session.commit.assert_called_once()
 
     @patch("repositories.category_repository.db")
     def test_assign_categories_to_citation_executes_multiple(self, mock_db):
         categories = [SimpleNamespace(id=13), SimpleNamespace(id=14)]
         repo.assign_categories_to_citation(21, categories)
-        self.assertEqual(mock_db.session.execute.call_count, 2)
+        mock_db.session.execute.assert_called_once()
+        params = mock_db.session.execute.call_args[0][1]
+        self.assertEqual(params["category_ids"], [13, 14])
         mock_db.session.commit.assert_called_once()
 
     @patch("repositories.category_repository.db")
@@ -374,6 +379,147 @@ class TestCategoryRepository(unittest.TestCase):
         self.assertEqual(cats[0].name, "X")
         self.assertEqual(tags[0].name, "Y")
 
+    @patch("repositories.category_repository.db")
+    def test_upsert_tags_uses_single_statement(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            SimpleNamespace(id=1, name="a"),
+            SimpleNamespace(id=2, name="b"),
+        ]
+        mock_db.session.execute.return_value = mock_result
+
+        out = repo.upsert_tags(["a", "b", "a"])
+
+        self.assertEqual({k: v.id for k, v in out.items()}, {"a": 1, "b": 2})
+        mock_db.session.execute.assert_called_once()
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("INSERT INTO tags", str(sql))
+        self.assertIn("ON CONFLICT (name) DO NOTHING", str(sql))
+        self.assertEqual(params["names"], ["a", "b"])
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.category_repository.db")
+    def test_upsert_categories_refetches_concurrently_created(self, mock_db):
+        first = MagicMock()
+        first.fetchall.return_value = [SimpleNamespace(id=1, name="x")]
+        second = MagicMock()
+        second.fetchall.return_value = [SimpleNamespace(id=2, name="y")]
+        mock_db.session.execute.side_effect = [first, second]
+
+        out = repo.upsert_categories(["x", "y"])
+
+        self.assertEqual({k: v.id for k, v in out.items()}, {"x": 1, "y": 2})
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        self.assertEqual(
+            mock_db.session.execute.call_args[0][1]["names"], ["y"])
+
+    @patch("repositories.category_repository.db")
+    def test_upsert_tags_empty(self, mock_db):
+        self.assertEqual(repo.upsert_tags([]), {})
+        mock_db.session.execute.assert_not_called()
+
+    @patch("repositories.category_repository.db")
+    def test_link_tags_and_categories_to_citations(self, mock_db):
+        repo.link_tags_to_citations([(1, 10), (2, 11)])
+        repo.link_categories_to_citations([(1, 20)])
+        repo.link_tags_to_citations([])
+
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        tag_sql, tag_params = mock_db.session.execute.call_args_list[0][0]
+        self.assertIn("INSERT INTO citations_to_tags", str(tag_sql))
+        self.assertEqual(tag_params, {"citation_ids": [1, 2], "tag_ids": [10, 11]})
+        cat_params = mock_db.session.execute.call_args_list[1][0][1]
+        self.assertEqual(cat_params, {"citation_ids": [1], "category_ids": [20]})
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.category_repository.db")
+    def test_sync_citation_tags_applies_only_the_diff(self, mock_db):
+        current = MagicMock()
+        current.fetchall.return_value = [(1,), (2,), (3,)]
+        mock_db.session.execute.side_effect = [current, MagicMock(), MagicMock()]
+
+        tags = [SimpleNamespace(id=3), SimpleNamespace(id=4), SimpleNamespace(id=1)]
+        added, removed = repo.sync_citation_tags(7, tags)
+
+        self.assertEqual((added, removed), ([4], [2]))
+        calls = mock_db.session.execute.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertIn("INSERT INTO citations_to_tags", str(calls[1][0][0]))
+        self.assertEqual(calls[1][0][1], {"citation_id": 7, "ids": [4]})
+        self.assertIn("tag_id = ANY(:ids)", str(calls[2][0][0]))
+        self.assertEqual(calls[2][0][1], {"citation_id": 7, "ids": [2]})
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.category_repository.db")
+    def test_sync_citation_categories_unchanged_only_reads(self, mock_db):
+        current = MagicMock()
+        current.fetchall.return_value = [(5,)]
+        mock_db.session.execute.return_value = current
+
+        out = repo.sync_citation_categories(7, [SimpleNamespace(id=5)])
+
+        self.assertEqual(out, ([], []))
+        mock_db.session.execute.assert_called_once()
+
+    def test_sync_citation_metadata_skips_non_lists(self):
+        with patch("repositories.category_repository.sync_citation_categories") as mock_sc, \
+                patch("repositories.category_repository.sync_citation_tags") as mock_st:
+            repo.sync_citation_metadata(1, None, [])
+
+        mock_sc.assert_not_called()
+        mock_st.assert_called_once_with(1, [])
+
+    @patch("repositories.category_repository.db")
+    def test_get_tags_served_from_cache_while_version_unchanged(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=1, name="t1")]
+        self.mock_versions.return_value = {"tags": 5}
+
+        first = repo.get_tags()
+        second = repo.get_tags()
+
+        self.assertEqual([t.name for t in second], ["t1"])
+        self.assertIsNot(first, second)
+        mock_db.session.execute.assert_called_once()
+
+    @patch("repositories.category_repository.db")
+    def test_get_categories_reloads_when_version_changes(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.side_effect = [
+            [SimpleNamespace(id=1, name="a")],
+            [SimpleNamespace(id=1, name="a"), SimpleNamespace(id=2, name="b")],
+        ]
+        self.mock_versions.side_effect = [{"categories": 5}, {"categories": 6}]
+
+        repo.get_categories()
+        cats = repo.get_categories()
+
+        self.assertEqual([c.name for c in cats], ["a", "b"])
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+
+    @patch("repositories.category_repository.db")
+    def test_create_tag_bumps_tags_version_in_same_statement(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=1, name="x")
+
+        repo.create_tag("x")
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("UPDATE cache_versions", sql)
+        self.assertIn("WHERE name = 'tags'", sql)
+
+    @patch("repositories.category_repository.db")
+    def test_link_writers_touch_citations_unless_told_not_to(self, mock_db):
+        repo.assign_tags_to_citation(1, [SimpleNamespace(id=2)])
+        self.assertIn("UPDATE citations", str(mock_db.session.execute.call_args[0][0]))
+
+        repo.link_tags_to_citations([(1, 2)], touch=False)
+        self.assertNotIn("UPDATE citations", str(mock_db.session.execute.call_args[0][0]))
+
+        repo.remove_category_from_citation(3, 1)
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("RETURNING citation_id", sql)
+        self.assertIn("UPDATE citations", sql)
+
 
 if __name__ == "__main__":
     unittest.main()
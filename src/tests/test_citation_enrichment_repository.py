@@ -0,0 +1,45 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import repositories.citation_enrichment_repository as repo
+
+
+class TestCitationEnrichmentRepository(unittest.TestCase):
+    @patch("repositories.citation_enrichment_repository.db")
+    def test_get_citations_with_doi(self, mock_db):
+        rows = [SimpleNamespace(id=7, doi="10.1/x", fields={"doi": "10.1/x"}, row_version=2)]
+        mock_db.session.execute.return_value.fetchall.return_value = rows
+
+        self.assertEqual(repo.get_citations_with_doi(5, 100), rows)
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("fields ? 'doi'", str(sql))
+        self.assertIn("ORDER BY id", str(sql))
+        self.assertEqual(params, {"after_id": 5, "limit": 100})
+
+    @patch("repositories.citation_enrichment_repository.fragments")
+    @patch("repositories.citation_enrichment_repository.db")
+    def test_merge_citation_fields(self, mock_db, mock_fragments):
+        mock_db.session.execute.return_value.scalars.return_value.all.return_value = [3]
+
+        updated = repo.merge_citation_fields([(3, 10, {"title": "T"}), (4, 11, {"year": 2020})])
+
+        self.assertEqual(updated, [3])
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("c.fields || p.fields", str(sql))
+        self.assertIn("c.row_version = p.row_version", str(sql))
+        self.assertEqual(params["citation_ids"], [3, 4])
+        self.assertEqual(params["row_versions"], [10, 11])
+        self.assertEqual(json.loads(params["fields"][1]), {"year": 2020})
+        mock_fragments.invalidate.assert_called_once_with([3])
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.citation_enrichment_repository.db")
+    def test_merge_citation_fields_empty(self, mock_db):
+        self.assertEqual(repo.merge_citation_fields([]), [])
+        mock_db.session.execute.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
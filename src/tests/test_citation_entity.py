@@ -93,6 +93,12 @@ class TestCitationEntity(unittest.TestCase):
         out = c.show_category_and_tags()
         self.assertEqual(out, "Categories: No categories | Tags: No tags")
 
+    def test_citation_uses_slots(self):
+        c = Citation(10, "misc", "k10", {})
+        self.assertFalse(hasattr(c, "__dict__"))
+        with self.assertRaises(AttributeError):
+            c.extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,11 +3,15 @@ import unittest
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import app
 import repositories.citation_repository as repo
 from errors import CitationNotFoundError
+from tests.helpers import PlainStatementsTestCase
 
 
-class TestCitationRepository(unittest.TestCase):
+class TestCitationRepository(PlainStatementsTestCase):
     @patch("repositories.citation_repository.db")
     def test_get_citations_returns_citations_list(self, mock_db):
         rows = [
@@ -34,6 +38,74 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(citations[0].citation_key, "k1")
         self.assertEqual(citations[0].fields, {"title": "T1"})
 
+    @patch("repositories.citation_repository.db")
+    def test_citation_reads_aggregate_metadata_once(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_result.fetchone.return_value = SimpleNamespace(
+            id=1, entry_type="book", citation_key="k1", fields={})
+        mock_db.session.execute.return_value = mock_result
+
+        repo.get_citations()
+        repo.get_citation_by_id(1)
+        repo.get_citation_by_key("k1")
+        repo.get_citations_by_ids([1])
+        repo.get_citations_by_keys(["k1"])
+        repo.search_citations({"q": "x"})
+        repo.search_citations_page({})
+
+        for call in mock_db.session.execute.call_args_list:
+            sql = str(call.args[0])
+            self.assertIn("WITH matched AS", sql)
+            self.assertIn("GROUP BY ctt.citation_id", sql)
+            self.assertIn("GROUP BY ctc.citation_id", sql)
+            self.assertNotIn("WHERE ctt2.citation_id = c.id", sql)
+
+    @patch("repositories.citation_repository.db")
+    def test_stream_citations_by_ids_uses_server_side_cursor(self, mock_db):
+        rows = [
+            SimpleNamespace(id=i, entry_type="book",
+                            citation_key=f"k{i}", fields={})
+            for i in range(1, 4)
+        ]
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iter([rows[:2], rows[2:]])
+        mock_db.session.execute.return_value = mock_result
+
+        stream = repo.stream_citations_by_ids([1, 2, 3], batch_size=2)
+        mock_db.session.execute.assert_not_called()
+
+        self.assertEqual([c.id for c in stream], [1, 2, 3])
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertEqual(args[1]["citation_ids"], (1, 2, 3))
+        self.assertEqual(kwargs["execution_options"],
+                         {"stream_results": True, "yield_per": 2})
+
+    @patch("repositories.citation_repository.db")
+    def test_stream_citations_by_keys_empty_input(self, mock_db):
+        self.assertEqual(list(repo.stream_citations_by_keys([])), [])
+        self.assertEqual(list(repo.stream_citations_by_ids(None)), [])
+        mock_db.session.execute.assert_not_called()
+
+    @patch("repositories.citation_repository.db")
+    def test_stream_search_citations_ignores_pagination(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iter([])
+        mock_db.session.execute.return_value = mock_result
+
+        out = list(repo.stream_search_citations(
+            {"q": "x", "per_page": 5, "cursor": repo._encode_cursor("next", [1, 2])}))
+        self.assertEqual(out, [])
+
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("c.search_vector @@", sql)
+        self.assertNotIn("LIMIT", sql)
+        self.assertNotIn(":cursor_0", sql)
+        self.assertEqual(kwargs["execution_options"]["yield_per"],
+                         repo.STREAM_BATCH_SIZE)
+
     @patch("repositories.citation_repository.db")
     def test_get_citations_returns_empty_list(self, mock_db):
         mock_result = MagicMock()
@@ -123,17 +195,15 @@ class TestCitationRepository(unittest.TestCase):
 
     @patch("repositories.citation_repository.db")
     def test_delete_citation_executes_and_commits(self, mock_db):
-        citation_id = 7
-        repo.delete_citation(citation_id)
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            deleted=1, category_ids=[], tag_ids=[])
 
-        self.assertEqual(mock_db.session.execute.call_count, 5)
-
-        args, kwargs = mock_db.session.execute.call_args_list[-1]
-        sql = args[0]
-        params = args[1]
+        repo.delete_citation(7)
 
+        mock_db.session.execute.assert_called_once()
+        sql, params = mock_db.session.execute.call_args[0]
         self.assertIn("DELETE FROM citations", str(sql))
-        self.assertEqual(params["citation_id"], citation_id)
+        self.assertEqual(params["citation_ids"], [7])
         mock_db.session.commit.assert_called_once()
 
     @patch("repositories.citation_repository.db")
@@ -143,52 +213,41 @@ class TestCitationRepository(unittest.TestCase):
         mock_db.session.commit.assert_not_called()
 
     @patch("repositories.citation_repository.db")
-    def test_delete_citation_removes_orphaned_links_and_entities(self, mock_db):
-        citation_id = 42
-
-        mock_select_cat = MagicMock()
-        mock_select_cat.fetchall.return_value = [(1,), (2,)]
-
-        mock_select_tag = MagicMock()
-        mock_select_tag.fetchall.return_value = [(10,)]
-
-        mock_del1 = MagicMock()
-        mock_del2 = MagicMock()
-        mock_del3 = MagicMock()
-        mock_del4 = MagicMock()
-        mock_del5 = MagicMock()
-        mock_del6 = MagicMock()
-
-        mock_db.session.execute.side_effect = [
-            mock_select_cat,
-            mock_select_tag,
-            mock_del1,
-            mock_del2,
-            mock_del3,
-            mock_del4,
-            mock_del5,
-            mock_del6,
-        ]
-
-        repo.delete_citation(citation_id)
-
-        self.assertEqual(mock_db.session.execute.call_count, 8)
-
-        args, kwargs = mock_db.session.execute.call_args_list[4]
-        sql = args[0]
-        params = args[1]
-        self.assertIn("DELETE FROM citations", str(sql))
-        self.assertEqual(params["citation_id"], citation_id)
-
-        cat_delete_args, _ = mock_db.session.execute.call_args_list[5]
-        self.assertIn("DELETE FROM categories", str(cat_delete_args[0]))
-        self.assertIn("NOT EXISTS", str(cat_delete_args[0]))
+    def test_delete_citations_removes_orphaned_categories_and_tags(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            deleted=2, category_ids=[1, 2], tag_ids=[10])
+
+        out = repo.delete_citations([42, 43, 42, None])
+
+        self.assertEqual(out, 2)
+        calls = mock_db.session.execute.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0][0][1], {"citation_ids": [42, 43]})
+
+        cat_sql, cat_params = calls[1][0]
+        self.assertIn("DELETE FROM categories", str(cat_sql))
+        self.assertIn("NOT EXISTS", str(cat_sql))
+        self.assertEqual(cat_params, {"category_ids": [1, 2]})
+
+        tag_sql, tag_params = calls[2][0]
+        self.assertIn("DELETE FROM tags", str(tag_sql))
+        self.assertIn("NOT EXISTS", str(tag_sql))
+        self.assertEqual(tag_params, {"tag_ids": [10]})
+        mock_db.session.commit.assert_called_once()
 
-        tag_delete_args, _ = mock_db.session.execute.call_args_list[7]
-        self.assertIn("DELETE FROM tags", str(tag_delete_args[0]))
-        self.assertIn("NOT EXISTS", str(tag_delete_args[0]))
+    @patch("repositories.citation_repository.db")
+    def test_delete_citations_empty_does_nothing(self, mock_db):
+        self.assertEqual(repo.delete_citations([]), 0)
+        mock_db.session.execute.assert_not_called()
+        mock_db.session.commit.assert_not_called()
 
-        mock_db.session.commit.assert_called_once()
+    @patch("repositories.citation_repository.db")
+    def test_delete_citations_rolls_back_on_error(self, mock_db):
+        mock_db.session.execute.side_effect = SQLAlchemyError("boom")
+        with self.assertRaises(SQLAlchemyError):
+            repo.delete_citations([1])
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
 
     @patch("repositories.citation_repository.db")
     def test_get_citation_returns_citation_object(self, mock_db):
@@ -322,7 +381,7 @@ class TestCitationRepository(unittest.TestCase):
         sql = args[0]
         params = args[1]
 
-        self.assertEqual(params["q"], "%alpha%")
+        self.assertEqual(params["q"], "alpha")
         self.assertEqual(params["citation_key"], "%ck%")
         self.assertEqual(params["entry_type"], "book")
         self.assertEqual(params["author"], "%Bob%")
@@ -331,8 +390,10 @@ class TestCitationRepository(unittest.TestCase):
 
         sql_str = str(sql)
         self.assertIn("WHERE", sql_str)
+        self.assertIn("c.search_vector @@ websearch_to_tsquery", sql_str)
+        self.assertNotIn("c.fields::text ILIKE", sql_str)
         self.assertIn("(c.fields->>'year')::int", sql_str)
-        self.assertIn("ORDER BY (c.fields->>'year')::int DESC", sql_str)
+        self.assertIn("ORDER BY COALESCE((c.fields->>'year')::int, -1) DESC, c.id DESC", sql_str)
 
     @patch("repositories.citation_repository.db")
     def test_search_citations_handles_nonint_years(self, mock_db):
@@ -350,9 +411,74 @@ class TestCitationRepository(unittest.TestCase):
         params = args[1]
 
         self.assertNotIn("year_from", params)
-        self.assertEqual(params.get("q"), "%x%")
+        self.assertEqual(params.get("q"), "x")
         self.assertIn("ORDER BY c.citation_key ASC", str(sql))
 
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_orders_by_rank_without_sort_by(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations({"q": "deep learning"})
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+
+        self.assertEqual(params["q"], "deep learning")
+        self.assertIn("ORDER BY ts_rank_cd(c.search_vector", sql)
+        self.assertIn("DESC, c.id ASC", sql)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_escapes_like_wildcards(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations({"citation_key": "a_b%c", "author": "x"})
+
+        args, _ = mock_db.session.execute.call_args
+        params = args[1]
+
+        self.assertEqual(params["citation_key"], "%a\\_b\\%c%")
+        self.assertEqual(params["author"], "%x%")
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_fuzzy_author_uses_word_similarity(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations({"author": "smoth", "fuzzy_author": True})
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+
+        self.assertEqual(params["author"], "smoth")
+        self.assertIn(":author <% (c.fields->>'author')", sql)
+        self.assertNotIn("ILIKE :author", sql)
+        self.assertIn(
+            "ORDER BY word_similarity(:author, c.fields->>'author') DESC, c.id ASC", sql)
+
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        threshold_args = mock_db.session.execute.call_args_list[0].args
+        self.assertIn("pg_trgm.word_similarity_threshold", str(threshold_args[0]))
+        self.assertEqual(threshold_args[1]["threshold"],
+                         str(repo.FUZZY_AUTHOR_THRESHOLD))
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_fuzzy_flag_ignored_without_author(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations({"fuzzy_author": True})
+
+        args, _ = mock_db.session.execute.call_args
+        self.assertIn("ORDER BY c.id ASC", str(args[0]))
+
     @patch("repositories.citation_repository.db")
     def test_search_citations_handles_missing_q_param(self, mock_db):
         mock_result = MagicMock()
@@ -369,7 +495,7 @@ class TestCitationRepository(unittest.TestCase):
 
         self.assertNotIn("q", params)
         self.assertEqual(params.get("year_from"), 2001)
-        self.assertIn("ORDER BY (c.fields->>'year')::int DESC", str(sql))
+        self.assertIn("ORDER BY COALESCE((c.fields->>'year')::int, -1) DESC, c.id DESC", str(sql))
 
     @patch("repositories.citation_repository.db")
     def test_search_sort_by_citation_key(self, mock_db):
@@ -409,6 +535,162 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(params.get("year_from"), 2001)
         self.assertIn("ORDER BY c.id ASC", str(sql))
 
+    @staticmethod
+    def _page_rows(ids):
+        return [
+            SimpleNamespace(id=i, entry_type="book", citation_key=f"k{i}",
+                            fields={}, sort_key_0=i)
+            for i in ids
+        ]
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_first_page(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = self._page_rows([1, 2, 3])
+        mock_db.session.execute.return_value = mock_result
+
+        citations, next_cursor, prev_cursor = repo.search_citations_page(
+            {"per_page": 2})
+
+        self.assertEqual([c.id for c in citations], [1, 2])
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(prev_cursor)
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+        self.assertEqual(params["limit"], 3)
+        self.assertIn("c.id AS sort_key_0", sql)
+        self.assertIn("ORDER BY c.id ASC", sql)
+        self.assertIn("LIMIT :limit", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_projects_fields(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = self._page_rows([1])
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations_page({"per_page": 2}, field_names=["title", "year"])
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("WHERE f.key = ANY(:field_names)", sql)
+        self.assertIn("NULL::bigint AS row_version", sql)
+        self.assertEqual(args[1]["field_names"], ["title", "year"])
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_by_ids_without_projection_reads_whole_fields(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.get_citations_by_ids([1, 2])
+
+        args, _ = mock_db.session.execute.call_args
+        self.assertNotIn("field_names", str(args[0]))
+        self.assertNotIn("field_names", args[1])
+        self.assertIn("c.row_version", str(args[0]))
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_by_keys_with_empty_projection(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.get_citations_by_keys(["k1"], field_names=[])
+
+        args, _ = mock_db.session.execute.call_args
+        self.assertIn("jsonb_each(c.fields)", str(args[0]))
+        self.assertEqual(args[1]["field_names"], [])
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_follows_next_cursor(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = self._page_rows([3])
+        mock_db.session.execute.return_value = mock_result
+
+        cursor = repo._encode_cursor("next", [2])
+        citations, next_cursor, prev_cursor = repo.search_citations_page(
+            {"per_page": 2, "cursor": cursor})
+
+        self.assertEqual([c.id for c in citations], [3])
+        self.assertIsNone(next_cursor)
+        self.assertIsNotNone(prev_cursor)
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+        self.assertIn("(c.id) > (:cursor_0)", sql)
+        self.assertEqual(params["cursor_0"], 2)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_follows_prev_cursor(self, mock_db):
+        mock_result = MagicMock()
+        # Fetched walking backwards, so rows arrive in reverse order
+        mock_result.fetchall.return_value = self._page_rows([4, 3, 2])
+        mock_db.session.execute.return_value = mock_result
+
+        cursor = repo._encode_cursor("prev", [5])
+        citations, next_cursor, prev_cursor = repo.search_citations_page(
+            {"per_page": 2, "cursor": cursor})
+
+        self.assertEqual([c.id for c in citations], [3, 4])
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNotNone(prev_cursor)
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("(c.id) < (:cursor_0)", sql)
+        self.assertIn("ORDER BY c.id DESC", sql)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_ignores_invalid_cursor(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        cursors = [
+            ({}, "not-a-cursor"),
+            ({}, repo._encode_cursor("next", [1, 2])),
+            ({}, repo._encode_cursor("next", ["1"])),
+            ({}, repo._encode_cursor("next", [True])),
+            ({"sort_by": "year"}, repo._encode_cursor("next", ["2020", 1])),
+            ({"sort_by": "citation_key"}, repo._encode_cursor("next", [5, 1])),
+            ({"q": "x"}, repo._encode_cursor("next", ["high", 1])),
+        ]
+        for queries, cursor in cursors:
+            out = repo.search_citations_page({**queries, "cursor": cursor})
+            self.assertEqual(out, ([], None, None))
+
+            args, _ = mock_db.session.execute.call_args
+            self.assertNotIn(":cursor_0", str(args[0]))
+            self.assertEqual(args[1]["limit"], repo.DEFAULT_PAGE_SIZE + 1)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_mixed_directions_expand_keyset(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        cursor = repo._encode_cursor("next", [0.5, 7])
+        repo.search_citations_page({"q": "graph", "cursor": cursor})
+
+        args, _ = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+        self.assertIn(":cursor_0) OR (", sql)
+        self.assertIn("c.id > :cursor_1", sql)
+        self.assertEqual(params["cursor_0"], 0.5)
+        self.assertEqual(params["cursor_1"], 7)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_page_clamps_per_page(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations_page({"per_page": 10_000})
+
+        args, _ = mock_db.session.execute.call_args
+        self.assertEqual(args[1]["limit"], repo.MAX_PAGE_SIZE + 1)
+
     @patch("repositories.citation_repository.db")
     def test_get_citation_by_id_and_key_return_same_citation(self, mock_db):
         mock_row = SimpleNamespace(
@@ -542,6 +824,24 @@ class TestCitationRepository(unittest.TestCase):
         with self.assertRaises(CitationNotFoundError):
             repo.get_citation_by_id(9999)
 
+    @patch("repositories.citation_repository.db")
+    def test_prepared_reads_by_id_accept_ids_beyond_integer_range(self, mock_db):
+        mock_db.session.connection.return_value.info = {}
+        mock_db.session.execute.return_value.fetchone.return_value = None
+
+        # An integer parameter would fail to bind 3000000000 instead of
+        # finding no row, as the unprepared query does
+        with patch.dict(app.config["DB_POOL"], {"prepared_statements": True}):
+            with self.assertRaises(CitationNotFoundError):
+                repo.get_citation_by_id(3000000000)
+            self.assertIsNone(repo.get_citation_version(3000000000))
+
+        statements = [str(c.args[0]) for c in mock_db.session.execute.call_args_list]
+        self.assertTrue(statements[0].startswith("PREPARE citation_by_id (bigint)"))
+        self.assertTrue(statements[2].startswith("PREPARE citation_version (bigint)"))
+        self.assertEqual(mock_db.session.execute.call_args.args[1],
+                         {"citation_id": 3000000000})
+
     @patch("repositories.citation_repository.db")
     def test_get_citations_by_ids_skips_falsey_rows(self, mock_db):
         # simulate a result list with one falsy row
@@ -555,30 +855,26 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(len(out), 1)
 
     @patch("repositories.citation_repository.db")
-    def test_update_citation_with_metadata_executes_deletes_and_assigns(self, mock_db):
-        # ensure the deletion SQLs are executed and assign functions are called
-        mock_db.session.execute.return_value = MagicMock()
-        with patch("repositories.citation_repository.assign_categories_to_citation") as mock_assign_cats, \
-                patch("repositories.citation_repository.assign_tags_to_citation") as mock_assign_tags:
+    def test_update_citation_with_metadata_syncs_in_one_transaction(self, mock_db):
+        categories = [SimpleNamespace(id=1)]
+        tags = [SimpleNamespace(id=2)]
+        with patch("repositories.citation_repository.sync_citation_metadata") as mock_sync:
             repo.update_citation_with_metadata(
-                50, categories=[SimpleNamespace(id=1)], tags=[SimpleNamespace(id=2)])
+                50, citation_key="k", categories=categories, tags=tags)
 
-        # expected two deletes (categories and tags) executed via db.session.execute
-        self.assertTrue(mock_db.session.execute.called)
-        mock_assign_cats.assert_called_once()
-        mock_assign_tags.assert_called_once()
+        mock_db.session.execute.assert_called_once()
+        self.assertIn("UPDATE citations", str(
+            mock_db.session.execute.call_args[0][0]))
+        mock_sync.assert_called_once_with(50, categories, tags)
+        mock_db.session.commit.assert_called_once()
 
     @patch("repositories.citation_repository.db")
-    def test_delete_citation_handles_empty_cat_tag_lists(self, mock_db):
-        # simulate no cat/tag rows returned -> should still perform deletes and commit
-        mock_select = MagicMock()
-        mock_select.fetchall.return_value = []
-        mock_db.session.execute.return_value = mock_select
-
-        repo.delete_citation(77)
-        # multiple executes called for deletion SQLs and commit
-        self.assertTrue(mock_db.session.execute.called)
-        mock_db.session.commit.assert_called_once()
+    def test_update_citation_with_metadata_rolls_back_on_error(self, mock_db):
+        mock_db.session.execute.side_effect = SQLAlchemyError("boom")
+        with self.assertRaises(SQLAlchemyError):
+            repo.update_citation_with_metadata(50, citation_key="k")
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
 
     @patch("repositories.citation_repository.db")
     def test_search_citations_filters_tags_and_categories(self, mock_db):
@@ -624,42 +920,6 @@ class TestCitationRepository(unittest.TestCase):
         out = repo.get_citations_by_keys(["x", "k4"])
         self.assertEqual(len(out), 1)
 
-    @patch("repositories.citation_repository.db")
-    def test_update_citation_with_metadata_only_categories_or_tags(self, mock_db):
-        # ensure each branch (only categories / only tags) triggers the expected delete+assign
-        mock_db.session.execute.return_value = MagicMock()
-        with patch("repositories.citation_repository.assign_categories_to_citation") as mock_assign_cats:
-            repo.update_citation_with_metadata(
-                60, categories=[SimpleNamespace(id=7)])
-        mock_assign_cats.assert_called_once()
-
-        with patch("repositories.citation_repository.assign_tags_to_citation") as mock_assign_tags:
-            repo.update_citation_with_metadata(
-                61, tags=[SimpleNamespace(id=8)])
-        mock_assign_tags.assert_called_once()
-
-    @patch("repositories.citation_repository.db")
-    def test_delete_citation_multiple_cat_and_tag_ids(self, mock_db):
-        # simulate two category ids and two tag ids returned from initial selects
-        mock_cat = MagicMock()
-        mock_cat.fetchall.return_value = [(1,), (2,)]
-
-        mock_tag = MagicMock()
-        mock_tag.fetchall.return_value = [(10,), (11,)]
-
-        # subsequent deletes return simple mocks
-        mock_del = MagicMock()
-
-        # side_effect sequence: cat_rows, tag_rows, delete ctc, delete ctt, delete citations, delete category 1, delete category 2, delete tag 10, delete tag 11
-        mock_db.session.execute.side_effect = [
-            mock_cat, mock_tag, mock_del, mock_del, mock_del, mock_del, mock_del, mock_del, mock_del]
-
-        repo.delete_citation(123)
-
-        # ensure execute called multiple times and commit invoked
-        self.assertGreaterEqual(mock_db.session.execute.call_count, 9)
-        mock_db.session.commit.assert_called_once()
-
     @patch("repositories.citation_repository.get_citation_by_id")
     def test_validate_citation_raises_when_get_returns_none(self, mock_get):
         # simulate get_citation_by_id returning None so validate_citation raises
@@ -685,14 +945,13 @@ class TestCitationRepository(unittest.TestCase):
         out = repo.get_citations_by_keys(["a", "b"])
         self.assertEqual(out, [])
 
-    @patch("repositories.citation_repository.update_citation")
-    def test_update_citation_with_metadata_passes_entry_type_id(self, mock_update):
-        # ensure that providing an entry_type_id flows into update_citation
+    @patch("repositories.citation_repository.db")
+    def test_update_citation_with_metadata_passes_entry_type_id(self, mock_db):
+        # ensure that providing an entry_type_id flows into the UPDATE
         repo.update_citation_with_metadata(88, entry_type_id=9)
-        mock_update.assert_called_once()
-        called_kwargs = mock_update.call_args[1]
-        self.assertIn("entry_type_id", called_kwargs)
-        self.assertEqual(called_kwargs["entry_type_id"], 9)
+        mock_db.session.execute.assert_called_once()
+        params = mock_db.session.execute.call_args[0][1]
+        self.assertEqual(params["entry_type_id"], 9)
 
     @patch("repositories.citation_repository.get_citation_by_id")
     def test_validate_citation_no_raise_when_present(self, mock_get):
@@ -701,6 +960,94 @@ class TestCitationRepository(unittest.TestCase):
         # should not raise
         repo.validate_citation(1)
 
+    @patch("repositories.citation_repository.link_categories_to_citations")
+    @patch("repositories.citation_repository.link_tags_to_citations")
+    @patch("repositories.citation_repository.upsert_categories")
+    @patch("repositories.citation_repository.upsert_tags")
+    @patch("repositories.citation_repository.db")
+    def test_create_citations_bulk_reports_conflicts(
+            self, mock_db, mock_tags, mock_cats, mock_link_tags, mock_link_cats):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            SimpleNamespace(id=5, citation_key="new"),
+        ]
+        mock_db.session.execute.return_value = mock_result
+        mock_tags.return_value = {"t": SimpleNamespace(id=50)}
+        mock_cats.return_value = {"c": SimpleNamespace(id=60)}
+
+        entries = [
+            {"entry_type_id": 1, "citation_key": "new", "fields": {"title": "T"},
+             "tags": ["t"], "categories": ["c"]},
+            {"entry_type_id": 1, "citation_key": "old", "fields": {}, "tags": ["t"]},
+            {"entry_type_id": 2, "citation_key": "new", "fields": {}},
+        ]
+        created, conflicts = repo.create_citations_bulk(entries)
+
+        self.assertEqual(created, ["new"])
+        self.assertEqual(conflicts, ["old", "new"])
+
+        mock_db.session.execute.assert_called_once()
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("unnest", str(sql))
+        self.assertIn("ON CONFLICT (citation_key) DO NOTHING", str(sql))
+        self.assertEqual(params["citation_keys"], ["new", "old", "new"])
+        self.assertEqual(json.loads(params["fields"][0]), {"title": "T"})
+
+        self.assertEqual(list(mock_tags.call_args[0][0]), ["t"])
+        mock_link_tags.assert_called_once_with([(5, 50)], touch=False)
+        mock_link_cats.assert_called_once_with([(5, 60)], touch=False)
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_create_citations_bulk_rolls_back_on_error(self, mock_db):
+        mock_db.session.execute.side_effect = SQLAlchemyError("boom")
+
+        with self.assertRaises(SQLAlchemyError):
+            repo.create_citations_bulk(
+                [{"entry_type_id": 1, "citation_key": "k", "fields": {}}])
+
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.citation_repository.db")
+    def test_create_citations_bulk_empty(self, mock_db):
+        self.assertEqual(repo.create_citations_bulk([]), ([], []))
+        mock_db.session.execute.assert_not_called()
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citation_version(self, mock_db):
+        row = SimpleNamespace(row_version=3, updated_at="t")
+        mock_db.session.execute.return_value.fetchone.return_value = row
+
+        self.assertIs(repo.get_citation_version(4), row)
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("SELECT row_version, updated_at", str(sql))
+        self.assertEqual(params, {"citation_id": 4})
+
+    @patch("repositories.citation_repository.db")
+    def test_update_citation_bumps_row_and_library_versions(self, mock_db):
+        repo.update_citation(5, citation_key="k")
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("row_version = nextval('cache_versions_seq')", sql)
+        self.assertIn("updated_at = now()", sql)
+        self.assertIn("WHERE name = 'citations'", sql)
+
+    @patch("repositories.citation_repository.fragments")
+    @patch("repositories.citation_repository.db")
+    def test_update_and_delete_invalidate_rendered_fragments(self, mock_db, mock_fragments):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            deleted=1, category_ids=[], tag_ids=[])
+
+        repo.update_citation(3, citation_key="k")
+        mock_fragments.invalidate.assert_called_with([3])
+
+        repo.update_citation_with_metadata(4, citation_key="k")
+        mock_fragments.invalidate.assert_called_with([4])
+
+        repo.delete_citations([5, 6])
+        mock_fragments.invalidate.assert_called_with([5, 6])
+
 
 if __name__ == "__main__":
     unittest.main()
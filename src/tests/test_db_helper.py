@@ -113,6 +113,43 @@ class TestDbHelper(unittest.TestCase):
 
         self.assertFalse(mock_db.session.execute.called)
 
+    @patch("db_helper.invalidate_reference_data")
+    @patch("db_helper.open", create=True)
+    @patch("db_helper.db")
+    def test_init_db_invalidates_reference_data(self, mock_db, mock_open, mock_invalidate):
+        mock_open.return_value.__enter__.return_value.read.return_value = "SELECT 1;"
+
+        with patch.object(db_helper, 'tables', return_value=['entry_types']):
+            with patch.object(db_helper.os.path, 'exists', return_value=True):
+                db_helper.init_db()
+
+        mock_db.session.commit.assert_called_once()
+        mock_invalidate.assert_called_once()
+
+    @patch("db_helper.open", create=True)
+    @patch("db_helper.db")
+    def test_migrate_db_applies_migrations_in_order(self, mock_db, mock_open):
+        mock_open.return_value.__enter__.return_value.read.return_value = "SELECT 1;"
+
+        with patch.object(db_helper.os.path, 'isdir', return_value=True):
+            with patch.object(db_helper.os, 'listdir',
+                              return_value=["002_b.sql", "README", "001_a.sql"]):
+                db_helper.migrate_db()
+
+        opened = [c.args[0] for c in mock_open.call_args_list]
+        self.assertEqual(len(opened), 2)
+        self.assertTrue(opened[0].endswith("001_a.sql"))
+        self.assertTrue(opened[1].endswith("002_b.sql"))
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        self.assertEqual(mock_db.session.commit.call_count, 2)
+
+    @patch("db_helper.db")
+    def test_migrate_db_without_migrations_dir(self, mock_db):
+        with patch.object(db_helper.os.path, 'isdir', return_value=False):
+            db_helper.migrate_db()
+
+        self.assertFalse(mock_db.session.execute.called)
+
     def test_reset_db_raises_on_invalid_identifier(self):
         with patch.object(db_helper, 'tables', return_value=["bad-name"]):
             with patch("db_helper.db"):
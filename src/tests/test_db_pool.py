@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import db_pool
+
+
+class TestPoolSettings(unittest.TestCase):
+    def test_defaults(self):
+        settings = db_pool.pool_settings({})
+        self.assertEqual(settings["pool_size"], 5)
+        self.assertEqual(settings["max_overflow"], 10)
+        self.assertEqual(settings["pool_recycle"], 1800)
+        self.assertTrue(settings["pool_pre_ping"])
+        self.assertEqual(settings["statement_timeout_ms"], 0)
+        self.assertEqual(settings["application_name"], db_pool.DEFAULT_APPLICATION_NAME)
+        self.assertFalse(settings["pgbouncer"])
+        self.assertTrue(settings["prepared_statements"])
+
+    def test_pgbouncer_mode_disables_prepared_statements(self):
+        settings = db_pool.pool_settings({"DB_PGBOUNCER": "true"})
+        self.assertFalse(settings["prepared_statements"])
+
+    def test_reads_environment(self):
+        settings = db_pool.pool_settings({
+            "DB_POOL_SIZE": "20",
+            "DB_MAX_OVERFLOW": "0",
+            "DB_POOL_PRE_PING": "off",
+            "DB_STATEMENT_TIMEOUT_MS": "5000",
+            "DB_APPLICATION_NAME": "worker",
+            "DB_PGBOUNCER": "true",
+        })
+        self.assertEqual(settings["pool_size"], 20)
+        self.assertEqual(settings["max_overflow"], 0)
+        self.assertFalse(settings["pool_pre_ping"])
+        self.assertEqual(settings["statement_timeout_ms"], 5000)
+        self.assertEqual(settings["application_name"], "worker")
+        self.assertTrue(settings["pgbouncer"])
+
+    def test_invalid_values_raise(self):
+        for environ in ({"DB_POOL_SIZE": "many"}, {"DB_POOL_SIZE": "-1"},
+                        {"DB_PGBOUNCER": "maybe"}):
+            with self.subTest(environ=environ):
+                with self.assertRaises(ValueError):
+                    db_pool.pool_settings(environ)
+
+    def test_engine_options_set_statement_timeout_at_startup(self):
+        settings = db_pool.pool_settings({"DB_STATEMENT_TIMEOUT_MS": "250"})
+        options = db_pool.engine_options(settings)
+
+        self.assertIs(options["poolclass"], db_pool.MeteredQueuePool)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(options["connect_args"]["options"], "-c statement_timeout=250")
+        self.assertEqual(options["connect_args"]["application_name"],
+                         db_pool.DEFAULT_APPLICATION_NAME)
+
+    def test_engine_options_in_pgbouncer_mode_send_no_startup_options(self):
+        settings = db_pool.pool_settings(
+            {"DB_STATEMENT_TIMEOUT_MS": "250", "DB_PGBOUNCER": "true"})
+        options = db_pool.engine_options(settings)
+        self.assertNotIn("options", options["connect_args"])
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def setUp(self):
+        db_pool.metrics.reset()
+        self.addCleanup(db_pool.metrics.reset)
+
+    def test_snapshot(self):
+        metrics = db_pool.PoolMetrics()
+        metrics.record_checkout(0.002)
+        metrics.record_checkout(0.004)
+        metrics.record_checkout(0.006, timed_out=True)
+        metrics.record_connect()
+        metrics.record_invalidation()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["checkouts"], 2)
+        self.assertEqual(snapshot["checkout_timeouts"], 1)
+        self.assertAlmostEqual(snapshot["wait_ms_total"], 12.0)
+        self.assertAlmostEqual(snapshot["wait_ms_avg"], 4.0)
+        self.assertAlmostEqual(snapshot["wait_ms_max"], 6.0)
+        self.assertEqual(snapshot["connects"], 1)
+        self.assertEqual(snapshot["invalidations"], 1)
+
+    def test_metered_pool_records_checkouts_and_timeouts(self):
+        pool = db_pool.MeteredQueuePool(
+            MagicMock, pool_size=1, max_overflow=0, timeout=0.01)
+
+        conn = pool.connect()
+        with self.assertRaises(PoolTimeoutError):
+            pool.connect()
+
+        settings = db_pool.pool_settings({"DB_MAX_OVERFLOW": "0"})
+        engine = MagicMock(pool=pool)
+        status = db_pool.pool_status(engine, settings)
+        conn.close()
+
+        self.assertEqual(status["checked_out"], 1)
+        self.assertEqual(status["overflow"], 0)
+        self.assertEqual(status["checkouts"], 1)
+        self.assertEqual(status["checkout_timeouts"], 1)
+        self.assertGreaterEqual(status["wait_ms_max"], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
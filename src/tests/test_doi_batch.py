@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import doi_batch
+import doi_client
+from app import app
+from tests.helpers import UncachedDoiTestCase
+
+RECORDS = {
+    "10.1000/found": {"title": ["Found paper"], "issued": {"date-parts": [[2020]]}},
+    "10.1000/slow": {"title": ["Slow paper"]},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers like the metadata service: CSL-JSON for known DOIs, 404 otherwise."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        server = self.server
+        doi = parse_qs(urlparse(self.path).query)["doi"][0]
+        with server.lock:
+            server.requests.append(doi)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delays.get(doi, 0.02))
+            record = RECORDS.get(doi)
+            body = json.dumps(record or {"message": "not found"}).encode()
+            self.send_response(200 if record else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class StubMetadataServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.lock = threading.Lock()
+        self.delays = {}
+        self.reset()
+
+    def reset(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.delays.clear()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/metadata"
+
+
+class TestRateLimiter(unittest.TestCase):
+    @patch("doi_batch.time.sleep")
+    @patch("doi_batch.time.monotonic", return_value=100.0)
+    def test_spaces_calls_by_the_interval(self, _mock_time, mock_sleep):
+        limiter = doi_batch.RateLimiter(4)
+
+        for _ in range(3):
+            limiter.wait()
+
+        self.assertEqual([c[0][0] for c in mock_sleep.call_args_list], [0.25, 0.5])
+
+
+class TestUniqueDois(unittest.TestCase):
+    def test_deduplicates_case_insensitively_and_reports_invalid_inputs(self):
+        dois, invalid = doi_batch.unique_dois([
+            "10.1000/Found",
+            "https://doi.org/10.1000/found",
+            "not a doi",
+            "  ",
+            "10.1000/other.",
+        ])
+
+        self.assertEqual(dois, [
+            ("10.1000/Found", "10.1000/Found"),
+            ("10.1000/other.", "10.1000/other"),
+        ])
+        self.assertEqual(invalid, ["not a doi"])
+
+
+class TestResolveDois(UncachedDoiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubMetadataServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = patch.dict(doi_client.client.settings, {"url": cls.server.url})
+        cls.url.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.url.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.reset()
+
+    def test_results_for_every_unique_doi(self):
+        results = list(doi_batch.resolve_dois(
+            ["10.1000/found", "10.1000/FOUND", "10.1000/missing", "nope"]))
+
+        by_input = {r["input"]: r for r in results}
+        self.assertEqual(len(results), 3)
+        self.assertEqual(by_input["nope"]["status"], "invalid")
+        self.assertEqual(by_input["10.1000/found"]["status"], "found")
+        self.assertEqual(by_input["10.1000/found"]["fields"],
+                         {"title": "Found paper", "year": 2020})
+        self.assertEqual(by_input["10.1000/missing"]["status"], "not_found")
+        self.assertIsNone(by_input["10.1000/missing"]["fields"])
+        self.assertEqual(sorted(self.server.requests), ["10.1000/found", "10.1000/missing"])
+
+    def test_failed_lookups_are_reported_as_errors(self):
+        with patch.object(doi_client.client.breaker, "allow", return_value=False):
+            results = list(doi_batch.resolve_dois(["10.1000/found"]))
+
+        self.assertEqual(
+            results, [{"input": "10.1000/found", "doi": "10.1000/found",
+                       "status": "error", "fields": None}])
+        self.assertEqual(self.server.requests, [])
+
+    def test_results_stream_in_completion_order(self):
+        self.server.delays["10.1000/slow"] = 0.3
+
+        results = doi_batch.resolve_dois(["10.1000/slow", "10.1000/found", "10.1000/b"])
+
+        self.assertEqual([r["doi"] for r in results][-1], "10.1000/slow")
+
+    def test_concurrency_is_bounded_by_workers(self):
+        self.server.delays.update({f"10.1000/{n}": 0.1 for n in range(6)})
+
+        results = list(doi_batch.resolve_dois([f"10.1000/{n}" for n in range(6)], workers=2))
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.server.max_active, 2)
+
+    def test_stopping_early_cancels_pending_lookups(self):
+        self.server.delays.update({f"10.1000/{n}": 0.1 for n in range(5)})
+
+        results = doi_batch.resolve_dois([f"10.1000/{n}" for n in range(5)], workers=1)
+        next(results)
+        results.close()
+        time.sleep(0.3)
+
+        self.assertLess(len(self.server.requests), 5)
+
+
+@patch.dict(app.config, {"SECRET_KEY": "test"})
+class TestDoiLookupBatchRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def _post(self, **kwargs):
+        with patch("doi_batch.util.lookup_doi") as mock_lookup:
+            mock_lookup.side_effect = (
+                lambda doi: ("found", {"title": doi}) if "found" in doi else ("not_found", None))
+            response = self.client.post("/doi_lookup/batch", **kwargs)
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        return response, lines
+
+    def test_streams_json_lines(self):
+        response, lines = self._post(json={"dois": ["10.1000/found", "10.1000/gone"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(
+            sorted((line["doi"], line["status"]) for line in lines),
+            [("10.1000/found", "found"), ("10.1000/gone", "not_found")],
+        )
+
+    def test_accepts_form_lines(self):
+        response, lines = self._post(data={"dois": "10.1000/found\n\n10.1000/found2\n"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(lines), 2)
+
+    def test_requires_dois(self):
+        for kwargs in ({"json": {"dois": []}}, {"json": {"dois": "10.1000/x"}},
+                       {"json": ["10.1000/x"]}, {"json": "10.1000/x"}, {"data": {}}):
+            with self.subTest(kwargs=kwargs):
+                response = self.client.post("/doi_lookup/batch", **kwargs)
+                self.assertEqual(response.status_code, 400)
+
+    def test_rejects_too_many_dois(self):
+        with patch("doi_batch.MAX_BATCH_DOIS", 1):
+            response = self.client.post(
+                "/doi_lookup/batch", json={"dois": ["10.1000/a", "10.1000/b"]})
+
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
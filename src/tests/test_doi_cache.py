@@ -0,0 +1,101 @@
+import unittest
+
+import doi_cache
+from doi_cache import CachedDoi, DoiCacheStats, DoiLru
+
+
+class TestDoiCacheSettings(unittest.TestCase):
+    def test_defaults(self):
+        settings = doi_cache.doi_cache_settings({})
+
+        self.assertEqual(settings, {
+            "enabled": True,
+            "ttl": 30 * 24 * 3600,
+            "negative_ttl": 24 * 3600,
+            "size": doi_cache.DEFAULT_MEMORY_SIZE,
+        })
+
+    def test_reads_environment(self):
+        settings = doi_cache.doi_cache_settings({
+            "DOI_CACHE": "false",
+            "DOI_CACHE_TTL": "60",
+            "DOI_NEGATIVE_TTL": "5",
+            "DOI_CACHE_SIZE": "10",
+        })
+
+        self.assertFalse(settings["enabled"])
+        self.assertEqual(settings["ttl"], 60)
+        self.assertEqual(settings["negative_ttl"], 5)
+        self.assertEqual(settings["size"], 10)
+
+    def test_invalid_ttl_is_rejected(self):
+        with self.assertRaises(ValueError):
+            doi_cache.doi_cache_settings({"DOI_CACHE_TTL": "soon"})
+
+    def test_ttl_depends_on_status(self):
+        settings = {"ttl": 100, "negative_ttl": 10}
+
+        self.assertEqual(doi_cache.ttl_of(doi_cache.FOUND, settings), 100)
+        self.assertEqual(doi_cache.ttl_of(doi_cache.NOT_FOUND, settings), 10)
+
+    def test_normalize_doi_is_case_insensitive(self):
+        self.assertEqual(doi_cache.normalize_doi(" 10.1038/NATURE14539 "), "10.1038/nature14539")
+
+
+class TestDoiLru(unittest.TestCase):
+    def test_get_returns_unexpired_entries(self):
+        lru = DoiLru(2)
+        entry = CachedDoi(doi_cache.FOUND, {"title": "T"}, expires_at=100)
+        lru.put("10.1/a", entry)
+
+        self.assertEqual(lru.get("10.1/a", now=99), entry)
+        self.assertIsNone(lru.get("10.1/a", now=100))
+        self.assertEqual(len(lru), 0)
+
+    def test_evicts_least_recently_used(self):
+        lru = DoiLru(2)
+        for doi in ("a", "b"):
+            lru.put(doi, CachedDoi(doi_cache.NOT_FOUND, None, expires_at=100))
+        lru.get("a", now=0)
+        lru.put("c", CachedDoi(doi_cache.NOT_FOUND, None, expires_at=100))
+
+        self.assertIsNotNone(lru.get("a", now=0))
+        self.assertIsNone(lru.get("b", now=0))
+        self.assertIsNotNone(lru.get("c", now=0))
+
+    def test_clear(self):
+        lru = DoiLru(2)
+        lru.put("a", CachedDoi(doi_cache.FOUND, {}, expires_at=100))
+        lru.clear()
+
+        self.assertEqual(len(lru), 0)
+
+
+class TestDoiCacheStats(unittest.TestCase):
+    def test_snapshot_counts_hits_and_misses(self):
+        stats = DoiCacheStats()
+        stats.record("memory_hits")
+        stats.record("db_hits", negative=True)
+        stats.record("misses")
+        stats.record("stores")
+
+        snapshot = stats.snapshot()
+
+        self.assertEqual(snapshot["memory_hits"], 1)
+        self.assertEqual(snapshot["db_hits"], 1)
+        self.assertEqual(snapshot["negative_hits"], 1)
+        self.assertEqual(snapshot["misses"], 1)
+        self.assertEqual(snapshot["stores"], 1)
+        self.assertEqual(snapshot["hit_ratio"], 0.667)
+
+    def test_reset(self):
+        stats = DoiCacheStats()
+        stats.record("misses")
+        stats.reset()
+
+        self.assertEqual(stats.snapshot()["misses"], 0)
+        self.assertEqual(stats.snapshot()["hit_ratio"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
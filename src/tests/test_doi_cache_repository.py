@@ -0,0 +1,162 @@
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from sqlalchemy.exc import OperationalError
+
+import doi_cache
+import repositories.doi_cache_repository as repo
+from config import app
+from doi_cache import ERROR, FOUND, NOT_FOUND, CachedDoi
+from tests.helpers import PlainStatementsTestCase
+
+SETTINGS = {"enabled": True, "ttl": 1000, "negative_ttl": 10, "size": 16}
+
+
+class TestDoiCacheTable(PlainStatementsTestCase):
+    @patch("repositories.doi_cache_repository.db")
+    def test_get_cached_doi_applies_the_ttl_of_the_status(self, mock_db):
+        now = time.time()
+        rows = [
+            (Mock(status=FOUND, fields={"title": "T"}, fetched_at=now - 500), now + 500),
+            (Mock(status=NOT_FOUND, fields=None, fetched_at=now - 500), now - 490),
+        ]
+        for row, expires_at in rows:
+            with self.subTest(status=row.status):
+                mock_db.session.execute.return_value.fetchone.return_value = row
+                entry = repo.get_cached_doi("10.1/x", SETTINGS)
+                self.assertEqual(entry.fields, row.fields)
+                self.assertAlmostEqual(entry.expires_at, expires_at)
+
+        _, params = mock_db.session.execute.call_args[0]
+        self.assertEqual(params, {"doi": "10.1/x"})
+
+    @patch("repositories.doi_cache_repository.db")
+    def test_get_cached_doi_missing(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = None
+
+        self.assertIsNone(repo.get_cached_doi("10.1/x", SETTINGS))
+
+    @patch("repositories.doi_cache_repository.db")
+    def test_store_cached_doi_upserts_and_commits(self, mock_db):
+        repo.store_cached_doi("10.1/x", FOUND, {"title": "T"})
+        repo.store_cached_doi("10.1/y", NOT_FOUND, None)
+
+        (sql, found), (_, missing) = [c[0] for c in mock_db.session.execute.call_args_list]
+        self.assertIn("ON CONFLICT (doi) DO UPDATE", str(sql))
+        self.assertEqual(found, {"doi": "10.1/x", "status": FOUND, "fields": '{"title":"T"}'})
+        self.assertEqual(missing, {"doi": "10.1/y", "status": NOT_FOUND, "fields": None})
+        self.assertEqual(mock_db.session.commit.call_count, 2)
+
+
+@patch.dict(app.config["DOI_CACHE"], SETTINGS)
+@patch("repositories.doi_cache_repository.store_cached_doi")
+@patch("repositories.doi_cache_repository.get_cached_doi")
+class TestCachedDoiLookup(PlainStatementsTestCase):
+    def setUp(self):
+        doi_cache.memory.clear()
+        doi_cache.stats.reset()
+        self.resolve = Mock(return_value=(FOUND, {"title": "T"}))
+
+    def tearDown(self):
+        doi_cache.memory.clear()
+        doi_cache.stats.reset()
+
+    def test_miss_resolves_and_stores(self, mock_get, mock_store):
+        mock_get.return_value = None
+
+        result = repo.cached_doi_lookup("10.1/ABC", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "T"}))
+        self.resolve.assert_called_once_with("10.1/ABC")
+        mock_get.assert_called_once_with("10.1/abc", SETTINGS)
+        mock_store.assert_called_once_with("10.1/abc", FOUND, {"title": "T"})
+        self.assertEqual(doi_cache.stats.snapshot()["misses"], 1)
+        self.assertEqual(doi_cache.stats.snapshot()["stores"], 1)
+
+    def test_repeat_lookup_is_served_from_memory(self, mock_get, mock_store):
+        mock_get.return_value = None
+
+        repo.cached_doi_lookup("10.1/abc", self.resolve)
+        result = repo.cached_doi_lookup("10.1/ABC", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "T"}))
+        self.resolve.assert_called_once()
+        mock_get.assert_called_once()
+        mock_store.assert_called_once()
+        self.assertEqual(doi_cache.stats.snapshot()["memory_hits"], 1)
+
+    def test_table_hit_skips_resolving(self, mock_get, mock_store):
+        mock_get.return_value = CachedDoi(FOUND, {"title": "Stored"}, time.time() + 100)
+
+        result = repo.cached_doi_lookup("10.1/abc", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "Stored"}))
+        self.resolve.assert_not_called()
+        mock_store.assert_not_called()
+        self.assertEqual(len(doi_cache.memory), 1)
+        self.assertEqual(doi_cache.stats.snapshot()["db_hits"], 1)
+
+    def test_not_found_is_cached(self, mock_get, mock_store):
+        mock_get.return_value = None
+        self.resolve.return_value = (NOT_FOUND, None)
+
+        self.assertEqual(repo.cached_doi_lookup("10.1/gone", self.resolve), (NOT_FOUND, None))
+        self.assertEqual(repo.cached_doi_lookup("10.1/gone", self.resolve), (NOT_FOUND, None))
+
+        self.resolve.assert_called_once()
+        mock_store.assert_called_once_with("10.1/gone", NOT_FOUND, None)
+        self.assertEqual(doi_cache.stats.snapshot()["negative_hits"], 1)
+
+    def test_errors_are_not_cached(self, mock_get, mock_store):
+        mock_get.return_value = None
+        self.resolve.return_value = (ERROR, None)
+
+        self.assertEqual(repo.cached_doi_lookup("10.1/flaky", self.resolve), (ERROR, None))
+        self.assertEqual(repo.cached_doi_lookup("10.1/flaky", self.resolve), (ERROR, None))
+
+        self.assertEqual(self.resolve.call_count, 2)
+        mock_store.assert_not_called()
+        self.assertEqual(len(doi_cache.memory), 0)
+
+    def test_expired_entry_is_refreshed(self, mock_get, mock_store):
+        mock_get.return_value = CachedDoi(FOUND, {"title": "Old"}, time.time() - 1)
+
+        result = repo.cached_doi_lookup("10.1/abc", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "T"}))
+        mock_store.assert_called_once_with("10.1/abc", FOUND, {"title": "T"})
+
+    def test_expired_entry_is_served_when_resolving_fails(self, mock_get, mock_store):
+        mock_get.return_value = CachedDoi(FOUND, {"title": "Old"}, time.time() - 1)
+        self.resolve.return_value = (ERROR, None)
+
+        result = repo.cached_doi_lookup("10.1/abc", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "Old"}))
+        mock_store.assert_not_called()
+        self.assertEqual(doi_cache.stats.snapshot()["stale_hits"], 1)
+
+    @patch("repositories.doi_cache_repository.db")
+    def test_database_errors_do_not_fail_the_lookup(self, mock_db, mock_get, mock_store):
+        mock_get.side_effect = OperationalError("SELECT", {}, Exception("down"))
+        mock_store.side_effect = OperationalError("INSERT", {}, Exception("down"))
+
+        result = repo.cached_doi_lookup("10.1/abc", self.resolve)
+
+        self.assertEqual(result, (FOUND, {"title": "T"}))
+        self.assertEqual(mock_db.session.rollback.call_count, 2)
+        self.assertEqual(doi_cache.stats.snapshot()["errors"], 2)
+
+    def test_disabled_cache_always_resolves(self, mock_get, mock_store):
+        with patch.dict(app.config["DOI_CACHE"], {"enabled": False}):
+            repo.cached_doi_lookup("10.1/abc", self.resolve)
+            repo.cached_doi_lookup("10.1/abc", self.resolve)
+
+        self.assertEqual(self.resolve.call_count, 2)
+        mock_get.assert_not_called()
+        mock_store.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
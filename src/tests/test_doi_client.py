@@ -0,0 +1,209 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+import doi_client
+from doi_client import CircuitBreaker, CircuitOpenError, DoiClient
+
+SETTINGS = {
+    **doi_client.doi_client_settings({}),
+    "retries": 2,
+    "backoff_ms": 100,
+    "breaker_threshold": 2,
+    "breaker_reset_seconds": 30,
+}
+
+
+def _response(status_code, body=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or {}).encode()  # pylint: disable=protected-access
+    return response
+
+
+class TestDoiClientSettings(unittest.TestCase):
+    def test_defaults(self):
+        settings = doi_client.doi_client_settings({})
+
+        self.assertEqual(settings["url"], doi_client.DEFAULT_METADATA_URL)
+        self.assertEqual(settings["pool_size"], 10)
+        self.assertEqual(settings["read_timeout_ms"], 5000)
+        self.assertEqual(settings["retries"], 2)
+        self.assertEqual(settings["breaker_threshold"], 5)
+        self.assertEqual(settings["offline"], doi_client.OFFLINE_OFF)
+
+    def test_reads_environment(self):
+        settings = doi_client.doi_client_settings({
+            "DOI_METADATA_URL": "http://localhost:9000/metadata",
+            "DOI_HTTP_POOL_SIZE": "0",
+            "DOI_HTTP_RETRIES": "0",
+            "DOI_BREAKER_THRESHOLD": "3",
+            "DOI_OFFLINE": "Only",
+        })
+
+        self.assertEqual(settings["url"], "http://localhost:9000/metadata")
+        self.assertEqual(settings["pool_size"], 1)
+        self.assertEqual(settings["retries"], 0)
+        self.assertEqual(settings["breaker_threshold"], 3)
+        self.assertEqual(settings["offline"], doi_client.OFFLINE_ONLY)
+
+    def test_rejects_unknown_offline_mode(self):
+        with self.assertRaises(ValueError):
+            doi_client.doi_client_settings({"DOI_OFFLINE": "sometimes"})
+
+
+@patch("doi_client.time.monotonic")
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(threshold=2, reset_seconds=30)
+
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets_the_count(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(threshold=2, reset_seconds=30)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_lets_one_trial_through_after_the_reset_period(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(threshold=1, reset_seconds=30)
+        breaker.record_failure()
+
+        mock_time.return_value = 130
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_trial_opens_again(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(threshold=3, reset_seconds=30)
+        for _ in range(3):
+            breaker.record_failure()
+
+        mock_time.return_value = 130
+        breaker.allow()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        mock_time.return_value = 159
+        self.assertFalse(breaker.allow())
+
+    def test_threshold_zero_never_opens(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(threshold=0, reset_seconds=30)
+        for _ in range(10):
+            breaker.record_failure()
+
+        self.assertTrue(breaker.allow())
+
+
+@patch("doi_client.time.sleep")
+class TestDoiClient(unittest.TestCase):
+    def setUp(self):
+        self.client = DoiClient(SETTINGS)
+        self.client.session.get = Mock()
+        doi_client.metrics.reset()
+
+    def tearDown(self):
+        doi_client.metrics.reset()
+
+    def test_returns_decoded_record(self, mock_sleep):
+        self.client.session.get.return_value = _response(200, {"title": "T"})
+
+        self.assertEqual(self.client.get_json("10.1/x"), {"title": "T"})
+        args, kwargs = self.client.session.get.call_args
+        self.assertEqual(args, (SETTINGS["url"],))
+        self.assertEqual(kwargs["params"], {"doi": "10.1/x"})
+        self.assertEqual(kwargs["timeout"], (2.0, 5.0))
+        mock_sleep.assert_not_called()
+
+    def test_session_keeps_connections_alive_per_host(self, _mock_sleep):
+        client = DoiClient(SETTINGS)
+        adapter = client.session.get_adapter(SETTINGS["url"])
+
+        self.assertEqual(adapter._pool_maxsize, 10)  # pylint: disable=protected-access
+        self.assertTrue(adapter._pool_block)  # pylint: disable=protected-access
+        self.assertIn("csl+json", client.session.headers["Accept"])
+
+    def test_retries_server_errors_with_growing_jittered_backoff(self, mock_sleep):
+        self.client.session.get.side_effect = [
+            _response(503), requests.ReadTimeout("slow"), _response(200, {"title": "T"})]
+
+        self.assertEqual(self.client.get_json("10.1/x"), {"title": "T"})
+
+        first, second = [c[0][0] for c in mock_sleep.call_args_list]
+        self.assertTrue(0.05 <= first <= 0.1)
+        self.assertTrue(0.1 <= second <= 0.2)
+        snapshot = doi_client.metrics.snapshot()
+        self.assertEqual(snapshot["requests"], 3)
+        self.assertEqual(snapshot["retries"], 2)
+        self.assertEqual(snapshot["server_errors"], 1)
+        self.assertEqual(snapshot["timeouts"], 1)
+
+    def test_not_found_is_not_retried(self, mock_sleep):
+        self.client.session.get.return_value = _response(404)
+
+        with self.assertRaises(requests.HTTPError) as cm:
+            self.client.get_json("10.1/x")
+
+        self.assertEqual(cm.exception.response.status_code, 404)
+        self.assertEqual(self.client.session.get.call_count, 1)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+        mock_sleep.assert_not_called()
+
+    def test_raises_last_error_when_retries_run_out(self, _mock_sleep):
+        self.client.session.get.side_effect = requests.ConnectionError("refused")
+
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get_json("10.1/x")
+
+        self.assertEqual(self.client.session.get.call_count, 3)
+        self.assertEqual(self.client.breaker.failures, 1)
+        self.assertEqual(doi_client.metrics.snapshot()["connection_errors"], 3)
+
+    def test_open_breaker_fails_fast(self, _mock_sleep):
+        self.client.session.get.side_effect = requests.ConnectionError("refused")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get_json("10.1/x")
+        self.client.session.get.reset_mock()
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get_json("10.1/x")
+
+        self.client.session.get.assert_not_called()
+        status = self.client.status()
+        self.assertEqual(status["breaker"], CircuitBreaker.OPEN)
+        self.assertEqual(status["short_circuits"], 1)
+
+    def test_latency_metrics(self, _mock_sleep):
+        self.client.session.get.return_value = _response(200)
+        for _ in range(3):
+            self.client.get_json("10.1/x")
+
+        snapshot = doi_client.metrics.snapshot()
+
+        self.assertEqual(snapshot["requests"], 3)
+        for name in ("latency_ms_avg", "latency_ms_max", "latency_ms_p50", "latency_ms_p95"):
+            self.assertGreaterEqual(snapshot[name], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
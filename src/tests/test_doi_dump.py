@@ -0,0 +1,76 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+import doi_dump
+
+RECORDS = [
+    {"DOI": "10.1000/one", "title": ["One"], "issued": {"date-parts": [[2020]]}},
+    {"DOI": "10.1000/two", "title": "Two", "container-title": ["Journal"]},
+    {"DOI": "10.1000/bare"},
+    {"title": ["No DOI"]},
+]
+
+
+def _dump(*lines):
+    return io.StringIO("".join(line + "\n" for line in lines))
+
+
+class TestReadDump(unittest.TestCase):
+    def test_yields_fields_and_skipped_lines(self):
+        stream = _dump(*(json.dumps(r) for r in RECORDS), "", "{broken", "[1]")
+
+        results = list(doi_dump.read_dump(stream))
+
+        self.assertEqual(results, [
+            (1, "10.1000/one", {"title": "One", "year": 2020}),
+            (2, "10.1000/two", {"title": "Two", "journaltitle": "Journal"}),
+            (3, None, "No usable metadata for 10.1000/bare"),
+            (4, None, "No DOI"),
+            (6, None, "Malformed JSON"),
+            (7, None, "Not a JSON object"),
+        ])
+
+    def test_reads_lazily(self):
+        lines = iter([json.dumps(RECORDS[0]) + "\n", "never read\n"])
+
+        first = next(doi_dump.read_dump(lines))
+
+        self.assertEqual(first[1], "10.1000/one")
+        self.assertEqual(next(lines), "never read\n")
+
+
+@patch("doi_dump.db")
+@patch("doi_dump.store_dump_fields", side_effect=len)
+class TestImportDump(unittest.TestCase):
+    def test_commits_each_batch(self, mock_store, mock_db):
+        stream = _dump(*(json.dumps({"DOI": f"10.1000/{n}", "title": "T"}) for n in range(5)),
+                       "{broken")
+        progress, skipped, sizes = [], [], []
+        mock_store.side_effect = lambda batch: sizes.append(len(batch)) or len(batch)
+
+        report = doi_dump.import_dump(
+            stream, batch_size=2, progress=lambda r: progress.append(dict(r)),
+            on_skip=lambda line, message: skipped.append(line))
+
+        self.assertEqual(report, {"imported": 5, "skipped": 1})
+        self.assertEqual(sizes, [2, 2, 1])
+        self.assertEqual(mock_db.session.commit.call_count, 3)
+        self.assertEqual([p["imported"] for p in progress], [2, 4, 5])
+        self.assertEqual(skipped, [6])
+
+    def test_database_error_rolls_back_and_stops(self, mock_store, mock_db):
+        mock_store.side_effect = OperationalError("INSERT", {}, Exception("down"))
+
+        with self.assertRaises(OperationalError):
+            doi_dump.import_dump(_dump(json.dumps(RECORDS[0])))
+
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
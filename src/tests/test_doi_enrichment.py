@@ -0,0 +1,112 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+import doi_enrichment
+from doi_enrichment import JOB_NAME
+
+
+def _row(citation_id, doi, fields=None, row_version=1):
+    return SimpleNamespace(
+        id=citation_id, doi=doi, fields={"doi": doi, **(fields or {})}, row_version=row_version)
+
+
+def _results(values, workers, rate):  # pylint: disable=unused-argument
+    for value in values:
+        doi = value.replace("https://doi.org/", "")
+        found = "found" in doi.lower()
+        yield {
+            "input": value,
+            "doi": doi,
+            "status": "found" if found else "not_found",
+            "fields": {"title": f"Title of {doi}", "year": 2020} if found else None,
+        }
+
+
+class TestMissingFields(unittest.TestCase):
+    def test_keeps_only_fields_that_are_missing_or_blank(self):
+        fields = {"title": "Mine", "journal": "  ", "year": ""}
+        fetched = {"title": "Theirs", "journal": "J", "year": 2020, "publisher": None}
+
+        self.assertEqual(doi_enrichment.missing_fields(fields, fetched),
+                         {"journal": "J", "year": 2020})
+
+
+@patch("doi_enrichment.resolve_dois", side_effect=_results)
+class TestEnrichBatch(unittest.TestCase):
+    def test_patches_citations_whose_doi_was_found(self, mock_resolve):
+        rows = [
+            _row(1, "10.1000/found-a", {"title": "Kept"}),
+            _row(2, "https://doi.org/10.1000/FOUND-b"),
+            _row(3, "10.1000/gone"),
+            _row(4, "not a doi"),
+        ]
+
+        patches = doi_enrichment.enrich_batch(rows, workers=2, rate=3)
+
+        self.assertEqual(patches, [
+            (1, 1, {"year": 2020}),
+            (2, 1, {"title": "Title of 10.1000/FOUND-b", "year": 2020}),
+        ])
+        values, workers, rate = mock_resolve.call_args[0]
+        self.assertEqual(len(values), 4)
+        self.assertEqual((workers, rate), (2, 3))
+
+
+@patch("doi_enrichment.resolve_dois", side_effect=_results)
+@patch("doi_enrichment.db")
+@patch("doi_enrichment.save_checkpoint")
+@patch("doi_enrichment.get_checkpoint")
+@patch("doi_enrichment.merge_citation_fields")
+@patch("doi_enrichment.get_citations_with_doi")
+class TestRunEnrichment(unittest.TestCase):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def test_resumes_from_checkpoint_and_commits_each_batch(
+            self, mock_get, mock_merge, mock_checkpoint, mock_save, mock_db, _mock_resolve):
+        mock_checkpoint.return_value = 10
+        mock_get.side_effect = [
+            [_row(11, "10.1000/found-a"), _row(12, "10.1000/gone")],
+            [_row(15, "10.1000/found-b")],
+            [],
+        ]
+        mock_merge.side_effect = lambda patches: [p[0] for p in patches]
+        progress = []
+
+        report = doi_enrichment.run_enrichment(
+            batch_size=2, rate=None, progress=lambda r: progress.append(dict(r)))
+
+        self.assertEqual(report, {"scanned": 3, "updated": 2, "position": 15})
+        self.assertEqual([c[0] for c in mock_get.call_args_list], [(10, 2), (12, 2), (15, 2)])
+        self.assertEqual([c[0] for c in mock_save.call_args_list],
+                         [(JOB_NAME, 12), (JOB_NAME, 15)])
+        self.assertEqual(mock_db.session.commit.call_count, 2)
+        self.assertEqual([p["position"] for p in progress], [12, 15])
+
+    def test_stops_at_limit(self, mock_get, mock_merge, mock_checkpoint, _save, _db, _resolve):
+        mock_checkpoint.return_value = None
+        mock_get.return_value = [_row(1, "10.1000/found-a")]
+        mock_merge.return_value = [1]
+
+        report = doi_enrichment.run_enrichment(batch_size=5, rate=None, limit=3)
+
+        self.assertEqual(report["scanned"], 3)
+        self.assertEqual([c[0] for c in mock_get.call_args_list], [(0, 3), (1, 2), (1, 1)])
+
+    def test_failed_batch_keeps_the_checkpoint(
+            self, mock_get, mock_merge, mock_checkpoint, mock_save, mock_db, _mock_resolve):
+        mock_checkpoint.return_value = 10
+        mock_get.return_value = [_row(11, "10.1000/found-a")]
+        mock_merge.side_effect = OperationalError("UPDATE", {}, Exception("down"))
+
+        with self.assertRaises(OperationalError):
+            doi_enrichment.run_enrichment(rate=None)
+
+        mock_save.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+        self.assertEqual(mock_db.session.rollback.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+import repositories.doi_metadata_repository as repo
+from tests.helpers import PlainStatementsTestCase
+
+
+@patch("repositories.doi_metadata_repository.db")
+class TestDoiMetadataRepository(PlainStatementsTestCase):
+    def test_get_dump_fields_looks_up_the_normalized_doi(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = {"title": "T"}
+
+        self.assertEqual(repo.get_dump_fields("10.1000/ABC"), {"title": "T"})
+        _, params = mock_db.session.execute.call_args[0]
+        self.assertEqual(params, {"doi": "10.1000/abc"})
+
+    def test_store_dump_fields_upserts_without_committing(self, mock_db):
+        count = repo.store_dump_fields([
+            ("10.1000/A", {"title": "Old"}),
+            ("10.1000/b", {"title": "B"}),
+            ("10.1000/a", {"title": "New"}),
+        ])
+
+        self.assertEqual(count, 2)
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("ON CONFLICT (doi) DO UPDATE", str(sql))
+        self.assertEqual(params["dois"], ["10.1000/a", "10.1000/b"])
+        self.assertEqual(json.loads(params["fields"][0]), {"title": "New"})
+        mock_db.session.commit.assert_not_called()
+
+    def test_store_dump_fields_empty(self, mock_db):
+        self.assertEqual(repo.store_dump_fields([]), 0)
+        mock_db.session.execute.assert_not_called()
+
+    def test_offline_doi_lookup(self, mock_db):
+        for fields, expected in (({"title": "T"}, (True, {"title": "T"})), (None, (False, None))):
+            with self.subTest(fields=fields):
+                mock_db.session.execute.return_value.scalar.return_value = fields
+                self.assertEqual(repo.offline_doi_lookup("10.1000/x"), expected)
+
+    def test_offline_doi_lookup_treats_database_errors_as_misses(self, mock_db):
+        mock_db.session.execute.side_effect = OperationalError("SELECT", {}, Exception("down"))
+
+        self.assertEqual(repo.offline_doi_lookup("10.1000/x"), (False, None))
+        mock_db.session.rollback.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
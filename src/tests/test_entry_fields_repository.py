@@ -1,68 +1,60 @@
 import unittest
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import repositories.entry_fields_repository as repo
+from tests.helpers import ReferenceDataTestCase, results
 
 
-class TestEntryFieldsRepository(unittest.TestCase):
-    @patch("repositories.entry_fields_repository.db")
+ENTRY_TYPES = [SimpleNamespace(id=1, name="article")]
+
+
+@patch("repositories.reference_data.db")
+class TestEntryFieldsRepository(ReferenceDataTestCase):
     def test_get_entry_fields_returns_list(self, mock_db):
-        rows = [SimpleNamespace(name="author"), SimpleNamespace(name="title")]
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = rows
-        mock_db.session.execute.return_value = mock_result
+        links = [
+            SimpleNamespace(entry_type_id=1, name="author"),
+            SimpleNamespace(entry_type_id=2, name="publisher"),
+            SimpleNamespace(entry_type_id=1, name="title"),
+        ]
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], links)
 
         fields = repo.get_entry_fields(1)
         self.assertEqual(fields, ["author", "title"])
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
+        sql = mock_db.session.execute.call_args_list[2][0][0]
         self.assertIn("default_entry_fields", str(sql))
-        self.assertEqual(params["entry_type_id"], 1)
 
-    @patch("repositories.entry_fields_repository.db")
     def test_get_entry_fields_empty(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = []
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         fields = repo.get_entry_fields(999)
         self.assertEqual(fields, [])
 
-    @patch("repositories.entry_fields_repository.db")
-    def test_get_default_fields_returns_list(self, mock_db):
-        rows = [type('R', (), {'name': 'abstract'})(),
-                type('R', (), {'name': 'title'})()]
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = rows
-        mock_db.session.execute.return_value = mock_result
+    def test_get_entry_fields_returns_a_copy(self, mock_db):
+        links = [SimpleNamespace(entry_type_id=1, name="author")]
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], links)
 
-        fields = repo.get_default_fields()
-        self.assertEqual(fields, ['abstract', 'title'])
+        repo.get_entry_fields(1).append("changed")
+        self.assertEqual(repo.get_entry_fields(1), ["author"])
 
-    @patch("repositories.entry_fields_repository.db")
     def test_get_default_fields_empty_via_db_mock(self, mock_db):
         # simulate empty result
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = []
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         fields = repo.get_default_fields()
         self.assertEqual(fields, [])
 
-    @patch("repositories.entry_fields_repository.db")
     def test_get_default_fields_nonempty_via_db_mock(self, mock_db):
         # simulate rows with .name attributes
         rows = [SimpleNamespace(name='author'), SimpleNamespace(
             name='title'), SimpleNamespace(name='year')]
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = rows
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, rows, [])
 
         fields = repo.get_default_fields()
         self.assertEqual(fields, ['author', 'title', 'year'])
+        self.assertIn("FROM default_fields", str(
+            mock_db.session.execute.call_args_list[1][0][0]))
 
 
 if __name__ == "__main__":
@@ -14,6 +14,9 @@ class TestEntryTypeEntity(unittest.TestCase):
         r = repr(et)
         self.assertIn("conference", r)
 
+    def test_entry_type_uses_slots(self):
+        self.assertFalse(hasattr(EntryType(1, "misc"), "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,47 +1,66 @@
 import unittest
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import repositories.entry_type_repository as repo
+from tests.helpers import ReferenceDataTestCase, results
 
 
-class TestEntryTypeRepository(unittest.TestCase):
-    @patch("repositories.entry_type_repository.db")
-    def test_get_entry_types_returns_list(self, mock_db):
-        rows = [
-            SimpleNamespace(id=1, name="article"),
-            SimpleNamespace(id=2, name="book"),
-        ]
+ENTRY_TYPES = [
+    SimpleNamespace(id=1, name="article"),
+    SimpleNamespace(id=2, name="book"),
+    SimpleNamespace(id=42, name="custom"),
+]
+
 
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = rows
-        mock_db.session.execute.return_value = mock_result
+@patch("repositories.reference_data.db")
+class TestEntryTypeRepository(ReferenceDataTestCase):
+    def test_get_entry_types_returns_list(self, mock_db):
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         types = repo.get_entry_types()
-        self.assertEqual(len(types), 2)
+        self.assertEqual(len(types), 3)
         self.assertEqual(types[0].id, 1)
         self.assertEqual(types[0].name, "article")
 
         # ensure the SQL contains the table name
-        mock_db.session.execute.assert_called_once()
-        sql = mock_db.session.execute.call_args[0][0]
+        sql = mock_db.session.execute.call_args_list[0][0][0]
         self.assertIn("FROM entry_types", str(sql))
 
-    @patch("repositories.entry_type_repository.db")
     def test_get_entry_types_empty(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = []
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results([], [], [])
 
         types = repo.get_entry_types()
         self.assertEqual(types, [])
 
-    @patch("repositories.entry_type_repository.db")
+    def test_get_entry_types_is_loaded_once(self, mock_db):
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
+
+        repo.get_entry_types()
+        repo.get_entry_type(1)
+        repo.get_entry_type_by_name("book")
+        self.assertEqual(mock_db.session.execute.call_count, 3)
+
+    def test_get_entry_types_reloads_when_version_changes(self, mock_db):
+        renumbered = [SimpleNamespace(id=7, name="article")]
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [], renumbered, [], [])
+        self.mock_versions.side_effect = [
+            {"reference_data": 1}, {"reference_data": 1}, {"reference_data": 2}]
+
+        self.assertEqual(repo.get_entry_type_by_name("article").id, 1)
+        self.assertEqual(repo.get_entry_type_by_name("article").id, 1)
+        self.assertEqual(repo.get_entry_type_by_name("article").id, 7)
+
+    def test_get_entry_types_is_not_cached_without_version(self, mock_db):
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [], ENTRY_TYPES, [], [])
+        self.mock_versions.return_value = {}
+
+        repo.get_entry_types()
+        repo.get_entry_types()
+        self.assertEqual(mock_db.session.execute.call_count, 6)
+
     def test_get_entry_type_by_id_found(self, mock_db):
-        mock_row = SimpleNamespace(id=42, name="custom")
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = mock_row
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         et = repo.get_entry_type(42)
         self.assertIsNotNone(et)
@@ -52,27 +71,21 @@ class TestEntryTypeRepository(unittest.TestCase):
         self.assertEqual(et.id, 42)
         self.assertEqual(et.name, "custom")
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
-        self.assertIn("WHERE id = :entry_type_id", str(sql))
-        self.assertEqual(params["entry_type_id"], 42)
+    def test_get_entry_type_by_numeric_string(self, mock_db):
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
+
+        self.assertEqual(repo.get_entry_type("2").name, "book")
+        self.assertIsNone(repo.get_entry_type("two"))
 
-    @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_id_none(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = None
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         et = repo.get_entry_type(999)
         self.assertIsNone(et)
 
-    @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_name_found(self, mock_db):
-        mock_row = SimpleNamespace(id=7, name="misc")
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = mock_row
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(
+            [SimpleNamespace(id=7, name="misc")], [], [])
 
         et = repo.get_entry_type_by_name("misc")
         self.assertIsNotNone(et)
@@ -83,17 +96,8 @@ class TestEntryTypeRepository(unittest.TestCase):
         self.assertEqual(et.id, 7)
         self.assertEqual(et.name, "misc")
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
-        self.assertIn("WHERE name = :entry_type", str(sql))
-        self.assertEqual(params["entry_type"], "misc")
-
-    @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_name_none(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = None
-        mock_db.session.execute.return_value = mock_result
+        mock_db.session.execute.side_effect = results(ENTRY_TYPES, [], [])
 
         et = repo.get_entry_type_by_name("nope")
         self.assertIsNone(et)
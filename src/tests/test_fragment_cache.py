@@ -0,0 +1,57 @@
+import unittest
+
+from entities.citation import Citation
+from entities.fragment_cache import FragmentCache, fragments
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        fragments.clear()
+        self.addCleanup(fragments.clear)
+
+    def test_evicts_least_recently_used(self):
+        cache = FragmentCache(maxsize=2)
+        cache.put((1, 1, "a"), "one")
+        cache.put((2, 1, "a"), "two")
+        cache.get((1, 1, "a"))
+        cache.put((3, 1, "a"), "three")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get((1, 1, "a")), "one")
+        self.assertIsNone(cache.get((2, 1, "a")))
+
+    def test_invalidate_drops_all_formats_of_a_citation(self):
+        cache = FragmentCache()
+        cache.put((1, 1, "to_bibtex"), "b")
+        cache.put((1, 1, "to_compact"), "c")
+        cache.put((2, 1, "to_bibtex"), "other")
+
+        cache.invalidate([1])
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get((2, 1, "to_bibtex")), "other")
+
+    def test_citation_with_row_version_is_formatted_once(self):
+        c = Citation(1, "book", "k", {"title": "T"}, row_version=7)
+
+        first = c.to_bibtex()
+        self.assertEqual(fragments.get((1, 7, "to_bibtex")), first)
+
+        # A second instance of the same version is served from the cache
+        fragments.put((1, 7, "to_bibtex"), "cached")
+        same = Citation(1, "book", "k", {"title": "T"}, row_version=7)
+        self.assertEqual(same.to_bibtex(), "cached")
+
+        newer = Citation(1, "book", "k", {"title": "U"}, row_version=8)
+        self.assertIn("title = {U}", newer.to_bibtex())
+
+    def test_citation_without_row_version_is_not_cached(self):
+        c = Citation(1, "book", "k", {"title": "T"})
+
+        c.to_human_readable()
+        c.to_compact()
+        self.assertEqual(len(fragments), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from flask import session
+
+import http_cache
+from config import app
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.render = MagicMock(return_value="body")
+
+    def test_make_etag_depends_on_parts(self):
+        self.assertEqual(http_cache.make_etag("a", 1), http_cache.make_etag("a", 1))
+        self.assertNotEqual(http_cache.make_etag("a", 1), http_cache.make_etag("a", 2))
+
+    def test_renders_with_validators(self):
+        with app.test_request_context("/citations"):
+            response = http_cache.conditional_response(self.render, ("x", 1), UPDATED_AT)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_etag()[0], http_cache.make_etag("x", 1))
+        self.assertEqual(response.last_modified, UPDATED_AT.replace(microsecond=0))
+        self.assertTrue(response.cache_control.no_cache)
+        self.render.assert_called_once()
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        etag = http_cache.make_etag("x", 1)
+        headers = {"If-None-Match": f'"{etag}"'}
+        with app.test_request_context("/citations", headers=headers):
+            response = http_cache.conditional_response(self.render, ("x", 1), UPDATED_AT)
+
+        self.assertEqual(response.status_code, 304)
+        self.render.assert_not_called()
+
+    def test_stale_etag_ignores_if_modified_since(self):
+        headers = {
+            "If-None-Match": '"old"',
+            "If-Modified-Since": "Wed, 01 May 2024 12:30:15 GMT",
+        }
+        with app.test_request_context("/citations", headers=headers):
+            response = http_cache.conditional_response(self.render, ("x", 1), UPDATED_AT)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        for header, status in (
+            ("Wed, 01 May 2024 12:30:15 GMT", 304),
+            ("Wed, 01 May 2024 12:30:14 GMT", 200),
+        ):
+            with app.test_request_context("/x", headers={"If-Modified-Since": header}):
+                response = http_cache.conditional_response(
+                    self.render, ("x",), UPDATED_AT)
+            self.assertEqual(response.status_code, status)
+
+    def test_pages_with_flashes_are_not_validated(self):
+        etag = http_cache.make_etag("x", 1)
+        with patch.dict(app.config, {"SECRET_KEY": "test"}), \
+                app.test_request_context("/x", headers={"If-None-Match": f'"{etag}"'}):
+            session["_flashes"] = [("success", "Saved")]
+            response = http_cache.conditional_response(self.render, ("x", 1))
+
+        self.assertEqual(response, "body")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+
+import repositories.job_checkpoint_repository as repo
+
+
+@patch("repositories.job_checkpoint_repository.db")
+class TestJobCheckpointRepository(unittest.TestCase):
+    def test_get_checkpoint(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = 42
+
+        self.assertEqual(repo.get_checkpoint("job"), 42)
+        _, params = mock_db.session.execute.call_args[0]
+        self.assertEqual(params, {"name": "job"})
+
+    def test_get_checkpoint_missing(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = None
+
+        self.assertIsNone(repo.get_checkpoint("job"))
+
+    def test_save_checkpoint_upserts_without_committing(self, mock_db):
+        repo.save_checkpoint("job", 7)
+
+        sql, params = mock_db.session.execute.call_args[0]
+        self.assertIn("ON CONFLICT (name) DO UPDATE", str(sql))
+        self.assertEqual(params, {"name": "job", "position": 7})
+        mock_db.session.commit.assert_not_called()
+
+    def test_delete_checkpoint_commits(self, mock_db):
+        repo.delete_checkpoint("job")
+
+        _, params = mock_db.session.execute.call_args[0]
+        self.assertEqual(params, {"name": "job"})
+        mock_db.session.commit.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, jsonify, request
+
+import json_codec
+
+
+class TestJsonCodec(unittest.TestCase):
+    def _backends(self):
+        yield "installed"
+        with patch("json_codec.orjson", None):
+            yield "stdlib"
+
+    def test_dumps_is_compact_and_keeps_unicode(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                out = json_codec.dumps({"title": "Äänestys", "year": 2020, "tags": ["a"]})
+                self.assertIsInstance(out, str)
+                self.assertEqual(out, '{"title":"Äänestys","year":2020,"tags":["a"]}')
+
+    def test_dumps_sort_keys_and_default(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                out = json_codec.dumps(
+                    {"b": datetime.date(2020, 1, 2), "a": 1}, default=str, sort_keys=True
+                )
+                self.assertEqual(out, '{"a":1,"b":"2020-01-02"}')
+
+    def test_dumps_without_default_rejects_unknown_types(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(TypeError):
+                    json_codec.dumps({"d": datetime.date(2020, 1, 2)})
+
+    def test_loads_str_and_bytes(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(json_codec.loads('{"a": [1, 2]}'), {"a": [1, 2]})
+                self.assertEqual(json_codec.loads(b'{"a": "\xc3\xa4"}'), {"a": "ä"})
+
+    def test_loads_invalid_raises_json_decode_error(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(json_codec.JSONDecodeError):
+                    json_codec.loads("{not json")
+
+
+class TestCodecJSONProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = json_codec.CodecJSONProvider(self.app)
+
+    def test_jsonify_uses_codec_and_flask_defaults(self):
+        with self.app.test_request_context():
+            response = jsonify({"b": datetime.date(2020, 1, 2), "a": "ä"})
+
+        self.assertEqual(
+            response.get_data(as_text=True),
+            '{"a":"ä","b":"Thu, 02 Jan 2020 00:00:00 GMT"}\n',
+        )
+
+    def test_jsonify_is_indented_in_debug_mode(self):
+        self.app.debug = True
+        with self.app.test_request_context():
+            response = jsonify({"a": 1})
+
+        self.assertEqual(response.get_data(as_text=True), '{\n  "a": 1\n}\n')
+
+    def test_request_json_is_decoded_with_codec(self):
+        with self.app.test_request_context(json={"doi": "10.1000/x"}):
+            with patch("json_codec.loads", wraps=json_codec.loads) as loads:
+                self.assertEqual(request.json, {"doi": "10.1000/x"})
+            loads.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import time
+import unittest
+
+from flask import Flask, Response, stream_with_context
+from sqlalchemy import create_engine, text
+
+import query_stats
+
+
+class TestParamsShape(unittest.TestCase):
+    def test_dict_params(self):
+        self.assertEqual(
+            query_stats.params_shape({"id": 1, "names": ["a", "b"], "key": "secret"}),
+            {"id": "int", "names": "list[2]", "key": "str"},
+        )
+
+    def test_executemany_and_positional(self):
+        self.assertEqual(
+            query_stats.params_shape([{"id": 1}, {"id": 2}], executemany=True),
+            "2 x {'id': 'int'}",
+        )
+        self.assertEqual(query_stats.params_shape((1, "x")), ["int", "str"])
+        self.assertIsNone(query_stats.params_shape(None))
+
+
+class TestQueryStats(unittest.TestCase):
+    def test_keeps_slowest_statements(self):
+        stats = query_stats.QueryStats(top=2)
+        stats.record("SELECT 1", {}, False, 0.001)
+        stats.record("SELECT  2\n FROM t", {"a": 1}, False, 0.003)
+        stats.record("SELECT 3", {}, False, 0.002)
+
+        self.assertEqual(stats.count, 3)
+        self.assertAlmostEqual(stats.seconds, 0.006)
+        slowest = stats.slowest()
+        self.assertEqual([sql for _, sql, _ in slowest], ["SELECT 2 FROM t", "SELECT 3"])
+        self.assertAlmostEqual(slowest[0][0], 3.0)
+        self.assertEqual(slowest[0][2], {"a": "int"})
+
+    def test_most_repeated(self):
+        stats = query_stats.QueryStats(top=0)
+        self.assertEqual(stats.most_repeated(), (0, None))
+        for _ in range(3):
+            stats.record("SELECT x FROM t WHERE id = %(id)s", {"id": 1}, False, 0.0)
+        stats.record("SELECT 1", {}, False, 0.0)
+
+        self.assertEqual(stats.most_repeated(), (3, "SELECT x FROM t WHERE id = %(id)s"))
+        self.assertEqual(stats.slowest(), [])
+
+
+class TestInstall(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.engine = create_engine("sqlite://")
+        self.delay = 0
+
+        @self.app.route("/")
+        def index():
+            with self.engine.connect() as conn:
+                for i in range(3):
+                    conn.execute(text("SELECT :i"), {"i": i})
+            time.sleep(self.delay)
+            return "ok"
+
+    def _install(self, **settings):
+        query_stats.install(
+            self.app, self.engine,
+            {"enabled": True, "server_timing": True, "slow_request_ms": 0, "top": 3, **settings})
+
+    def test_adds_server_timing(self):
+        self._install()
+        response = self.app.test_client().get("/")
+
+        timing = response.headers["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="3 queries", app;dur=[\d.]+$')
+
+    def test_server_timing_is_off_by_default(self):
+        self.assertFalse(query_stats.query_stats_settings({})["server_timing"])
+        self._install(server_timing=False)
+
+        response = self.app.test_client().get("/")
+
+        self.assertNotIn("Server-Timing", response.headers)
+
+    def test_streamed_responses_are_measured_when_closed(self):
+        @self.app.route("/stream")
+        def stream():
+            def chunks():
+                with self.engine.connect() as conn:
+                    for i in range(4):
+                        conn.execute(text("SELECT :i"), {"i": i})
+                        time.sleep(0.005)
+                        yield "x"
+            return Response(stream_with_context(chunks()))
+
+        self._install(slow_request_ms=10)
+
+        with self.assertLogs(self.app.logger, "WARNING") as logs:
+            response = self.app.test_client().get("/stream")
+            self.assertEqual(response.get_data(as_text=True), "xxxx")
+            self.assertNotIn("Server-Timing", response.headers)
+            response.close()
+
+        self.assertIn("Slow request: GET /stream -> 200", logs.output[0])
+        self.assertIn("4 queries", logs.output[0])
+
+    def test_logs_slow_requests(self):
+        self._install(slow_request_ms=5)
+        self.delay = 0.01
+
+        with self.assertLogs(self.app.logger, "WARNING") as logs:
+            self.app.test_client().get("/")
+
+        message = logs.output[0]
+        self.assertIn("Slow request: GET / -> 200", message)
+        self.assertIn("3 queries", message)
+        # SQLite binds parameters positionally
+        self.assertIn("params=['int']", message)
+        self.assertIn("repeated 3x: SELECT ?", message)
+
+    def test_fast_requests_are_not_logged(self):
+        self._install(slow_request_ms=10_000)
+
+        with self.assertNoLogs(self.app.logger, "WARNING"):
+            self.app.test_client().get("/")
+
+    def test_disabled(self):
+        self._install(enabled=False)
+        response = self.app.test_client().get("/")
+        self.assertNotIn("Server-Timing", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
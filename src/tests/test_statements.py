@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from config import app
+from repositories.statements import PreparedStatement, statement
+
+
+def _session(info):
+    session = MagicMock()
+    session.connection.return_value.info = info
+    return session
+
+
+class TestStatementRegistry(unittest.TestCase):
+    def test_statement_is_compiled_once(self):
+        sql = "SELECT id FROM citations WHERE id = :citation_id"
+        self.assertIs(statement(sql), statement(sql))
+        self.assertEqual(str(statement(sql)), sql)
+
+
+@patch.dict(app.config["DB_POOL"], {"prepared_statements": True})
+class TestPreparedStatement(unittest.TestCase):
+    def setUp(self):
+        self.prepared = PreparedStatement(
+            "by_key_and_type",
+            "SELECT c.id, ARRAY[]::text[] AS tags FROM citations c "
+            "WHERE c.citation_key = :key AND c.entry_type_id = :type_id OR c.citation_key = :key",
+            {"key": "text", "type_id": "integer"},
+        )
+
+    def test_prepare_and_execute_sql(self):
+        self.assertEqual(
+            str(self.prepared._prepare),
+            "PREPARE by_key_and_type (text, integer) AS "
+            "SELECT c.id, ARRAY[]::text[] AS tags FROM citations c "
+            "WHERE c.citation_key = $1 AND c.entry_type_id = $2 OR c.citation_key = $1",
+        )
+        self.assertEqual(
+            str(self.prepared._execute), "EXECUTE by_key_and_type (:key, :type_id)")
+
+    def test_prepares_once_per_connection(self):
+        info = {}
+        session = _session(info)
+        params = {"key": "k1", "type_id": 1}
+
+        self.prepared.execute(session, params)
+        self.prepared.execute(session, params)
+
+        statements = [str(c.args[0]) for c in session.execute.call_args_list]
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[0].startswith("PREPARE by_key_and_type"))
+        self.assertEqual(statements[1:], [str(self.prepared._execute)] * 2)
+        self.assertEqual(session.execute.call_args.args[1], params)
+        self.assertEqual(info["prepared_statements"], {"by_key_and_type"})
+
+        # A replacement connection starts with an empty info dict
+        other = _session({})
+        self.prepared.execute(other, params)
+        self.assertTrue(str(other.execute.call_args_list[0].args[0]).startswith("PREPARE"))
+
+    def test_runs_plain_statement_when_disabled(self):
+        session = _session({})
+        with patch.dict(app.config["DB_POOL"], {"prepared_statements": False}):
+            self.prepared.execute(session, {"key": "k1", "type_id": 1})
+
+        session.execute.assert_called_once_with(
+            self.prepared.statement, {"key": "k1", "type_id": 1})
+        session.connection.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import json
+import unittest
+from collections import Counter
+
+from benchmarks.synthetic import (
+    YEAR_RANGE,
+    LibraryGenerator,
+    load_template,
+    write_library,
+    zipf_cum_weights,
+)
+
+
+class TestSyntheticLibrary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.template = load_template()
+        cls.citations = list(LibraryGenerator(2_000, seed=1, template=cls.template).citations())
+
+    def test_same_seed_gives_the_same_library(self):
+        again = list(LibraryGenerator(2_000, seed=1, template=self.template).citations())
+        other = list(LibraryGenerator(2_000, seed=2, template=self.template).citations())
+
+        self.assertEqual(again, self.citations)
+        self.assertNotEqual(other, self.citations)
+
+    def test_citations_have_the_demo_shape(self):
+        demo_types = {c["entry_type"] for c in self.template["citations"]}
+        generator = LibraryGenerator(2_000, seed=1, template=self.template)
+
+        self.assertEqual(len(self.citations), 2_000)
+        self.assertEqual(len({c["citation_key"] for c in self.citations}), 2_000)
+        for citation in self.citations:
+            self.assertIn(citation["entry_type"], demo_types)
+            self.assertIn("title", citation["fields"])
+            self.assertIn(citation["category"], generator.categories)
+            self.assertTrue(set(citation["tags"]) <= set(generator.tags))
+            self.assertEqual(len(citation["tags"]), len(set(citation["tags"])))
+            year = citation["fields"]["year"]
+            self.assertTrue(YEAR_RANGE[0] <= year <= YEAR_RANGE[1])
+
+    def test_entry_types_keep_their_demo_proportions(self):
+        types = Counter(c["entry_type"] for c in self.citations)
+
+        self.assertEqual(types.most_common(1)[0][0], "article")
+
+    def test_vocabulary_grows_with_the_library(self):
+        small = LibraryGenerator(10, template=self.template)
+        large = LibraryGenerator(1_000_000, template=self.template)
+
+        self.assertEqual(sorted(small.tags), sorted(self.template["tags"]))
+        self.assertEqual(len(large.tags), 1_000)
+        self.assertEqual(len(large.categories), 63)
+        self.assertEqual(len(set(large.tags)), 1_000)
+        self.assertEqual(large.tags[:len(small.tags)], small.tags)
+
+    def test_popular_tags_cover_most_citations(self):
+        tags = Counter(t for c in self.citations for t in c["tags"])
+        generator = LibraryGenerator(2_000, template=self.template)
+        top = sum(tags[t] for t in generator.tags[:5])
+
+        self.assertGreater(top, sum(tags.values()) / 2)
+
+    def test_zipf_weights_are_cumulative(self):
+        weights = zipf_cum_weights(4, exponent=1)
+
+        self.assertEqual(weights[0], 1)
+        self.assertAlmostEqual(weights[-1], 1 + 1 / 2 + 1 / 3 + 1 / 4)
+
+    def test_write_library_uses_the_demo_data_format(self):
+        generator = LibraryGenerator(50, template=self.template)
+        out = io.StringIO()
+
+        write_library(generator, out)
+        library = json.loads(out.getvalue())
+
+        self.assertEqual(library["tags"], generator.tags)
+        self.assertEqual(library["categories"], generator.categories)
+        self.assertEqual(library["citations"], list(generator.citations()))
@@ -1,4 +1,5 @@
 
+import json
 import unittest
 from typing import cast
 from unittest.mock import Mock, patch
@@ -7,6 +8,19 @@ import requests
 from flask import Flask
 
 import util
+from config import app
+from doi_cache import ERROR, FOUND, NOT_FOUND
+from tests.helpers import UncachedDoiTestCase
+
+
+def _json_body(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} error", response=response)
 
 
 class TestUtil(unittest.TestCase):
@@ -77,6 +91,21 @@ class TestUtil(unittest.TestCase):
         parsed = util.parse_search_queries({"year_from": "abc", "year_to": ""})
         self.assertIsNone(parsed["year_from"])
         self.assertIsNone(parsed["year_to"])
+        self.assertFalse(parsed["fuzzy_author"])
+        self.assertIsNone(parsed["per_page"])
+        self.assertIsNone(parsed["cursor"])
+
+    def test_parse_search_queries_pagination(self):
+        parsed = util.parse_search_queries(
+            {"per_page": "25", "cursor": " eyJkIjoibmV4dCJ9 "})
+        self.assertEqual(parsed["per_page"], 25)
+        self.assertEqual(parsed["cursor"], "eyJkIjoibmV4dCJ9")
+
+    def test_parse_search_queries_fuzzy_author_flag(self):
+        parsed = util.parse_search_queries(
+            {"author": "Smoth", "fuzzy_author": "1"})
+        self.assertTrue(parsed["fuzzy_author"])
+        self.assertEqual(parsed["author"], "smoth")
 
     def test_parse_search_queries_int_years_and_variants(self):
         args = {"year_from": 2015, "year_to": 2020,
@@ -372,6 +401,22 @@ class TestToCitationVariants(unittest.TestCase):
         self.assertEqual(c.tags, ['ta', 'tb'])
         self.assertEqual(c.categories, ['ca'])
 
+    def test_to_citation_passes_driver_lists_through_without_copying(self):
+        tags = ["ta", "tb"]
+        categories = ["ca"]
+        row = type("R", (), {
+            "id": 21,
+            "entry_type": "misc",
+            "citation_key": "k21",
+            "fields": {},
+            "tags": tags,
+            "categories": categories,
+        })
+
+        c = util.to_citation(row)
+        self.assertIs(c.tags, tags)
+        self.assertIs(c.categories, categories)
+
     def test_to_citation_json_array_string_tags_triggers_parsed_list_branch(self):
         # Ensure that when tags/categories are JSON array strings, _to_list uses parsed list
         row = type("R", (), {
@@ -389,7 +434,7 @@ class TestToCitationVariants(unittest.TestCase):
         self.assertEqual(c.categories, ['catX'])
 
 
-class TestDOIHelpers(unittest.TestCase):
+class TestDOIHelpers(UncachedDoiTestCase):
     def test__doi_extract_no_match(self):
         self.assertIsNone(util._doi_extract('no doi here'))
 
@@ -508,11 +553,11 @@ class TestDOIHelpers(unittest.TestCase):
         self.assertIsNone(util._doi_parse_year(
             {'issued': ['not', 'a', 'dict']}))
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_success(self, mock_get):
         mock_resp = Mock()
         mock_resp.raise_for_status = Mock()
-        mock_resp.json = Mock(return_value={
+        mock_resp.content = _json_body({
             'title': ['A Great Paper'],
             'author': [
                 {'given': 'Alice', 'family': 'Adams'},
@@ -539,38 +584,92 @@ class TestDOIHelpers(unittest.TestCase):
         self.assertEqual(fields.get('volume'), '7')
         self.assertEqual(fields.get('number'), '2')
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_request_exception(self, mock_get):
         mock_get.side_effect = requests.RequestException('boom')
         self.assertIsNone(util.fetch_doi_metadata('10.1000/doesntmatter'))
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_invalid_json(self, mock_get):
         mock_resp = Mock()
         mock_resp.raise_for_status = Mock()
-        mock_resp.json = Mock(side_effect=ValueError('bad json'))
+        mock_resp.content = b'bad json'
         mock_get.return_value = mock_resp
         self.assertIsNone(util.fetch_doi_metadata('10.1000/x'))
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_non_dict_json(self, mock_get):
         mock_resp = Mock()
         mock_resp.raise_for_status = Mock()
-        mock_resp.json = Mock(return_value=['not', 'a', 'dict'])
+        mock_resp.content = _json_body(['not', 'a', 'dict'])
         mock_get.return_value = mock_resp
         self.assertIsNone(util.fetch_doi_metadata('10.1000/x'))
 
+    @patch('doi_client.client.session.get')
+    def test__doi_resolve_not_found_and_errors(self, mock_get):
+        cases = [
+            (_http_error(404), NOT_FOUND),
+            (_http_error(503), ERROR),
+            (requests.Timeout('slow'), ERROR),
+        ]
+        for error, status in cases:
+            with self.subTest(error=error):
+                mock_get.return_value.raise_for_status.side_effect = error
+                self.assertEqual(util._doi_resolve('10.1000/x'), (status, None))
+
+    @patch('doi_client.client.session.get')
+    def test__doi_resolve_found(self, mock_get):
+        mock_get.return_value.content = _json_body({'title': 'Found'})
+
+        self.assertEqual(util._doi_resolve('10.1000/x'), (FOUND, {'title': 'Found'}))
+
+    @patch('util.cached_doi_lookup')
+    def test_fetch_doi_metadata_goes_through_the_cache(self, mock_lookup):
+        mock_lookup.return_value = (FOUND, {'title': 'Cached'})
+
+        fields = util.fetch_doi_metadata('https://doi.org/10.1000/Cached.')
+
+        self.assertEqual(fields, {'title': 'Cached'})
+        mock_lookup.assert_called_once_with('10.1000/Cached', util._doi_resolve)
+
+    @patch('util.offline_doi_lookup')
+    @patch('util.cached_doi_lookup')
+    def test_fetch_doi_metadata_offline_modes(self, mock_lookup, mock_offline):
+        mock_lookup.return_value = (FOUND, {'title': 'Online'})
+        cases = [
+            ('off', (True, {'title': 'Dump'}), {'title': 'Online'}),
+            ('first', (True, {'title': 'Dump'}), {'title': 'Dump'}),
+            ('first', (False, None), {'title': 'Online'}),
+            ('only', (True, {'title': 'Dump'}), {'title': 'Dump'}),
+            ('only', (False, None), None),
+        ]
+        for mode, offline, expected in cases:
+            with self.subTest(mode=mode, offline=offline), \
+                    patch.dict('doi_client.client.settings', {'offline': mode}):
+                mock_offline.return_value = offline
+                self.assertEqual(util.fetch_doi_metadata('10.1000/x'), expected)
+
+        self.assertEqual(mock_offline.call_count, 4)
+        mock_offline.assert_called_with('10.1000/x')
+
+    @patch('util._doi_request_json')
+    def test_lookup_doi_reports_failed_lookups(self, mock_request):
+        mock_request.side_effect = requests.ConnectionError('refused')
+
+        self.assertEqual(util.lookup_doi('10.1000/x'), (ERROR, None))
+        self.assertEqual(util.lookup_doi('no doi here'), (NOT_FOUND, None))
+
     def test_fetch_doi_metadata_empty_input(self):
         self.assertIsNone(util.fetch_doi_metadata(''))
         self.assertIsNone(util.fetch_doi_metadata(None))
         # input with no DOI-like substring should also return None
         self.assertIsNone(util.fetch_doi_metadata('no doi here'))
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_title_string_and_authors_key(self, mock_get):
         mock_resp = Mock()
         mock_resp.raise_for_status = Mock()
-        mock_resp.json = Mock(return_value={
+        mock_resp.content = _json_body({
             'title': 'Single title string',
             'authors': ['Solo Author'],
             'issued': {'date-parts': [[2001]]}
@@ -584,11 +683,11 @@ class TestDOIHelpers(unittest.TestCase):
         self.assertEqual(fields.get('title'), 'Single title string')
         self.assertEqual(fields.get('author'), 'Solo Author')
 
-    @patch('util.requests.get')
+    @patch('doi_client.client.session.get')
     def test_fetch_doi_metadata_empty_dict_returns_none(self, mock_get):
         mock_resp = Mock()
         mock_resp.raise_for_status = Mock()
-        mock_resp.json = Mock(return_value={})
+        mock_resp.content = _json_body({})
         mock_get.return_value = mock_resp
 
         # empty dict -> no recognized fields -> should return None
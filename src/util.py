@@ -1,12 +1,16 @@
-import json
 import re
 
 import requests
 from flask import session
 
+import doi_client
+import json_codec
+from doi_cache import ERROR, FOUND, NOT_FOUND
 from entities.category import Category, Tag
 from entities.citation import Citation
 from entities.entry_type import EntryType
+from repositories.doi_cache_repository import cached_doi_lookup
+from repositories.doi_metadata_repository import offline_doi_lookup
 
 
 def sanitize(value):
@@ -111,6 +115,8 @@ def parse_search_queries(args):
     - uppercases `direction` and validates it to either 'ASC' or 'DESC'
     - parses `year_from` and `year_to` to ints when possible, otherwise None
     - restricts `sort_by` to a small whitelist (None if not allowed)
+    - parses the `fuzzy_author` checkbox to a bool
+    - parses `per_page` to an int and passes the opaque `cursor` through
 
     Returns a dict with the same keys the rest of the app expects.
     """
@@ -160,10 +166,13 @@ def parse_search_queries(args):
         "author": _str_lower("author"),
         "year_from": _int_or_none(args.get("year_from")),
         "year_to": _int_or_none(args.get("year_to")),
+        "fuzzy_author": args.get("fuzzy_author") in ("1", "on", "true"),
         "sort_by": sort_by,
         "direction": direction,
         "tags": tags,
         "categories": categories,
+        "per_page": _int_or_none(args.get("per_page")),
+        "cursor": sanitize(args.get("cursor") or "") or None,
     }
 
 
@@ -235,50 +244,56 @@ def to_tag(row):
     )
 
 
-def to_citation(row):
-    """Converts a database row to a Citation object."""
-    if not row:
-        return None
-
-    def _parse_fields(val):
-        if not val:
+def _parse_fields(val):
+    if not val:
+        return {}
+    if isinstance(val, str):
+        try:
+            parsed = json_codec.loads(val)
+            if isinstance(parsed, dict):
+                return parsed
+        except json_codec.JSONDecodeError:
             return {}
-        if isinstance(val, str):
-            try:
-                parsed = json.loads(val)
-                if isinstance(parsed, dict):
-                    return parsed
-            except json.JSONDecodeError:
-                return {}
-        return val
+    return val
+
 
-    def _to_list(val):
-        if not val:
-            return []
-        if isinstance(val, (list, tuple)):
-            return list(val)
-        if isinstance(val, str):
-            try:
-                parsed = json.loads(val)
-                return list(parsed)
-            except json.JSONDecodeError:
-                pass
-            return [p.strip() for p in val.split(",") if p.strip()]
+def _to_list(val):
+    if not val:
+        return []
+    if isinstance(val, list):
+        return val
+    if isinstance(val, str):
         try:
-            return list(val)
-        except TypeError:
-            return []
+            parsed = json_codec.loads(val)
+            return list(parsed)
+        except json_codec.JSONDecodeError:
+            pass
+        return [p.strip() for p in val.split(",") if p.strip()]
+    try:
+        return list(val)
+    except TypeError:
+        return []
 
-    fields = _parse_fields(row.fields)
-    tags = _to_list(getattr(row, "tags", None))
-    categories = _to_list(getattr(row, "categories", None))
+
+def to_citation(row):
+    """Converts a database row to a Citation object.
+
+    The fields dict and tag/category lists decoded by the driver are used
+    as they are, without copying.
+    """
+    if not row:
+        return None
 
     return Citation(
         row.id,
         row.entry_type,
         row.citation_key,
-        fields,
-        metadata={"tags": tags, "categories": categories},
+        _parse_fields(row.fields),
+        metadata={
+            "tags": _to_list(getattr(row, "tags", None)),
+            "categories": _to_list(getattr(row, "categories", None)),
+        },
+        row_version=getattr(row, "row_version", None),
     )
 
 
@@ -297,12 +312,7 @@ def _doi_extract(value):
 
 
 def _doi_request_json(doi):
-    url = "https://citation.doi.org/metadata"
-    headers = {
-        "Accept": "application/vnd.citationstyles.csl+json, application/json"}
-    resp = requests.get(url, params={"doi": doi}, headers=headers, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
+    return doi_client.client.get_json(doi)
 
 
 def _doi_first_of_keys(dct, keys):
@@ -352,26 +362,69 @@ def _doi_parse_year(dct):
 def fetch_doi_metadata(doi_input):
     """Fetch citation metadata for a DOI.
 
-    This function extracts a DOI from the input, queries the DOI metadata
-    endpoint and returns a compact `fields` dict. It delegates parsing tasks
-    to small helpers to keep complexity low (fewer local variables and
-    branches) and avoids catching overly broad exceptions.
+    This function extracts a DOI from the input and returns a compact
+    `fields` dict of its metadata, or None if it can not be resolved.
     """
-    # pylint: disable=R0912
 
-    if not doi_input:
-        return None
+    return lookup_doi(doi_input)[1]
 
-    doi = _doi_extract(doi_input)
+
+def lookup_doi(doi_input):
+    """Looks up the metadata of the DOI in the input.
+
+    Returns a (status, fields) tuple, where status is FOUND, NOT_FOUND (also
+    for inputs without a DOI) or ERROR when the metadata service failed and
+    a retry may succeed. Lookups go through the DOI cache, so a DOI is only
+    requested from the metadata endpoint again once its cached result has
+    expired. With DOI_OFFLINE set, the imported dump is consulted first; in
+    the "only" mode a DOI missing from it is not found.
+    """
+
+    doi = _doi_extract(doi_input) if doi_input else None
     if not doi:
-        return None
+        return NOT_FOUND, None
+
+    offline = doi_client.client.settings["offline"]
+    if offline != doi_client.OFFLINE_OFF:
+        found, fields = offline_doi_lookup(doi)
+        if found:
+            return FOUND, fields
+        if offline == doi_client.OFFLINE_ONLY:
+            return NOT_FOUND, None
+
+    return cached_doi_lookup(doi, _doi_resolve)
+
+
+def _doi_resolve(doi):
+    """Queries the DOI metadata endpoint.
+
+    Returns a (status, fields) tuple: FOUND with the fields, NOT_FOUND when
+    the endpoint does not know the DOI or has no usable metadata for it, and
+    ERROR when the lookup failed and may succeed if retried.
+    """
 
     try:
         data = _doi_request_json(doi)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return NOT_FOUND, None
+        return ERROR, None
     except requests.RequestException:
-        return None
+        return ERROR, None
     except ValueError:
-        return None
+        return ERROR, None
+
+    fields = _doi_parse_fields(data)
+    if not fields:
+        return NOT_FOUND, None
+    return FOUND, fields
+
+
+def _doi_parse_fields(data):
+    """Builds the compact `fields` dict from a CSL-JSON record. It delegates
+    parsing tasks to small helpers to keep complexity low (fewer local
+    variables and branches)."""
+    # pylint: disable=R0912
 
     if not isinstance(data, dict):
         return None